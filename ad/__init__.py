@@ -1,2 +1,12 @@
 from .ad import *
-from .simple_ops import *
\ No newline at end of file
+from .simple_ops import *
+from .tape import *
+from .sparse import *
+from .function import *
+from .simplifier import *
+from .cache import *
+from .incremental import *
+from .serialization import *
+from .codegen import *
+from .optimize import *
+from .solvers import *
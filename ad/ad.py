@@ -2,40 +2,252 @@
 differentiation library. +, -, *, /, and exponentiation is also implemented
 here to support simple operator overloading.
 """
+import contextlib
+import functools
+import heapq
+import itertools
+import math
+import numbers
+import weakref
+
 import numpy as np
 
-__all__ = ['Expression', 'Variable', 'Constant']
+__all__ = ['Expression', 'Variable', 'Constant', 'jacobian', 'interning']
+
+# Graphs deeper than this are evaluated from checkpoints instead of
+# recursing from the output all the way down, see _checkpoints
+_CHECKPOINT_DEPTH = 250
+
+# Checkpoints of the deep roots evaluated so far by depth, see
+# _checkpoints. The root itself is never a checkpoint, so the values do not
+# keep their keys alive
+_checkpoint_cache = weakref.WeakKeyDictionary()
+
+# Nodes that can be shared while interning is enabled, None otherwise
+_intern_table = None
+
+# Weak references to the live Variables by index, see Variable._index
+_variables = dict()
+# Indices of Variables that were garbage collected, reused lowest first to
+# keep the masks short
+_free_indices = []
 
 
-class Expression(object):
+@contextlib.contextmanager
+def interning():
+    """Context manager under which building a node that is structurally
+    identical to one that is still alive (same op, same children and same
+    constant) returns the existing node. Shared subexpressions are then
+    evaluated only once. The table only holds weak references, so it never
+    keeps a graph alive. Variables are never merged.
+
+    Examples
+    --------
+    >>> import ad
+    >>> x = ad.Variable('x')
+    >>> with ad.interning():
+    ...     ad.Sin(x) + 1.0 is ad.Sin(x) + 1.0
+    True
+    """
+    global _intern_table
+    previous = _intern_table
+    if previous is None:
+        _intern_table = weakref.WeakValueDictionary()
+    try:
+        yield
+    finally:
+        _intern_table = previous
+
+
+class _Interned(type):
+    """Metaclass of the nodes, looks nodes up in the interning table by the
+    key from _intern_key before building new ones."""
+    def __call__(cls, *args, **kwargs):
+        if _intern_table is None:
+            return super().__call__(*args, **kwargs)
+        key = cls._intern_key(*args, **kwargs)
+        if key is None:
+            return super().__call__(*args, **kwargs)
+        node = _intern_table.get(key)
+        if node is None:
+            node = super().__call__(*args, **kwargs)
+            _intern_table[key] = node
+        return node
+
+
+class Expression(object, metaclass=_Interned):
     '''Base expression class that represents anything in our computational
     graph. Everything should be one of these.'''
+    # Graphs can have millions of nodes, slots keep each of them small.
+    # _deps is the bitmask of the indices of the variables this node depends
+    # on, _point_cache the PointCache of results by point, see
+    # enable_cache, and _tape the Tape hvp compiled for this root
+    __slots__ = ('grad', 'children', '_deps', '_depth', '_point_cache',
+                 '_tape', '__weakref__')
+
     def __init__(self, grad=False):
         self.grad = grad
-        self.children = []
-        self.dep_vars = set()
+        self.children = ()
+        self._deps = 0
+        # Number of nodes on the longest path down to a leaf
+        self._depth = 1
+        self._point_cache = None
+        self._tape = None
+
+    @classmethod
+    def _intern_key(cls, *args, **kwargs):
+        '''Helper - Returns the key identifying the node built from these
+        arguments while interning, or None if it should never be shared.
+        Children are identified by id, which is safe since an interned node
+        keeps its children alive.'''
+        return None
+
+    @property
+    def dep_vars(self):
+        '''The set of Variables this expression depends on.'''
+        return frozenset(_vars_of(self._deps))
+
+    def _depends_on(self, var):
+        '''Helper - Checks whether this expression depends on var.'''
+        return (self._deps >> var._index) & 1 == 1
+
+    def __getstate__(self):
+        '''Returns the slots to pickle or copy, without the Tape kept by
+        hvp, which is compiled again when needed.'''
+        slots = dict()
+        for cls in type(self).__mro__:
+            for name in getattr(cls, '__slots__', ()):
+                if name not in ('_tape', '__weakref__') and \
+                        hasattr(self, name):
+                    slots[name] = getattr(self, name)
+        return None, slots
+
+    def __setstate__(self, state):
+        '''Restores a pickled or copied node. The masks of dependencies
+        depend on the indices the Variables got in this process, so they
+        are recomputed from the children.'''
+        _, slots = state
+        for name, val in slots.items():
+            setattr(self, name, val)
+        self._tape = None
+        self._deps = 0
+        for child in self.children:
+            self._deps |= child._deps
 
     def eval(self, feed_dict):
         '''Evaluates the entire computation graph given a dictionary of
-        variables mapped to values.'''
-        return self._eval(feed_dict, dict())
+        variables mapped to values. Variables may also be mapped to 1-D
+        arrays of N values, in which case the expression is evaluated at all
+        N points at once and an array of length N is returned.'''
+        cache_dict, _, _, _ = self._caches(feed_dict)
+        for node in _checkpoints(self):
+            node._eval(feed_dict, cache_dict)
+        res = self._eval(feed_dict, cache_dict)
+        shape = _batch_shape(feed_dict)
+        if shape != ():
+            return _broadcast(res, shape)
+        return res
     
     def _eval(self, feed_dict, cache_dict):
         '''Helper - Evaluates the computation graph recursively.'''
         raise NotImplementedError
 
-    def d(self, feed_dict):
-        '''Evaluates the derivative at the points given, returns to user'''
-        res =  self._d(feed_dict, dict(), dict())
-        if len(self.dep_vars) == 0:
+    def _op(self, *args):
+        '''Helper - Evaluates this node alone given the values of its
+        children, in order.'''
+        raise NotImplementedError
+
+    def enable_cache(self, maxsize=8):
+        '''Keeps the node values and derivatives computed by eval, d,
+        gradient, value_and_grad and hessian at the maxsize most recently
+        used points, so later calls at one of these points reuse them. See
+        ad.PointCache.'''
+        from .cache import PointCache
+        self._point_cache = PointCache(maxsize)
+
+    def disable_cache(self):
+        '''Drops the cache of results by point.'''
+        self._point_cache = None
+
+    def cache_info(self):
+        '''Returns the hits, misses, maxsize and current size of the cache
+        of results by point, or None if it is not enabled.'''
+        if self._point_cache is None:
+            return None
+        return self._point_cache.info()
+
+    def _caches(self, feed_dict):
+        '''Helper - Returns the value, derivative, hessian and adjoint cache
+        dictionaries to use for the point given. They are empty unless
+        the point is in the cache of results by point.'''
+        if self._point_cache is None:
+            return dict(), dict(), dict(), dict()
+        return self._point_cache.lookup(feed_dict)
+
+    def _cached_adjoints(self, feed_dict):
+        '''Helper - Returns the value cache dictionary for the point given
+        and the adjoints of the reverse sweep from self, which are only
+        computed if the cache of results by point does not have them.'''
+        e_cache_dict, _, _, a_cache_dict = self._caches(feed_dict)
+        if id(self) not in a_cache_dict:
+            a_cache_dict.update(self._adjoints(feed_dict, e_cache_dict))
+        return e_cache_dict, a_cache_dict
+
+    def compile(self):
+        '''Flattens the computation graph into a Tape that can evaluate the
+        value, derivative and hessian repeatedly without walking the graph
+        again. The graph should not be changed after compiling.'''
+        from .tape import Tape
+        return Tape(self)
+
+    def incremental(self):
+        '''Returns an evaluation context that remembers the node values and
+        derivatives of its last call and only recomputes the nodes that
+        depend on variables whose values changed. See ad.Incremental.'''
+        from .incremental import Incremental
+        return Incremental(self)
+
+    def lambdify(self, args, derivatives=0):
+        '''Returns a plain Python function of the values of the variables
+        in args computing the value, and up to the hessian, of this
+        expression without walking the graph. See ad.lambdify.'''
+        from .codegen import lambdify
+        return lambdify(self, args, derivatives)
+
+    def d(self, feed_dict, mode='forward'):
+        '''Evaluates the derivative at the points given, returns to user.
+        With mode='reverse' the derivative is accumulated backwards from the
+        output instead, so one forward sweep and one backward sweep over the
+        graph give the derivative with respect to every variable.'''
+        if mode == 'forward':
+            e_cache_dict, d_cache_dict, _, _ = self._caches(feed_dict)
+            checkpoints = _checkpoints(self)
+            for node in checkpoints:
+                node._eval(feed_dict, e_cache_dict)
+            for node in checkpoints:
+                node._d(feed_dict, e_cache_dict, d_cache_dict)
+            res = self._d(feed_dict, e_cache_dict, d_cache_dict)
+        elif mode == 'reverse':
+            _, adjoints = self._cached_adjoints(feed_dict)
+            res = {var: adjoints[id(var)] for var in _vars_of(self._deps)}
+        else:
+            raise ValueError('Unknown differentiation mode %s' % mode)
+        return self._format_d(res, _batch_shape(feed_dict))
+
+    def _format_d(self, res, shape):
+        '''Helper - Turns a dictionary of derivatives into what d returns.'''
+        if shape != ():
+            res = {var: _broadcast(val, shape) for var, val in res.items()}
+        if self._deps == 0:
             # No dependent variables - it is a constant
-            return 0
+            return 0 if shape == () else np.zeros(shape)
         if len(res) == 1:
             # This is the non-vectorized case, scalar func of scalar
             # Return a number, not a dictionary
             return list(res.values())[0]
 
-        return res
+        # Copy, the dictionary may belong to the cache
+        return dict(res)
 
     def _d(self, feed_dict, e_cache_dict, d_cache_dict):
         '''Helper - Evaluates the differentiation products recursively.
@@ -45,18 +257,49 @@ class Expression(object):
         '''
         raise NotImplementedError('Jacobian not implemented for this expr')
     
-    def hessian(self, feed_dict):
+    def hessian(self, feed_dict, wrt=None, sparse=False):
         '''Evaluates the hessian at the points given, returns to user as a 
         dictionary of dictionarys (to be indexed as [var1][var2] for the
-        derivative with respect to var1 then var2)'''
-        res = self._h(feed_dict, dict(), dict(), dict())
-        if len(self.dep_vars) == 0:
-            return 0
-        elif len(self.dep_vars) == 1:
+        derivative with respect to var1 then var2). If a list of variables
+        is given as wrt, returns the hessian as a (V, V) array in that order
+        instead, or as an (N, V, V) array for a batch of N points. With
+        sparse=True only the structurally nonzero entries are computed and
+        returned as (rows, cols, vals) arrays, see ad.hessian_sparsity.'''
+        if sparse:
+            if wrt is None:
+                raise ValueError('The sparse hessian needs wrt')
+            from .sparse import _sparse_hessian
+            return _sparse_hessian(self, feed_dict, wrt)
+        e_cache, d_cache, h_cache, _ = self._caches(feed_dict)
+        if wrt is not None:
+            (_, _, packed), = _second_order([self], feed_dict, wrt, e_cache)
+            return _unpack_symmetric(packed, len(wrt),
+                                     _batch_shape(feed_dict))
+        checkpoints = _checkpoints(self)
+        for node in checkpoints:
+            node._eval(feed_dict, e_cache)
+        for node in checkpoints:
+            node._d(feed_dict, e_cache, d_cache)
+        for node in checkpoints:
+            node._h(feed_dict, e_cache, d_cache, h_cache)
+        res = self._h(feed_dict, e_cache, d_cache, h_cache)
+        return self._format_h(res, _batch_shape(feed_dict))
+
+    def _format_h(self, res, shape):
+        '''Helper - Turns a dictionary of dictionaries of second
+        derivatives into what hessian returns.'''
+        if shape != ():
+            res = {var1: {var2: _broadcast(val, shape)
+                          for var2, val in row.items()}
+                   for var1, row in res.items()}
+        if self._deps == 0:
+            return 0 if shape == () else np.zeros(shape)
+        elif self._deps & (self._deps - 1) == 0:
             # This is the 1D hessian case, so just a scalar
             return list(list(res.values())[0].values())[0]
         else:
-            return res
+            # Copy, the dictionaries may belong to the cache
+            return {var: dict(row) for var, row in res.items()}
 
     def _h(self, feed_dict, e_cache_dict, d_cache_dict, h_cache_dict):
         '''Helper - Evaluates the differentiation products recursively.
@@ -67,14 +310,181 @@ class Expression(object):
         '''
         raise NotImplementedError('Hessian not implemented for this expr')
 
-    def d_expr(self, n=1):
+    def _adjoints(self, feed_dict, e_cache_dict):
+        '''Helper - Propagates adjoints from self back to the variables.
+        @param: feed_dict: dictionary mapping var names
+        @param: e_cache_dict: cache for previously evaluated values
+        @return: dictionary mapping the id of each node that depends on a
+                 variable to its adjoint
+        '''
+        order = _topological_sort(self)
+        for node in order:
+            # Children are always cached first, so this never recurses
+            node._eval(feed_dict, e_cache_dict)
+        adjoints = {id(self): 1.0}
+        for node in reversed(order):
+            if node._deps == 0 or isinstance(node, Variable):
+                # Constants (and anything built from them) have no adjoint
+                continue
+            adj = adjoints[id(node)]
+            res = node._eval(feed_dict, e_cache_dict)
+            args = [child._eval(feed_dict, e_cache_dict)
+                    for child in node.children]
+            partials = node._partials(res, *args)
+            for child, partial in zip(node.children, partials):
+                if child._deps != 0:
+                    adjoints[id(child)] = adjoints.get(id(child), 0) + \
+                                          adj * partial
+        return adjoints
+
+    def gradient(self, feed_dict, wrt):
+        '''Evaluates the derivative at the points given with respect to the
+        variables in wrt, using reverse mode. Returns a float array of length
+        V in the order of wrt, or an (N, V) array for a batch of N points.
+        Variables that the expression does not depend on get 0.'''
+        _, adjoints = self._cached_adjoints(feed_dict)
+        ret = np.zeros(_batch_shape(feed_dict) + (len(wrt),))
+        for i, var in enumerate(wrt):
+            if self._depends_on(var):
+                ret[..., i] = adjoints[id(var)]
+        return ret
+
+    def value_and_grad(self, feed_dict, wrt=None):
+        '''Evaluates the value and the derivative at the points given
+        together, with one forward and one backward sweep over the graph.
+        The derivative is returned like d does, or like gradient does if a
+        list of variables is given as wrt.'''
+        e_cache_dict, adjoints = self._cached_adjoints(feed_dict)
+        shape = _batch_shape(feed_dict)
+        value = _broadcast(self._eval(feed_dict, e_cache_dict), shape)
+        if wrt is None:
+            res = {var: adjoints[id(var)] for var in _vars_of(self._deps)}
+            return value, self._format_d(res, shape)
+        grad = np.zeros(shape + (len(wrt),))
+        for i, var in enumerate(wrt):
+            if self._depends_on(var):
+                grad[..., i] = adjoints[id(var)]
+        return value, grad
+
+    def value_grad_hessian(self, feed_dict, wrt=None):
+        '''Evaluates the value, the derivative and the hessian at the points
+        given together, in a single forward sweep over the graph. The
+        derivatives are returned like d and hessian do, or as arrays in the
+        order of wrt like gradient and hessian(wrt=...) do if a list of
+        variables is given as wrt.'''
+        e_cache_dict, _, _, _ = self._caches(feed_dict)
+        variables = wrt
+        if wrt is None:
+            variables = [node for node in _topological_sort(self)
+                         if isinstance(node, Variable)]
+        n_vars = len(variables)
+        shape = _batch_shape(feed_dict)
+        (value, grad, packed), = _second_order([self], feed_dict, variables,
+                                               e_cache_dict)
+        value = _broadcast(value, shape)
+        if grad is None:
+            grad = np.zeros(shape + (n_vars,))
+        else:
+            grad = np.moveaxis(_broadcast(grad, (n_vars,) + shape), 0, -1)
+        hess = _unpack_symmetric(packed, n_vars, shape)
+        if wrt is not None:
+            return value, grad, hess
+        d = {var: grad[..., i] for i, var in enumerate(variables)}
+        h = {var1: {var2: hess[..., i, j] for j, var2 in enumerate(variables)}
+             for i, var1 in enumerate(variables)}
+        if shape == ():
+            # Numbers for a single point, like d and hessian return
+            d = {var: float(val) for var, val in d.items()}
+            h = {var1: {var2: float(val) for var2, val in row.items()}
+                 for var1, row in h.items()}
+        return value, self._format_d(d, shape), self._format_h(h, shape)
+
+    def hvp(self, feed_dict, v, wrt):
+        '''Evaluates the hessian with respect to the variables in wrt times
+        the vector v, without forming the hessian. v may also be a (V, k)
+        array of k directions, which then share a single pass over the
+        graph. Returns an array of the same shape as v, with the batch
+        dimensions in front for a batch of points.
+
+        Uses forward-over-reverse: the directions are pushed forward as
+        tangents and the reverse sweep then propagates the tangents of the
+        adjoints, so the cost is a small multiple of a gradient evaluation.
+        The graph is compiled into a Tape on the first call, which later
+        calls reuse.'''
+        if self._tape is None:
+            self._tape = self.compile()
+        return self._tape.hvp(feed_dict, v, wrt)
+
+    def jvp(self, feed_dict, tangents, wrt=None):
+        '''Evaluates the directional derivative at the points given in a
+        single forward pass, carrying one tangent per node instead of a
+        dictionary of derivatives.
+        @param: feed_dict: dictionary mapping var names
+        @param: tangents: dictionary mapping variables to the seed of their
+                tangent, either a number or a length k array for k
+                directions. Missing variables get 0. With wrt, a (V,) or
+                (V, k) array of seeds in the order of wrt instead.
+        @param: wrt: list of the V variables the rows of tangents belong to
+        @return: the derivative along the direction, or a length k array
+                 for k directions. For a batch of N points the result has
+                 shape (N,) or (N, k).
+        '''
+        if wrt is None:
+            wrt = list(tangents.keys())
+            seeds = [np.asarray(tangents[var], dtype=float) for var in wrt]
+        else:
+            seeds = list(np.asarray(tangents, dtype=float))
+        shape = _batch_shape(feed_dict)
+        dir_shape = np.shape(seeds[0]) if len(seeds) > 0 else ()
+        # Directions go first while sweeping so they broadcast against the
+        # batch dimensions, and are moved last at the end
+        extra = (1,) * len(shape)
+        index = {id(var): seed.reshape(np.shape(seed) + extra)
+                 for var, seed in zip(wrt, seeds)}
+        dot, = _tangents([self], feed_dict, index)
+        if dot is None:
+            dot = 0.0
+        ret = _broadcast(dot, dir_shape + shape)
+        if np.ndim(ret) == 0:
+            # A number for a single point and direction, like d returns
+            return float(ret)
+        if len(dir_shape) == 0:
+            return ret
+        return np.moveaxis(ret, 0, -1)
+
+    def _partials(self, res, *args):
+        '''Helper - Local partial derivatives of this node with respect to
+        each of its children, used by the reverse mode sweep.
+        @param: res: the value of this node
+        @param: args: the values of the children, in order
+        @return: tuple with one partial derivative per child
+        '''
+        raise NotImplementedError('Partials not implemented for this expr')
+
+    def _partials2(self, res, *args):
+        '''Helper - Local second order partial derivatives of this node with
+        respect to its children.
+        @param: res: the value of this node
+        @param: args: the values of the children, in order
+        @return: (d2/da2,) for unary nodes, (d2/da2, d2/dadb, d2/db2) for
+                 binary nodes
+        '''
+        raise NotImplementedError('Partials not implemented for this expr')
+
+    def d_expr(self, n=1, simplify=False):
         """Return n-th order derivative as an Expression.
-        Scalar input only.
+        Scalar input only. With simplify=True the derivative is simplified
+        after every order (see ad.simplify), which keeps high orders from
+        growing exponentially.
         """
-        var = list(self.dep_vars)[0]
+        if simplify:
+            from .simplifier import simplify as _simplify
+        var = _vars_of(self._deps)[0]
         di = self
         for i in range(n):
             di = di._d_expr(var)
+            if simplify:
+                di = _simplify(di)
         return di
 
     def _d_expr(self, var):
@@ -82,94 +492,610 @@ class Expression(object):
         raise NotImplementedError
 
     def d_n(self, n, val):
-        """Return the value of n-th order derivative. Scalar input only.
-
-        Expressions that implements d_n method are: Variable, Constant,
-        Negation, Addition, Subtraction, Multiplication, Division,
-        Expression ** Constant, Sin, Cos, Exp, Log, and their combinations.
+        """Return the value of n-th order derivative of a single-variable
+        expression at val, or an array of them for an array of points.
+        See taylor.
         """
-        var = list(self.dep_vars)[0]
-        return self._d_n(n, {var: val}, {}, {}) * np.math.factorial(n)
-
-    def _d_n(self, n, feed_dict, e_cache_dict, d_cache_dict):
-        """ Helper - Evaluates (the n-th order derivative) / (n!).
+        res = None
+        if n <= 2:
+            # Low orders are cheaper without Taylor series. Where they are
+            # not finite, the Taylor series tell a singularity apart from
+            # exact values such as the derivatives of x ** 2 at 0
+            feed_dict = {_vars_of(self._deps)[0]: val}
+            with np.errstate(all='ignore'):
+                if n == 0:
+                    res = self.eval(feed_dict)
+                elif n == 1:
+                    res = self.d(feed_dict)
+                else:
+                    try:
+                        res = self.hessian(feed_dict)
+                    except NotImplementedError:
+                        # Some ops have no forward mode hessian
+                        pass
+            if res is not None and not np.all(np.isfinite(res)):
+                res = None
+        if res is None:
+            res = self.derivatives(val, n)[..., n]
+        if np.ndim(val) == 0:
+            return float(res)
+        return res
 
-        @param: n: the order of derivative
+    def derivatives(self, val, n):
+        """Return all derivatives of orders 0 to n of a single-variable
+        expression at val, as an array of length n + 1 (or (N, n + 1) for
+        an array of N points). See taylor.
+        """
+        factorials = np.cumprod([1.0] + list(range(1, n + 1)))
+        return self.taylor(val, n) * factorials
+
+    def taylor(self, val, n):
+        """Return the Taylor coefficients f^(k)(val) / k! for k = 0..n of a
+        single-variable expression, as an array of length n + 1. val may
+        also be an array of N expansion points, giving an (N, n + 1) array.
+
+        Every node carries its own truncated Taylor series, which are
+        propagated from the variable up through the graph in a single sweep
+        with the usual recurrences for each op, so the cost is O(n^2) per
+        node.
+        """
+        var = _vars_of(self._deps)[0]
+        shape = np.shape(val)
+        series = np.zeros((n + 1,) + shape)
+        series[0] = val
+        if n > 0:
+            series[1] = 1.0
+        coeffs = _taylor_series(self, {id(var): series}, n, len(shape))
+        return np.moveaxis(_broadcast(coeffs, (n + 1,) + shape), 0, -1)
+
+    def partials(self, feed_dict, order, wrt=None, dense=False):
+        """Return all mixed partial derivatives up to the given order at the
+        points given.
+
+        Univariate Taylor series are propagated along every direction j
+        with |j| = order (all of them together, in a single sweep) and the
+        partials are interpolated from their coefficients, so no derivative
+        graphs are built.
         @param: feed_dict: dictionary mapping var names
-        @param: e_cache_dict: cache for previously evaluated values
-        @param: d_cache_dict: cache for previously calculated derivatives
-        @return: the value of the n-th order derivative
+        @param: order: highest order of the partials
+        @param: wrt: list of the V variables to differentiate against, all
+                the variables of the expression by default
+        @param: dense: return symmetric tensors instead of a dictionary
+        @return: dictionary mapping multi-indices (tuples of V counts, in
+                 the order of wrt) to the partial derivative, or with dense
+                 a list of arrays of shape (V,) * k for orders k = 0..order.
+                 A batch of N points adds a leading dimension of N.
+        """
+        if wrt is None:
+            wrt = [node for node in _topological_sort(self)
+                   if isinstance(node, Variable)]
+        n_vars = len(wrt)
+        shape = _batch_shape(feed_dict)
+        indices = _multi_indices(n_vars, order)
+        directions = np.array(indices, dtype=float).reshape(-1, n_vars)
+        n_dirs = len(indices)
+        extra = (1,) * len(shape)
+        inputs = dict()
+        for var in _vars_of(self._deps):
+            series = np.zeros((order + 1, n_dirs) + shape)
+            series[0] = var._eval(feed_dict, None)
+            inputs[id(var)] = series
+        for l, var in enumerate(wrt):
+            if id(var) in inputs and order > 0:
+                inputs[id(var)][1] = directions[:, l].reshape((n_dirs,) +
+                                                              extra)
+        coeffs = _broadcast(_taylor_series(self, inputs, order, 1 + len(shape)),
+                            (order + 1, n_dirs) + shape)
+
+        ret = {(0,) * n_vars: coeffs[0][0]}
+        for m in range(1, order + 1):
+            weights = _interpolation_weights(n_vars, order, m)
+            values = np.tensordot(weights, coeffs[m], axes=(1, 0))
+            ret.update(zip(_multi_indices(n_vars, m), values))
+        if not dense:
+            return ret
+        tensors = []
+        for m in range(order + 1):
+            tensor = np.zeros(shape + (n_vars,) * m)
+            for index in itertools.product(range(n_vars), repeat=m):
+                key = [0] * n_vars
+                for l in index:
+                    key[l] += 1
+                tensor[(Ellipsis,) + index] = ret[tuple(key)]
+            tensors.append(tensor)
+        return tensors
+
+    def _taylor(self, *args):
+        """Helper - Propagates truncated Taylor series through this node.
+
+        @param: args: the (n + 1,) coefficient arrays of the children, in
+                order, with trailing batch dimensions
+        @return: the (n + 1,) coefficient array of this node
         """
         raise NotImplementedError
 
-    def __add__(self, other):
-        try:
+    def _coerce(self, other):
+        '''Helper - Returns other as an Expression, plain numbers and arrays
+        becoming constants, along with whether the result of an op between
+        self and other needs the gradient.'''
+        if isinstance(other, Expression):
             # Propagate the need for gradient if one thing needs gradient
-            # Need to call other.grad first since self.grad may shortcircuit
-            return Addition(self, other, grad=(other.grad and self.grad))
-        except AttributeError:
-            return Addition(self, Constant(other), grad=self.grad)
+            return other, (other.grad and self.grad)
+        return _constant(other), self.grad
+
+    def __add__(self, other):
+        other, grad = self._coerce(other)
+        return Addition(self, other, grad=grad)
 
     def __radd__(self, other):
         return self.__add__(other)
 
     def __sub__(self, other):
-        try:
-            return Subtraction(self, other, grad=(other.grad and self.grad))
-        except AttributeError:
-            return Subtraction(self, Constant(other), grad=self.grad)
+        other, grad = self._coerce(other)
+        return Subtraction(self, other, grad=grad)
 
     def __rsub__(self, other):
-        try:
-            return Subtraction(other, self, grad=(other.grad and self.grad))
-        except AttributeError:
-            return Subtraction(Constant(other), self, grad=self.grad)
+        other, grad = self._coerce(other)
+        return Subtraction(other, self, grad=grad)
 
     def __mul__(self, other):
-        try:
-            return Multiplication(self, other, grad=(other.grad and self.grad))
-        except AttributeError:
-            return Multiplication(self, Constant(other), grad=self.grad)
+        other, grad = self._coerce(other)
+        return Multiplication(self, other, grad=grad)
 
     def __rmul__(self, other):
         # TODO: Multiplication not commutative if we enable matrix support
         return self.__mul__(other)
 
     def __truediv__(self, other):
-        try:
-            return Division(self, other, grad=(other.grad and self.grad))
-        except AttributeError:
-            return Division(self, Constant(other), grad=self.grad)
+        other, grad = self._coerce(other)
+        return Division(self, other, grad=grad)
 
     def __rtruediv__(self, other):
-        try:
-            return Division(other, self, grad=(other.grad and self.grad))
-        except AttributeError:
-            return Division(Constant(other), self, grad=self.grad)
+        other, grad = self._coerce(other)
+        return Division(other, self, grad=grad)
 
     def __neg__(self):
         return Negation(self, grad=self.grad)
 
     def __pow__(self, other):
-        try:
-            return Power(self, other, grad=(other.grad and self.grad))
-        except AttributeError:
-            return Power(self, Constant(other), grad=(self.grad))
-    
+        other, grad = self._coerce(other)
+        return Power(self, other, grad=grad)
+
     def __rpow__(self, other):
-        try:
-            return Power(other, self, grad=(other.grad and self.grad))
-        except AttributeError:
-            return Power(Constant(other), self, grad=(self.grad))
+        other, grad = self._coerce(other)
+        return Power(other, self, grad=grad)
+
+def jacobian(exprs, feed_dict, wrt, sparse=False):
+    """Evaluates the jacobian of a list of M expressions at the points given
+    with respect to the variables in wrt. Returns an (M, V) float array, or
+    an (N, M, V) array for a batch of N points. Subexpressions shared by the
+    expressions are only evaluated once. With sparse=True only the
+    structurally nonzero entries are computed and returned as
+    (rows, cols, vals) arrays, see ad.jacobian_sparsity.
+
+    Examples
+    --------
+    >>> import ad
+    >>> x, y = ad.Variable('x'), ad.Variable('y')
+    >>> ad.jacobian([x * y, x + y], {x: 2.0, y: 3.0}, wrt=[x, y])
+    array([[3., 2.],
+           [1., 1.]])
+    """
+    if sparse:
+        from .sparse import _sparse_jacobian
+        return _sparse_jacobian(exprs, feed_dict, wrt)
+    e_cache_dict = dict()
+    ret = np.zeros(_batch_shape(feed_dict) + (len(exprs), len(wrt)))
+    for i, expr in enumerate(exprs):
+        adjoints = expr._adjoints(feed_dict, e_cache_dict)
+        for j, var in enumerate(wrt):
+            if expr._depends_on(var):
+                ret[..., i, j] = adjoints[id(var)]
+    return ret
+
+
+def _tangents(roots, feed_dict, seeds, e_cache_dict=None):
+    """Pushes tangents forward from the variables to every root in a single
+    sweep over the graph.
+    @param: roots: list of expressions
+    @param: feed_dict: dictionary mapping var names
+    @param: seeds: dictionary mapping the id of a variable to its tangent
+    @param: e_cache_dict: cache for previously evaluated values
+    @return: list with the tangent of each root, None where it is zero
+    """
+    if e_cache_dict is None:
+        e_cache_dict = dict()
+    dots = dict()
+    for node in _topological_sort(roots):
+        res = node._eval(feed_dict, e_cache_dict)
+        dot = None
+        if isinstance(node, Variable):
+            dot = seeds.get(id(node))
+        elif node._deps != 0:
+            args = [child._eval(feed_dict, e_cache_dict)
+                    for child in node.children]
+            partials = node._partials(res, *args)
+            for child, partial in zip(node.children, partials):
+                if dots.get(id(child)) is not None:
+                    dot = _accumulate(dot, partial * dots[id(child)])
+        dots[id(node)] = dot
+    return [dots[id(root)] for root in roots]
+
+
+def _second_order(roots, feed_dict, wrt, e_cache_dict=None):
+    """Propagates the value, the gradient and the hessian of every root with
+    respect to the variables in wrt forward through the graph in a single
+    sweep. Gradients are dense arrays and hessians only store their upper
+    triangle, packed row by row. Both are None where they are zero.
+    @param: roots: list of expressions
+    @param: feed_dict: dictionary mapping var names
+    @param: wrt: list of the V variables to differentiate against
+    @param: e_cache_dict: cache for previously evaluated values
+    @return: list with the value, the (V,) gradient and the
+             (V * (V + 1) / 2,) packed hessian of each root, with trailing
+             batch dimensions
+    """
+    n_vars = len(wrt)
+    rows, cols = np.triu_indices(n_vars)
+    index = {id(var): i for i, var in enumerate(wrt)}
+    # Leave room for the batch dimensions so everything broadcasts
+    seed_shape = (n_vars,) + (1,) * len(_batch_shape(feed_dict))
+    if e_cache_dict is None:
+        e_cache_dict = dict()
+    grads, hess = dict(), dict()
+    order = _topological_sort(roots)
+    # Number of parents still to be visited, so the arrays of a node can
+    # be dropped as soon as they are no longer needed
+    uses = dict()
+    for node in order:
+        for child in node.children:
+            uses[id(child)] = uses.get(id(child), 0) + 1
+    # The roots themselves are read at the end
+    for root in roots:
+        uses[id(root)] = uses.get(id(root), 0) + 1
+    for node in order:
+        res = node._eval(feed_dict, e_cache_dict)
+        grad, h = None, None
+        if isinstance(node, Variable):
+            if id(node) in index:
+                grad = np.zeros(seed_shape)
+                grad[index[id(node)]] = 1.0
+        elif len(node.children) != 0:
+            child_grads = [grads[id(child)] for child in node.children]
+            child_hess = [hess[id(child)] for child in node.children]
+            if any(g is not None for g in child_grads):
+                args = [child._eval(feed_dict, e_cache_dict)
+                        for child in node.children]
+                partials = node._partials(res, *args)
+                partials2 = node._partials2(res, *args)
+                for partial, g, g_h in zip(partials, child_grads,
+                                           child_hess):
+                    if g is not None:
+                        grad = _accumulate(grad, partial * g)
+                    if g_h is not None:
+                        h = _accumulate(h, partial * g_h)
+                # Rank one and rank two updates from the curvature of
+                # the node itself
+                if len(child_grads) == 1:
+                    g1, = child_grads
+                    if not _is_zero(partials2[0]):
+                        h = _accumulate(h, partials2[0] *
+                                        g1[rows] * g1[cols])
+                else:
+                    g1, g2 = child_grads
+                    d2a, dadb, d2b = partials2
+                    if g1 is not None and not _is_zero(d2a):
+                        h = _accumulate(h, d2a * g1[rows] * g1[cols])
+                    if g2 is not None and not _is_zero(d2b):
+                        h = _accumulate(h, d2b * g2[rows] * g2[cols])
+                    if g1 is not None and g2 is not None and \
+                            not _is_zero(dadb):
+                        h = _accumulate(h, dadb * (g1[rows] * g2[cols] +
+                                                   g2[rows] * g1[cols]))
+        for child in node.children:
+            uses[id(child)] -= 1
+            if uses[id(child)] == 0:
+                del grads[id(child)], hess[id(child)]
+        grads[id(node)], hess[id(node)] = grad, h
+    return [(root._eval(feed_dict, e_cache_dict), grads[id(root)],
+             hess[id(root)]) for root in roots]
+
+
+def _taylor_series(root, inputs, n, ndim):
+    """Returns the truncated Taylor series of root, as an (n + 1,)
+    coefficient array with ndim trailing batch dimensions.
+    @param: inputs: dictionary mapping the id of every variable to its own
+            series
+    """
+    series = dict()
+    for node in _topological_sort(root):
+        if isinstance(node, Variable):
+            if id(node) not in inputs:
+                raise ValueError('Unbound variable %s' % node.name)
+            ret = inputs[id(node)]
+        elif isinstance(node, Constant):
+            # Line the dimensions of the constant up with those of the points
+            shape = np.shape(node.val)
+            shape = (1,) * (ndim - len(shape)) + shape
+            ret = np.zeros((n + 1,) + shape)
+            ret[0] = node.val
+        else:
+            ret = node._taylor(*[series[id(child)] for child in node.children])
+        series[id(node)] = ret
+    return series[id(root)]
+
+
+def _multi_indices(n_vars, degree):
+    """Returns every multi-index over n_vars variables with entries adding
+    up to degree, in lexicographically decreasing order."""
+    ret = []
+    for combination in itertools.combinations_with_replacement(
+            range(n_vars), degree):
+        index = [0] * n_vars
+        for i in combination:
+            index[i] += 1
+        ret.append(tuple(index))
+    return ret
+
+
+def _binomial(r, m):
+    """Returns the binomial coefficient of a real r over a natural m."""
+    ret = 1.0
+    for t in range(m):
+        ret *= (r - t) / (t + 1)
+    return ret
+
+
+@functools.lru_cache(maxsize=64)
+def _interpolation_weights(n_vars, degree, order):
+    """Returns the weights of the order-th Taylor coefficients along the
+    directions _multi_indices(n_vars, degree) in the partial derivatives of
+    the multi-indices _multi_indices(n_vars, order), as a matrix with one
+    row per partial and one column per direction, from Griewank, Utke and
+    Walther, "Evaluating higher derivative tensors by forward propagation
+    of univariate Taylor series" (2000). The weights do not depend on the
+    point, so they are computed once for each size and shared."""
+    directions = np.array(_multi_indices(n_vars, degree),
+                          dtype=int).reshape(-1, n_vars)
+    partials = _multi_indices(n_vars, order)
+    columns = np.arange(n_vars)
+    ret = np.zeros((len(partials), len(directions)))
+    for row, i in enumerate(partials):
+        for k in itertools.product(*[range(il + 1) for il in i]):
+            size = sum(k)
+            if size == 0:
+                continue
+            term = (-1) ** (order - size) * (size / degree) ** order
+            for il, kl in zip(i, k):
+                term *= _binomial(il, kl)
+            # binomial(degree * k_l / |k|, j_l) for every j_l up to degree
+            table = np.array([[_binomial(degree * kl / size, jl)
+                               for jl in range(degree + 1)] for kl in k])
+            ret[row] += term * np.prod(table[columns, directions], axis=1)
+    ret.flags.writeable = False
+    return ret
+
+
+def _orders(k, ndim):
+    """Returns 1..k shaped to broadcast against coefficient arrays."""
+    return np.arange(1, k + 1).reshape((k,) + (1,) * (ndim - 1))
+
+
+def _taylor_chain(u, w, k):
+    """Returns the k-th coefficient of the series whose derivative is
+    u' * w, that is (1 / k) * sum_{j=1}^{k} j u_j w_{k-j}. Only needs the
+    coefficients of w below k."""
+    j = _orders(k, max(np.ndim(u), np.ndim(w)))
+    return np.sum(j * u[1:k + 1] * w[k - 1::-1], axis=0) / k
+
+
+def _taylor_mul(a, b):
+    """Returns the coefficients of the product of two series."""
+    ret = np.zeros(np.broadcast_shapes(np.shape(a), np.shape(b)))
+    for k in range(len(ret)):
+        ret[k] = np.sum(a[:k + 1] * b[k::-1], axis=0)
+    return ret
+
+
+def _taylor_div(a, b):
+    """Returns the coefficients of the quotient of two series."""
+    ret = np.zeros(np.broadcast_shapes(np.shape(a), np.shape(b)))
+    for k in range(len(ret)):
+        ret[k] = (a[k] - np.sum(ret[:k] * b[k:0:-1], axis=0)) / b[0]
+    return ret
+
+
+def _taylor_int_power(a, power):
+    """Returns the coefficients of a series raised to a natural power."""
+    ret = np.zeros(np.shape(a))
+    ret[0] = 1.0
+    while power:
+        if power & 1:
+            ret = _taylor_mul(ret, a)
+        power >>= 1
+        if power:
+            a = _taylor_mul(a, a)
+    return ret
+
+
+def _taylor_exp(u):
+    """Returns the coefficients of exp(u), using exp' = exp u'."""
+    ret = np.zeros(np.shape(u))
+    ret[0] = np.exp(u[0])
+    for k in range(1, len(u)):
+        ret[k] = _taylor_chain(u, ret, k)
+    return ret
+
+
+def _taylor_log(u):
+    """Returns the coefficients of log(u), using u log' = u'."""
+    ret = np.zeros(np.shape(u))
+    ret[0] = np.log(u[0])
+    for k in range(1, len(u)):
+        ret[k] = (u[k] - _taylor_chain(ret, u, k)) / u[0]
+    return ret
+
+
+def _batch_shape(feed_dict):
+    """Returns the shape of the batch of points given in feed_dict, which is
+    () when every variable is fed a single number."""
+    shape = ()
+    for val in feed_dict.values():
+        if np.ndim(val) != 0 and np.shape(val) != shape:
+            shape = np.broadcast(np.empty(shape), np.empty(np.shape(val))).shape
+    return shape
+
+
+def _broadcast(val, shape):
+    """Repeats val over a batch of points of the given shape. Derivatives
+    that do not depend on the point (such as the 1.0 of a Variable) are
+    otherwise returned as a single number."""
+    if np.shape(val) == shape:
+        return val
+    return val + np.zeros(shape)
+
+
+def _accumulate(total, term):
+    """Adds term to a running total that starts out as None."""
+    if total is None:
+        return term
+    return total + term
+
+
+def _is_zero(val):
+    """Checks for the structural zeros returned by _partials2, such as the
+    second derivatives of additions, without comparing whole arrays."""
+    return np.ndim(val) == 0 and val == 0
+
+
+def _unpack_symmetric(packed, n, shape):
+    """Expands the packed upper triangle of a symmetric n by n matrix (with
+    trailing batch dimensions) into a full array of shape shape + (n, n)."""
+    ret = np.zeros(shape + (n, n))
+    if packed is None:
+        return ret
+    rows, cols = np.triu_indices(n)
+    packed = np.moveaxis(_broadcast(packed, (len(rows),) + shape), 0, -1)
+    ret[..., rows, cols] = packed
+    ret[..., cols, rows] = packed
+    return ret
+
+
+def _topological_sort(root):
+    """Returns every node reachable from root (or from any of a list of
+    roots) exactly once, with children always placed before their parents.
+    Uses an explicit stack so that the depth of the graph is not limited by
+    the Python recursion limit."""
+    roots = root if isinstance(root, (list, tuple)) else [root]
+    order = []
+    visited = set()
+    stack = [(node, False) for node in reversed(roots)]
+    while stack:
+        node, expanded = stack.pop()
+        if expanded:
+            order.append(node)
+            continue
+        if id(node) in visited:
+            continue
+        visited.add(id(node))
+        stack.append((node, True))
+        for child in reversed(node.children):
+            if id(child) not in visited:
+                stack.append((child, False))
+    return order
+
+
+def _vars_of(deps):
+    """Returns the Variables whose indices are set in the bitmask deps, in
+    the order of their indices."""
+    if deps & (deps - 1) == 0:
+        # No variable or a single one, the common cases
+        if deps == 0:
+            return []
+        return [_variables[deps.bit_length() - 1]()]
+    if deps.bit_length() <= _MAX_CACHED_BITS:
+        return [_variables[i]() for i in _cached_bit_indices(deps)]
+    return [_variables[i]() for i in _bit_indices(deps)]
+
+
+def _bit_indices(deps):
+    """Returns the indices of the bits set in deps."""
+    # Scanning the binary digits is linear in the number of bits, unlike
+    # clearing the lowest bit over and over on a long integer, and find
+    # skips the zeros without a Python loop
+    digits = bin(deps)[:1:-1]
+    ret = []
+    i = digits.find('1')
+    while i != -1:
+        ret.append(i)
+        i = digits.find('1', i + 1)
+    return tuple(ret)
+
+
+# Most nodes of a graph share a few masks, and the forward mode engines ask
+# for them at every node, so the indices of short masks are cached. Longer
+# masks are decoded every time, which keeps the cache below about 2 MB
+# however many variables there are. Only indices are kept, which does not
+# keep the Variables alive.
+_MAX_CACHED_BITS = 256
+_cached_bit_indices = functools.lru_cache(maxsize=1024)(_bit_indices)
+
+
+def _checkpoints(root, depth=_CHECKPOINT_DEPTH):
+    """Returns the nodes that have to be evaluated first, in order, so that
+    evaluating any of them and then root never recurses more than depth
+    levels. Shallow graphs need no checkpoints and are simply evaluated
+    recursively. Nodes never change once built, so the checkpoints of a
+    root are only worked out the first time."""
+    if root._depth < depth:
+        return []
+    checkpoints = _checkpoint_cache.get(root, {}).get(depth)
+    if checkpoints is not None:
+        return checkpoints
+    checkpoints = []
+    # Recursion depth below each node once the checkpoints are cached
+    remaining = {}
+    for node in _topological_sort(root):
+        levels = 1 + max([remaining[id(child)] for child in node.children],
+                         default=0)
+        if levels >= depth and node is not root:
+            checkpoints.append(node)
+            levels = 0
+        remaining[id(node)] = levels
+    _checkpoint_cache.setdefault(root, {})[depth] = checkpoints
+    return checkpoints
 
 
 class Variable(Expression):
+    # Every live Variable has its own dense index, the bit of the masks of
+    # dependencies (_deps) that stands for it
+    __slots__ = ('name', '_index')
+
     def __init__(self, name=None, grad=True):
         self.grad = grad
         self.name = None if not name else str(name)
+        self.children = ()
+        self._depth = 1
+        self._point_cache = None
+        self._tape = None
 
+        if _free_indices:
+            self._index = heapq.heappop(_free_indices)
+        else:
+            self._index = len(_variables)
+        _variables[self._index] = weakref.ref(self)
         # A variable only depends on itself
-        self.dep_vars = set([self])
+        self._deps = 1 << self._index
+
+    def __del__(self):
+        # Every node depending on this variable keeps it alive, so no mask
+        # still uses the index
+        del _variables[self._index]
+        heapq.heappush(_free_indices, self._index)
+
+    def __reduce__(self):
+        # Copies are new Variables, with their own index
+        return (type(self), (self.name, self.grad))
 
     def _eval(self, feed_dict, cache_dict):
         # Check if the user specified either the object in feed_dict or
@@ -189,17 +1115,9 @@ class Variable(Expression):
 
     def _d_expr(self, var):
         if var == self:
-            return Constant(1.0)
-        else:
-            return Constant(0)
-
-    def _d_n(self, n, feed_dict, e_cache_dict, d_cache_dict):
-        if n == 0:
-            return self._eval(feed_dict, e_cache_dict)
-        elif n == 1:
-            return 1.0
+            return _constant(1.0)
         else:
-            return 0.0
+            return _constant(0)
 
     def __repr__(self):
         if self.name:
@@ -210,10 +1128,22 @@ class Variable(Expression):
 
 class Constant(Expression):
     '''Represents a constant.'''
+    __slots__ = ('val',)
+
     def __init__(self, val, grad=False):
         super().__init__(grad=grad)
         self.val = val
-        self.dep_vars = set()
+
+    @classmethod
+    def _intern_key(cls, val, grad=False):
+        # Only plain numbers, arrays are mutable and not hashable
+        if not isinstance(val, numbers.Number):
+            return None
+        # -0.0 equals 0.0 but its reciprocal does not, keep them apart
+        sign = None
+        if isinstance(val, numbers.Real) and val == 0:
+            sign = math.copysign(1.0, val)
+        return (cls, type(val), val, sign, grad)
 
     def _eval(self, feed_dict, cache_dict):
         return self.val
@@ -222,18 +1152,29 @@ class Constant(Expression):
         return {}
 
     def _d_expr(self, var):
-        return Constant(0.0)
-
-    def _d_n(self, n, feed_dict, e_cache_dict, d_cache_dict):
-        if n == 0:
-            return self.val
-        else:
-            return 0.0
+        return _constant(0.0)
 
     def _h(self, feed_dict, e_cache_dict, d_cache_dict, h_cache_dict):
         return {}
 
 
+# Constants built over and over by the operators and by d_expr, shared
+# instead. Keyed by type too so that 1 and 1.0 stay apart
+_COMMON_CONSTANTS = {(type(val), val): Constant(val)
+                     for val in [0, 1, 2, 0.0, 1.0, 2.0]}
+
+
+def _constant(val):
+    """Returns a Constant for val, the shared one for the common values."""
+    if type(val) is int or type(val) is float:
+        # -0.0 equals 0.0 but its reciprocal does not
+        if val != 0 or math.copysign(1.0, val) > 0:
+            node = _COMMON_CONSTANTS.get((type(val), val))
+            if node is not None:
+                return node
+    return Constant(val)
+
+
 class Unop(Expression):
     """Utilities common to all unary operations in the form Op(a)
 
@@ -244,6 +1185,10 @@ class Unop(Expression):
     children: list of Expression
         The children of the unary function, i.e. expr1
     """
+    __slots__ = ('expr1',)
+    # Whether the second derivative with respect to expr1 can be nonzero
+    _hessian_pattern = (True,)
+
     def __init__(self, expr1, grad=False):
         """
         Parameters
@@ -255,24 +1200,36 @@ class Unop(Expression):
         """
         super().__init__(grad=grad)
         self.expr1 = expr1
-        self.children = [self.expr1]
-        # Deep copy the set
-        self.dep_vars = set(expr1.dep_vars)
+        self.children = (expr1,)
+        self._deps = expr1._deps
+        self._depth = expr1._depth + 1
 
+    @classmethod
+    def _intern_key(cls, expr1, grad=False):
+        if not isinstance(expr1, Expression):
+            return None
+        return (cls, id(expr1), grad)
 
-class Negation(Unop):
-    """Negation, in the form - A"""
     def _eval(self, feed_dict, cache_dict):
         if id(self) not in cache_dict:
             res1 = self.expr1._eval(feed_dict, cache_dict)
-            cache_dict[id(self)] = -res1
+            cache_dict[id(self)] = self._op(res1)
         return cache_dict[id(self)]
 
+
+class Negation(Unop):
+    """Negation, in the form - A"""
+    __slots__ = ()
+    _hessian_pattern = (False,)
+
+    def _op(self, res1):
+        return -res1
+
     def _d(self, feed_dict, e_cache_dict, d_cache_dict):
         if id(self) not in d_cache_dict:
             d1 = self.expr1._d(feed_dict, e_cache_dict, d_cache_dict)
             ret = {}
-            for var in self.dep_vars:
+            for var in _vars_of(self._deps):
                 ret[var] = -d1.get(var, 0)
             d_cache_dict[id(self)] = ret
         return d_cache_dict[id(self)]
@@ -281,43 +1238,57 @@ class Negation(Unop):
         if id(self) not in h_cache:
             # Both dx^2 and dxdy are just the negations too
             h1 = self.expr1._h(feed_dict, e_cache, d_cache, h_cache)
-            ret = {var:{} for var in self.dep_vars}
-            for var1 in self.dep_vars:
-                for var2 in self.dep_vars:
+            ret = {var:{} for var in _vars_of(self._deps)}
+            for var1 in _vars_of(self._deps):
+                for var2 in _vars_of(self._deps):
                     ret[var1][var2] = - h1.get(var1, {}).get(var2, 0)
             h_cache[id(self)] = ret
         return h_cache[id(self)]
 
+    def _partials(self, res, res1):
+        return (-1.0,)
+
+    def _partials2(self, res, res1):
+        return (0.0,)
+
     def _d_expr(self, var):
         return - self.expr1._d_expr(var)
 
-    def _d_n(self, n, feed_dict, e_cache_dict, d_cache_dict):
-        if (id(self), n) in d_cache_dict:
-            return d_cache_dict[(id(self), n)]
-        if n == 0:
-            res1 = self.expr1._eval(feed_dict, e_cache_dict)
-        else:
-            res1 = self.expr1._d_n(n, feed_dict, e_cache_dict, d_cache_dict)
-        d_cache_dict[(id(self), n)] = -res1
-        return d_cache_dict[(id(self), n)]
+    def _taylor(self, t1):
+        return - t1
 
 
 class Binop(Expression):
     '''Utilities common to all binary operations in the form Op(a, b)'''
+    __slots__ = ('expr1', 'expr2')
+    # Whether d2/da2, d2/dadb and d2/db2 can be nonzero
+    _hessian_pattern = (True, True, True)
+
     def __init__(self, expr1, expr2, grad=False):
         super().__init__(grad=grad)
-        try:
-            expr1.grad
-        except AttributeError:
-            expr1 = Constant(expr1)
-        try:
-            expr2.grad
-        except AttributeError:
-            expr2 = Constant(expr1)
+        if not isinstance(expr1, Expression):
+            expr1 = _constant(expr1)
+        if not isinstance(expr2, Expression):
+            expr2 = _constant(expr2)
         self.expr1 = expr1
         self.expr2 = expr2
-        self.children = [self.expr1, self.expr2]
-        self.dep_vars = expr1.dep_vars | expr2.dep_vars
+        self.children = (expr1, expr2)
+        self._deps = expr1._deps | expr2._deps
+        self._depth = max(expr1._depth, expr2._depth) + 1
+
+    @classmethod
+    def _intern_key(cls, expr1, expr2, grad=False):
+        if not isinstance(expr1, Expression) or \
+                not isinstance(expr2, Expression):
+            return None
+        return (cls, id(expr1), id(expr2), grad)
+
+    def _eval(self, feed_dict, cache_dict):
+        if id(self) not in cache_dict:
+            res1 = self.expr1._eval(feed_dict, cache_dict)
+            res2 = self.expr2._eval(feed_dict, cache_dict)
+            cache_dict[id(self)] = self._op(res1, res2)
+        return cache_dict[id(self)]
 
 
 class Power(Binop):
@@ -333,86 +1304,89 @@ class Power(Binop):
     >>> y.d({x: 10.0})
     20.0
     """
-    def _eval(self, feed_dict, cache_dict):
-        if id(self) not in cache_dict:
-            res1 = self.expr1._eval(feed_dict, cache_dict)
-            res2 = self.expr2._eval(feed_dict, cache_dict)
-            # cast to float necessary, numpy complains about raising
-            # integers to negative integer powers otherwise.
-            cache_dict[id(self)] = np.power(float(res1), res2)
-        return cache_dict[id(self)]
+    __slots__ = ()
+
+    def _op(self, res1, res2):
+        # float_power necessary, numpy complains about raising
+        # integers to negative integer powers otherwise.
+        return np.float_power(res1, res2)
 
     def _d(self, feed_dict, e_cache_dict, d_cache_dict):
         """derivative is  y x^(y-1) x_dot + x^y log(x) y_dot"""
         if id(self) not in d_cache_dict:
             res1 = self.expr1._eval(feed_dict, e_cache_dict)
             res2 = self.expr2._eval(feed_dict, e_cache_dict)
+            res = self._eval(feed_dict, e_cache_dict)
             d1 = self.expr1._d(feed_dict, e_cache_dict, d_cache_dict)
             d2 = self.expr2._d(feed_dict, e_cache_dict, d_cache_dict)
             ret = {}
-            # cast to float necessary, numpy complains about raising
+            # float_power necessary, numpy complains about raising
             # integers to negative integer powers otherwise.
-            for var in self.dep_vars:
+            dbase = res2 * np.float_power(res1, res2 - 1)
+            for var in _vars_of(self._deps):
+                ret[var] = dbase * d1.get(var, 0)
                 # Short circuit to prevent taking log of zero
-                if d2.get(var, 0) == 0:
-                    ret[var] = res2 * np.power(float(res1), res2 - 1) * d1.get(var, 0) 
-                else:
-                    ret[var] = res2 * np.power(float(res1), res2 - 1) * d1.get(var, 0) + \
-                            np.power(float(res1), res2) * np.log(res1) * d2.get(var, 0)
+                if self.expr2._depends_on(var):
+                    ret[var] = ret[var] + res * np.log(res1) * d2[var]
             d_cache_dict[id(self)] = ret
         return d_cache_dict[id(self)]
 
+    def _partials(self, res, res1, res2):
+        # Only take the log of the base if the exponent actually varies
+        if self.expr2._deps == 0:
+            return res2 * np.float_power(res1, res2 - 1), 0.0
+        return res2 * np.float_power(res1, res2 - 1), res * np.log(res1)
+
+    def _partials2(self, res, res1, res2):
+        d2a = res2 * (res2 - 1) * np.float_power(res1, res2 - 2)
+        if self.expr2._deps == 0:
+            return d2a, 0.0, 0.0
+        log1 = np.log(res1)
+        dadb = np.float_power(res1, res2 - 1) * (1 + res2 * log1)
+        return d2a, dadb, res * log1 * log1
+
     def _d_expr(self, var):
-        if var not in self.dep_vars:
-            return Constant(0)
+        if not self._depends_on(var):
+            return _constant(0)
         if isinstance(self.expr1, Constant):
-            return np.log(self.expr1.val) * (self.expr1 ** self.expr2)
+            return np.log(self.expr1.val) * (self.expr1 ** self.expr2) * \
+                   self.expr2._d_expr(var)
         elif isinstance(self.expr2, Constant):
-            return self.expr2.val * (self.expr1 ** (self.expr2.val - 1))
+            return self.expr2.val * (self.expr1 ** (self.expr2.val - 1)) * \
+                   self.expr1._d_expr(var)
         else:
             msg = "Do not support f(x) ** g(x)"
             raise NotImplementedError(msg)
 
-    def _d_n(self, n, feed_dict, e_cache_dict, d_cache_dict):
-        if not isinstance(self.expr2, Constant):
-            msg = "Do not support c ** g(x) or f(x) ** g(x)"
-            raise NotImplementedError(msg)
-        if (id(self), n) in d_cache_dict:
-            return d_cache_dict[(id(self), n)]
-        if n == 0:
-            res = self._eval(feed_dict, e_cache_dict)
-            d_cache_dict[(id(self), 0)] = res
-            return d_cache_dict[(id(self), 0)]
-        a = self.expr2.val
-        if (id(self.expr1), 0) not in d_cache_dict:
-            g_0 = self.expr1._d_n(0, feed_dict, e_cache_dict, d_cache_dict)
-            d_cache_dict[(id(self.expr1), 0)] = g_0
-        g_0 = d_cache_dict[(id(self.expr1), 0)]
-        if np.isclose(g_0, 0):
-            if a < 0:
+    def _taylor(self, t1, t2):
+        if self.expr2._deps != 0:
+            # f(x) ** g(x) = exp(g(x) * log(f(x)))
+            return _taylor_exp(_taylor_mul(t2, _taylor_log(t1)))
+        a, n = t2[0], len(t1) - 1
+        if np.size(a) == 1:
+            a = np.ravel(a)[0]
+        if np.ndim(a) == 0 and a >= 0 and a == int(a):
+            # Repeated multiplication is exact, even where the base is 0
+            return _taylor_int_power(t1, int(a))
+        zero = t1[0] == 0
+        if np.any(zero):
+            if np.any(a < 0):
                 msg = "The exponent should be greater than 0 when the base is 0"
                 raise ZeroDivisionError(msg)
-            elif np.isclose(a, int(a)) or a >= n:
-                d_cache_dict[(id(self), n)] = 0.0
-                return 0.0
-            else:
+            if np.any(a < n):
                 msg = "If base of power is 0 and exponent is not an " \
                       "integer, the exponent should be greater than n"
                 raise ZeroDivisionError(msg)
-        res = 0
-        for i in range(1, n+1):
-            if (id(self.expr1), i) not in d_cache_dict:
-                g_i = self.expr1._d_n(i, feed_dict, e_cache_dict, d_cache_dict)
-                d_cache_dict[(id(self.expr1), i)] = g_i
-            if (id(self), n-i) not in d_cache_dict:
-                ga_ni = self._d_n(n-i, feed_dict, e_cache_dict, d_cache_dict)
-                d_cache_dict[(id(self), n-i)] = ga_ni
-            g_i = d_cache_dict[(id(self.expr1), i)]
-            ga_ni = d_cache_dict[(id(self), n-i)]
-            res += (float(a + 1) * i / n - 1) * g_i * ga_ni
-        res /= g_0
-        d_cache_dict[(id(self), n)] = res
-        return d_cache_dict[(id(self), n)]
+        # p = u ** a satisfies u p' = a u' p
+        base = np.where(zero, 1.0, t1[0])
+        ret = np.zeros(np.broadcast_shapes(t1.shape, np.shape(a)))
+        ret[0] = np.float_power(base, a)
+        for k in range(1, n + 1):
+            j = _orders(k, ret.ndim)
+            ret[k] = np.sum(((a + 1) * j - k) * t1[1:k + 1] * ret[k - 1::-1],
+                            axis=0) / (k * base)
+        # All derivatives up to order n vanish where the base is 0
+        return np.where(zero, 0.0, ret)
 
     def _h(self, feed_dict, e_cache, d_cache, h_cache):
         """For expressions in the form x^y, I was only able to get a closed
@@ -428,13 +1402,13 @@ class Power(Binop):
             d1 = self.expr1._d(feed_dict, e_cache, d_cache)
             v1 = self.expr1._eval(feed_dict, e_cache)
             v2 = self.expr2._eval(feed_dict, e_cache)
-            ret = {var:{} for var in self.dep_vars}
-            for var1 in self.dep_vars:
-                for var2 in self.dep_vars:
+            ret = {var:{} for var in _vars_of(self._deps)}
+            for var1 in _vars_of(self._deps):
+                for var2 in _vars_of(self._deps):
                     dxy1 = h1.get(var1, {}).get(var2, 0)
                     dx1, dx2 = d1.get(var1, 0), d1.get(var2, 0)
-                    term1 = (v2 - 1) * v2 * (v1 ** (v2 - 2)) * dx1 * dx2
-                    term2 = v2 * (v1 ** (v2 - 1)) * dxy1 
+                    term1 = (v2 - 1) * v2 * np.float_power(v1, v2 - 2) * dx1 * dx2
+                    term2 = v2 * np.float_power(v1, v2 - 1) * dxy1
                     ret[var1][var2] = term1 + term2
             h_cache[id(self)] = ret
         return h_cache[id(self)]
@@ -442,47 +1416,44 @@ class Power(Binop):
 
 class Addition(Binop):
     '''Addition, in the form A + B'''
-    def _eval(self, feed_dict, cache_dict):
-        if id(self) not in cache_dict:
-            res1 = self.expr1._eval(feed_dict, cache_dict)
-            res2 = self.expr2._eval(feed_dict, cache_dict)
-            cache_dict[id(self)] = res1 + res2
-        return cache_dict[id(self)]
+    __slots__ = ()
+    _hessian_pattern = (False, False, False)
+
+    def _op(self, res1, res2):
+        return res1 + res2
 
     def _d(self, feed_dict, e_cache_dict, d_cache_dict):
         if id(self) not in d_cache_dict:
             d1 = self.expr1._d(feed_dict, e_cache_dict, d_cache_dict)
             d2 = self.expr2._d(feed_dict, e_cache_dict, d_cache_dict)
             ret = {}
-            for var in self.dep_vars:
+            for var in _vars_of(self._deps):
                 ret[var] = d1.get(var, 0) + d2.get(var, 0)
             d_cache_dict[id(self)] = ret
         return d_cache_dict[id(self)]
 
+    def _partials(self, res, res1, res2):
+        return 1.0, 1.0
+
+    def _partials2(self, res, res1, res2):
+        return 0.0, 0.0, 0.0
+
     def _d_expr(self, var):
-        if var not in self.dep_vars:
-            return Constant(0)
+        if not self._depends_on(var):
+            return _constant(0)
         return self.expr1._d_expr(var) + self.expr2._d_expr(var)
 
-    def _d_n(self, n, feed_dict, e_cache_dict, d_cache_dict):
-        if (id(self), n) in d_cache_dict:
-            return d_cache_dict[(id(self), n)]
-        if n == 0:
-            res1 = self._eval(feed_dict, e_cache_dict)
-        else:
-            res1 = self.expr1._d_n(n, feed_dict, e_cache_dict, d_cache_dict) + \
-                   self.expr2._d_n(n, feed_dict, e_cache_dict, d_cache_dict)
-        d_cache_dict[(id(self), n)] = res1
-        return d_cache_dict[(id(self), n)]
-    
+    def _taylor(self, t1, t2):
+        return t1 + t2
+
     def _h(self, feed_dict, e_cache, d_cache, h_cache):
         if id(self) not in h_cache:
             # Both dx^2 and dxdy are just the additions 
             h1 = self.expr1._h(feed_dict, e_cache, d_cache, h_cache)
             h2 = self.expr2._h(feed_dict, e_cache, d_cache, h_cache)
-            ret = {var:{} for var in self.dep_vars}
-            for var1 in self.dep_vars:
-                for var2 in self.dep_vars:
+            ret = {var:{} for var in _vars_of(self._deps)}
+            for var1 in _vars_of(self._deps):
+                for var2 in _vars_of(self._deps):
                     dxy1 = h1.get(var1, {}).get(var2, 0) 
                     dxy2 = h2.get(var1, {}).get(var2, 0) 
                     ret[var1][var2] = dxy1 + dxy2
@@ -492,47 +1463,44 @@ class Addition(Binop):
 
 class Subtraction(Binop):
     '''Subtraction, in the form A - B'''
-    def _eval(self, feed_dict, cache_dict):
-        if id(self) not in cache_dict:
-            res1 = self.expr1._eval(feed_dict, cache_dict)
-            res2 = self.expr2._eval(feed_dict, cache_dict)
-            cache_dict[id(self)] = res1 - res2
-        return cache_dict[id(self)]
+    __slots__ = ()
+    _hessian_pattern = (False, False, False)
+
+    def _op(self, res1, res2):
+        return res1 - res2
 
     def _d(self, feed_dict, e_cache_dict, d_cache_dict):
         if id(self) not in d_cache_dict:
             d1 = self.expr1._d(feed_dict, e_cache_dict, d_cache_dict)
             d2 = self.expr2._d(feed_dict, e_cache_dict, d_cache_dict)
             ret = {}
-            for var in self.dep_vars:
+            for var in _vars_of(self._deps):
                 ret[var] = d1.get(var, 0) - d2.get(var, 0)
             d_cache_dict[id(self)] = ret
         return d_cache_dict[id(self)]
 
+    def _partials(self, res, res1, res2):
+        return 1.0, -1.0
+
+    def _partials2(self, res, res1, res2):
+        return 0.0, 0.0, 0.0
+
     def _d_expr(self, var):
-        if var not in self.dep_vars:
-            return Constant(0)
+        if not self._depends_on(var):
+            return _constant(0)
         return self.expr1._d_expr(var) - self.expr2._d_expr(var)
 
-    def _d_n(self, n, feed_dict, e_cache_dict, d_cache_dict):
-        if (id(self), n) in d_cache_dict:
-            return d_cache_dict[(id(self), n)]
-        if n == 0:
-            res1 = self._eval(feed_dict, e_cache_dict)
-        else:
-            res1 = self.expr1._d_n(n, feed_dict, e_cache_dict, d_cache_dict) - \
-                   self.expr2._d_n(n, feed_dict, e_cache_dict, d_cache_dict)
-        d_cache_dict[(id(self), n)] = res1
-        return d_cache_dict[(id(self), n)]
+    def _taylor(self, t1, t2):
+        return t1 - t2
 
     def _h(self, feed_dict, e_cache, d_cache, h_cache):
         if id(self) not in h_cache:
             # Both dx^2 and dxdy are just the additions 
             h1 = self.expr1._h(feed_dict, e_cache, d_cache, h_cache)
             h2 = self.expr2._h(feed_dict, e_cache, d_cache, h_cache)
-            ret = {var:{} for var in self.dep_vars}
-            for var1 in self.dep_vars:
-                for var2 in self.dep_vars:
+            ret = {var:{} for var in _vars_of(self._deps)}
+            for var1 in _vars_of(self._deps):
+                for var2 in _vars_of(self._deps):
                     dxy1 = h1.get(var1, {}).get(var2, 0) 
                     dxy2 = h2.get(var1, {}).get(var2, 0) 
                     ret[var1][var2] = dxy1 - dxy2
@@ -542,12 +1510,11 @@ class Subtraction(Binop):
 
 class Multiplication(Binop):
     '''Multiplication, in the form A * B'''
-    def _eval(self, feed_dict, cache_dict):
-        if id(self) not in cache_dict:
-            res1 = self.expr1._eval(feed_dict, cache_dict)
-            res2 = self.expr2._eval(feed_dict, cache_dict)
-            cache_dict[id(self)] = res1 * res2
-        return cache_dict[id(self)]
+    __slots__ = ()
+    _hessian_pattern = (False, True, False)
+
+    def _op(self, res1, res2):
+        return res1 * res2
 
     def _d(self, feed_dict, e_cache_dict, d_cache_dict):
         if id(self) not in d_cache_dict:
@@ -556,7 +1523,7 @@ class Multiplication(Binop):
             res1 = self.expr1._eval(feed_dict, e_cache_dict)
             res2 = self.expr2._eval(feed_dict, e_cache_dict)
             ret = {}
-            for var in self.dep_vars:
+            for var in _vars_of(self._deps):
                 ret[var] = res1 * d2.get(var, 0) + res2 * d1.get(var, 0)
             d_cache_dict[id(self)] = ret
         return d_cache_dict[id(self)]
@@ -570,9 +1537,9 @@ class Multiplication(Binop):
             d2 = self.expr2._d(feed_dict, e_cache, d_cache)
             v1 = self.expr1._eval(feed_dict, e_cache)
             v2 = self.expr2._eval(feed_dict, e_cache)
-            ret = {var:{} for var in self.dep_vars}
-            for var1 in self.dep_vars:
-                for var2 in self.dep_vars:
+            ret = {var:{} for var in _vars_of(self._deps)}
+            for var1 in _vars_of(self._deps):
+                for var2 in _vars_of(self._deps):
                     dxy1 = h1.get(var1, {}).get(var2, 0) 
                     dxy2 = h2.get(var1, {}).get(var2, 0) 
                     ret[var1][var2] = (d1.get(var1, 0) * d2.get(var2, 0) + 
@@ -581,9 +1548,15 @@ class Multiplication(Binop):
             h_cache[id(self)] = ret
         return h_cache[id(self)]
 
+    def _partials(self, res, res1, res2):
+        return res2, res1
+
+    def _partials2(self, res, res1, res2):
+        return 0.0, 1.0, 0.0
+
     def _d_expr(self, var):
-        if var not in self.dep_vars:
-            return Constant(0)
+        if not self._depends_on(var):
+            return _constant(0)
         if isinstance(self.expr1, Constant):
             return self.expr1.val * self.expr2._d_expr(var)
         elif isinstance(self.expr2, Constant):
@@ -592,37 +1565,17 @@ class Multiplication(Binop):
             return self.expr1 * self.expr2._d_expr(var) + self.expr2 * \
                    self.expr1._d_expr(var)
 
-    def _d_n(self, n, feed_dict, e_cache_dict, d_cache_dict):
-        if (id(self), n) in d_cache_dict:
-            return d_cache_dict[(id(self), n)]
-        if n == 0:
-            res = self._eval(feed_dict, e_cache_dict)
-            d_cache_dict[(id(self), 0)] = res
-            return d_cache_dict[(id(self), 0)]
-        res = 0
-        for i in range(n+1):
-            if (id(self.expr1), i) not in d_cache_dict:
-                f_i = self.expr1._d_n(i, feed_dict, e_cache_dict, d_cache_dict)
-                d_cache_dict[(id(self.expr1), i)] = f_i
-            if (id(self.expr2), n-i) not in d_cache_dict:
-                g_ni = self.expr2._d_n(n-i, feed_dict, e_cache_dict,
-                                       d_cache_dict)
-                d_cache_dict[(id(self.expr2), n-i)] = g_ni
-            f_i = d_cache_dict[(id(self.expr1), i)]
-            g_ni = d_cache_dict[(id(self.expr2), n-i)]
-            res += f_i * g_ni
-        d_cache_dict[(id(self), n)] = res
-        return d_cache_dict[(id(self), n)]
+    def _taylor(self, t1, t2):
+        return _taylor_mul(t1, t2)
 
 
 class Division(Binop):
     '''Division, in the form A / B'''
-    def _eval(self, feed_dict, cache_dict):
-        if id(self) not in cache_dict:
-            res1 = self.expr1._eval(feed_dict, cache_dict)
-            res2 = self.expr2._eval(feed_dict, cache_dict)
-            cache_dict[id(self)] = res1 / res2
-        return cache_dict[id(self)]
+    __slots__ = ()
+    _hessian_pattern = (False, True, True)
+
+    def _op(self, res1, res2):
+        return res1 / res2
 
     def _d(self, feed_dict, e_cache_dict, d_cache_dict):
         if id(self) not in d_cache_dict:
@@ -631,15 +1584,21 @@ class Division(Binop):
             res1 = self.expr1._eval(feed_dict, e_cache_dict)
             res2 = self.expr2._eval(feed_dict, e_cache_dict)
             ret = {}
-            for var in self.dep_vars:
+            for var in _vars_of(self._deps):
                 ret[var] = (d1.get(var, 0) / res2) - (d2.get(var, 0) * res1 /
                                                       (res2 * res2))
             d_cache_dict[id(self)] = ret
         return d_cache_dict[id(self)]
 
+    def _partials(self, res, res1, res2):
+        return 1.0 / res2, - res / res2
+
+    def _partials2(self, res, res1, res2):
+        return 0.0, - 1.0 / (res2 * res2), 2 * res / (res2 * res2)
+
     def _d_expr(self, var):
-        if var not in self.dep_vars:
-            return Constant(0)
+        if not self._depends_on(var):
+            return _constant(0)
         if isinstance(self.expr1, Constant):
             return - self.expr1.val * self.expr2._d_expr(var) / (self.expr2 *
                                                                  self.expr2)
@@ -649,36 +1608,8 @@ class Division(Binop):
             return self.expr1._d_expr(var) / self.expr2 - self.expr1 * \
                    self.expr2._d_expr(var) / (self.expr2 * self.expr2)
 
-    def _d_n(self, n, feed_dict, e_cache_dict, d_cache_dict):
-        if (id(self), n) in d_cache_dict:
-            return d_cache_dict[(id(self), n)]
-        if n == 0:
-            res = self._eval(feed_dict, e_cache_dict)
-            d_cache_dict[(id(self), 0)] = res
-            return d_cache_dict[(id(self), 0)]
-        res = 0
-        for i in range(n):
-            if (id(self), i) not in d_cache_dict:
-                div_i = self._d_n(i, feed_dict, e_cache_dict, d_cache_dict)
-                d_cache_dict[(id(self), i)] = div_i
-            if (id(self.expr2), n-i) not in d_cache_dict:
-                g_ni = self.expr2._d_n(n-i, feed_dict, e_cache_dict, d_cache_dict)
-                d_cache_dict[(id(self.expr2), n-i)] = g_ni
-            div_i = d_cache_dict[(id(self), i)]
-            g_ni = d_cache_dict[(id(self.expr2), n-i)]
-            res -= div_i * g_ni
-        if (id(self.expr1), n) not in d_cache_dict:
-            f_n = self.expr1._d_n(n, feed_dict, e_cache_dict, d_cache_dict)
-            d_cache_dict[(id(self.expr1), n)] = f_n
-        f_n = d_cache_dict[(id(self.expr1), n)]
-        res += f_n
-        if (id(self.expr2), 0) not in d_cache_dict:
-            g_0 = self.expr2._eval(feed_dict, e_cache_dict)
-            d_cache_dict[(id(self.expr2), 0)] = g_0
-        g_0 = d_cache_dict[(id(self.expr2), 0)]
-        res /= g_0
-        d_cache_dict[(id(self), n)] = res
-        return d_cache_dict[(id(self), n)]
+    def _taylor(self, t1, t2):
+        return _taylor_div(t1, t2)
 
     def _h(self, feed_dict, e_cache, d_cache, h_cache):
         if id(self) not in h_cache:
@@ -689,9 +1620,9 @@ class Division(Binop):
             d2 = self.expr2._d(feed_dict, e_cache, d_cache)
             f = self.expr1._eval(feed_dict, e_cache)
             g = self.expr2._eval(feed_dict, e_cache)
-            ret = {var:{} for var in self.dep_vars}
-            for var1 in self.dep_vars:
-                for var2 in self.dep_vars:
+            ret = {var:{} for var in _vars_of(self._deps)}
+            for var1 in _vars_of(self._deps):
+                for var2 in _vars_of(self._deps):
                     fxy = h1.get(var1, {}).get(var2, 0) 
                     gxy = h2.get(var1, {}).get(var2, 0) 
                     fx, fy = d1.get(var1, 0), d1.get(var2, 0)
@@ -0,0 +1,99 @@
+"""Caching of evaluation results across calls. Optimization loops often ask
+for the value, the derivative and the hessian at the same point one after
+the other, or come back to earlier points. A PointCache attached to an
+Expression (see Expression.enable_cache) keeps the cache dictionaries of the
+most recently used points, so later calls at those points start from the
+node values and derivatives that were already computed. The adjoints of the
+reverse sweep are kept as well, so gradient, value_and_grad and
+d(mode='reverse') at a cached point skip both sweeps.
+"""
+import collections
+
+import numpy as np
+
+__all__ = ['PointCache', 'CacheInfo']
+
+CacheInfo = collections.namedtuple('CacheInfo',
+                                   ['hits', 'misses', 'maxsize', 'currsize'])
+
+
+class PointCache(object):
+    """Least recently used cache of evaluation results keyed by point.
+
+    Examples
+    --------
+    >>> import ad
+    >>> x = ad.Variable('x')
+    >>> f = ad.Sin(x) * x
+    >>> f.enable_cache(maxsize=4)
+    >>> f.eval({x: 1.0}) == f.eval({x: 1.0})
+    True
+    >>> f.cache_info()
+    CacheInfo(hits=1, misses=1, maxsize=4, currsize=1)
+
+    Attributes
+    ----------
+    maxsize: int
+        Number of points kept, the least recently used point is dropped
+        first.
+    hits: int
+        Number of lookups that found their point.
+    misses: int
+        Number of lookups that had to start from empty caches.
+    """
+    def __init__(self, maxsize=8):
+        """
+        Parameters
+        ----------
+        maxsize : int, optional
+            Number of points kept.
+        """
+        if maxsize < 1:
+            raise ValueError('maxsize should be at least 1, got %r'
+                             % (maxsize,))
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._entries = collections.OrderedDict()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def lookup(self, feed_dict):
+        '''Returns the value, derivative, hessian and adjoint cache
+        dictionaries for the point given, empty ones if the point is not
+        cached yet.'''
+        key = _point_key(feed_dict)
+        if key in self._entries:
+            self.hits += 1
+            self._entries.move_to_end(key)
+            return self._entries[key]
+        self.misses += 1
+        entry = (dict(), dict(), dict(), dict())
+        self._entries[key] = entry
+        if len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+        return entry
+
+    def info(self):
+        '''Returns the hits, misses, maxsize and current size.'''
+        return CacheInfo(self.hits, self.misses, self.maxsize,
+                         len(self._entries))
+
+    def clear(self):
+        '''Drops every point and resets the counters.'''
+        self._entries.clear()
+        self.hits = 0
+        self.misses = 0
+
+
+def _point_key(feed_dict):
+    """Returns a hashable key for the values in feed_dict. Variables are
+    identified by id (or by name if fed by name) and arrays by their dtype,
+    shape and raw bytes, so changing an array in place changes the key."""
+    items = []
+    for var, val in feed_dict.items():
+        name = var if isinstance(var, str) else id(var)
+        val = np.asarray(val)
+        items.append((name, val.dtype.str, val.shape, val.tobytes()))
+    return frozenset(items)
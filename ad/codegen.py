@@ -0,0 +1,326 @@
+"""Straight-line Python source generated from an Expression. The graph is
+walked once and every node becomes one assignment to a local variable, with
+the NumPy calls and arithmetic of its _op, so calling the generated function
+does no method dispatch at all. The gradient is generated as a reverse sweep
+and the hessian as a forward-over-reverse sweep over the same locals.
+
+The source of each node comes from its own _op, _partials and _partials2,
+called with _Source stand-ins instead of values, so the generated code always
+follows the same formulas as the engines.
+"""
+import itertools
+import linecache
+import numbers
+import weakref
+
+import numpy as np
+
+from .ad import Variable, Constant, _topological_sort, _batch_shape, \
+    _broadcast
+
+__all__ = ['lambdify']
+
+# Generated functions of each Expression, by arguments and order
+_lambdified = weakref.WeakKeyDictionary()
+# Numbers the generated sources so that inspect can find each of them
+_counter = itertools.count()
+
+
+def lambdify(expr, args, derivatives=0):
+    """Returns a plain Python function computing expr from the values of the
+    Variables in args, given as positional arguments in that order. Each
+    argument may be a number or an array of points, like in eval.
+
+    With derivatives=0 the function returns the value. With derivatives=1
+    it returns the value and the gradient with respect to args, as a (V,)
+    array or an (N, V) array for N points. With derivatives=2 it returns the
+    hessian as well, as a (V, V) or (N, V, V) array. The functions are
+    cached, so asking again for the same args and order is free.
+
+    Examples
+    --------
+    >>> import ad
+    >>> x, y = ad.Variable('x'), ad.Variable('y')
+    >>> f = ad.lambdify(x * ad.Exp(y), [x, y], derivatives=1)
+    >>> f(2.0, 0.0)
+    (2.0, array([1., 2.]))
+    """
+    if derivatives not in (0, 1, 2):
+        raise ValueError('derivatives should be 0, 1 or 2, got %r'
+                         % (derivatives,))
+    key = (tuple(id(var) for var in args), derivatives)
+    funcs = _lambdified.setdefault(expr, {})
+    if key not in funcs:
+        source, namespace = _generate(expr, list(args), derivatives)
+        filename = '<ad.codegen-%d>' % next(_counter)
+        exec(compile(source, filename, 'exec'), namespace)
+        # Keep the source around for tracebacks and inspect.getsource
+        linecache.cache[filename] = (len(source), None,
+                                     source.splitlines(True), filename)
+        funcs[key] = namespace['_lambdified']
+    return funcs[key]
+
+
+class _Source(object):
+    """Stand-in for the value of a node while tracing _op and _partials.
+    Arithmetic and NumPy ufuncs on it build the source code that computes
+    them."""
+    # Take precedence over NumPy scalars and arrays in mixed arithmetic
+    __array_priority__ = 1000
+
+    def __init__(self, text):
+        self.text = text
+
+    def __array_ufunc__(self, ufunc, method, *inputs, **kwargs):
+        if method != '__call__' or kwargs:
+            return NotImplemented
+        return _Source('np.%s(%s)' % (ufunc.__name__,
+                                      ', '.join(map(_code, inputs))))
+
+    def __add__(self, other):
+        return _binary('+', self, other)
+
+    def __radd__(self, other):
+        return _binary('+', other, self)
+
+    def __sub__(self, other):
+        return _binary('-', self, other)
+
+    def __rsub__(self, other):
+        return _binary('-', other, self)
+
+    def __mul__(self, other):
+        return _binary('*', self, other)
+
+    def __rmul__(self, other):
+        return _binary('*', other, self)
+
+    def __truediv__(self, other):
+        return _binary('/', self, other)
+
+    def __rtruediv__(self, other):
+        return _binary('/', other, self)
+
+    def __pow__(self, other):
+        return _binary('**', self, other)
+
+    def __rpow__(self, other):
+        return _binary('**', other, self)
+
+    def __neg__(self):
+        return _Source('(-%s)' % self.text)
+
+
+def _binary(op, a, b):
+    """Source of a binary operation between stand-ins or numbers."""
+    return _Source('(%s %s %s)' % (_code(a), op, _code(b)))
+
+
+def _is_literal(val):
+    """Checks whether val can be written into the source as is."""
+    return isinstance(val, numbers.Real) and np.ndim(val) == 0
+
+
+def _code(val):
+    """Source of a stand-in or of a plain number."""
+    if isinstance(val, _Source):
+        return val.text
+    if not _is_literal(val):
+        raise TypeError('Cannot generate source for %r' % (val,))
+    val = val.item() if isinstance(val, np.generic) else val
+    if isinstance(val, float) and not np.isfinite(val):
+        if np.isnan(val):
+            return 'np.nan'
+        return 'np.inf' if val > 0 else '(-np.inf)'
+    return repr(val)
+
+
+def _product(*factors):
+    """Source of the product of the factors, None if it is structurally
+    zero. Factors are local names, stand-ins, numbers, or None for zero."""
+    codes = []
+    sign = 1
+    for factor in factors:
+        if factor is None:
+            return None
+        if isinstance(factor, numbers.Number):
+            if factor == 0:
+                return None
+            if factor == 1 or factor == -1:
+                sign *= int(factor)
+                continue
+        codes.append(factor if isinstance(factor, str) else _code(factor))
+    code = ' * '.join(codes) if codes else '1.0'
+    return code if sign == 1 else '-(%s)' % code
+
+
+def _generate(expr, args, derivatives):
+    """Helper - Returns the source of the function computing expr and its
+    derivatives, and the namespace to run it in."""
+    nodes = _topological_sort(expr)
+    params = ['a%d' % i for i in range(len(args))]
+    index = {id(var): i for i, var in enumerate(args)}
+    namespace = {'np': np, '_shape': _shape, '_broadcast': _broadcast,
+                 '_gradient': _gradient, '_hessian': _hessian,
+                 '_seed': _seed}
+    lines = ['shape = _shape(%s)' % ', '.join(params)]
+    # Source of the value of every node, a local name or a literal
+    values = {}
+    for k, node in enumerate(nodes):
+        if isinstance(node, Variable):
+            if id(node) not in index:
+                raise ValueError('Variable %s is not in args' % node)
+            values[id(node)] = params[index[id(node)]]
+        elif isinstance(node, Constant):
+            if _is_literal(node.val):
+                values[id(node)] = _code(node.val)
+            else:
+                values[id(node)] = 'c%d' % k
+                namespace['c%d' % k] = node.val
+        else:
+            res = node._op(*[_Source(values[id(child)])
+                             for child in node.children])
+            values[id(node)] = 'v%d' % k
+            lines.append('v%d = %s' % (k, _code(res)))
+    returns = ['_broadcast(%s, shape)' % values[id(expr)]]
+
+    if derivatives >= 1:
+        grads, hessians = _derivatives(nodes, expr, values, lines,
+                                       derivatives, index)
+        row_ids = [id(var) for var in args]
+        returns.append('_gradient([%s], shape)' % ', '.join(
+            grads.get(i, '0.0') for i in row_ids))
+        if derivatives == 2:
+            returns.append('_hessian([%s], %d, shape)' % (', '.join(
+                hessians.get(i, '0.0') for i in row_ids), len(args)))
+
+    source = 'def _lambdified(%s):\n' % ', '.join(params)
+    source += ''.join('    %s\n' % line for line in lines)
+    source += '    return %s\n' % ', '.join(returns)
+    return source, namespace
+
+
+def _derivatives(nodes, expr, values, lines, derivatives, index):
+    """Helper - Appends the reverse sweep, and for derivatives=2 the forward
+    tangents and the reverse sweep of their adjoints, to lines. Returns the
+    local names of the adjoints and of the adjoint tangents by node id,
+    which for the variables are the gradient and the rows of the hessian.
+    """
+    slots = {id(node): k for k, node in enumerate(nodes)}
+    active = [node for node in nodes if node._deps != 0 and node.children]
+    partials, partials2 = {}, {}
+    for node in active:
+        k = slots[id(node)]
+        res = _Source(values[id(node)])
+        args = [_Source(values[id(child)]) for child in node.children]
+        partials[id(node)] = _locals(
+            'p%d_' % k, node._partials(res, *args), lines,
+            [child._deps != 0 for child in node.children])
+        if derivatives == 2:
+            partials2[id(node)] = _locals(
+                'q%d_' % k, node._partials2(res, *args), lines,
+                [True] * (1 if len(args) == 1 else 3))
+
+    # Forward tangents, each one holding the directions of all variables
+    tangents = {}
+    if derivatives == 2:
+        for i, node in enumerate(nodes):
+            if isinstance(node, Variable):
+                tangents[id(node)] = 't%d' % i
+                lines.append('t%d = _seed(%d, %d, shape)'
+                             % (i, index[id(node)], len(index)))
+        for node in active:
+            terms = [_product(p, tangents.get(id(child)))
+                     for child, p in zip(node.children, partials[id(node)])]
+            terms = [term for term in terms if term is not None]
+            if terms:
+                k = slots[id(node)]
+                tangents[id(node)] = 't%d' % k
+                lines.append('t%d = %s' % (k, ' + '.join(terms)))
+
+    # Reverse sweep of the adjoints g and of their tangents h
+    grads, hessians = {}, {}
+    if expr._deps != 0:
+        k = slots[id(expr)]
+        grads[id(expr)] = 'g%d' % k
+        lines.append('g%d = 1.0' % k)
+    for node in reversed(active):
+        g, h = grads.get(id(node)), hessians.get(id(node))
+        children = node.children
+        for j, (child, p) in enumerate(zip(children, partials[id(node)])):
+            if child._deps == 0:
+                continue
+            k = slots[id(child)]
+            _accumulate(grads, child, 'g%d' % k, [_product(g, p)], lines)
+            if derivatives == 2:
+                terms = [_product(h, p)]
+                q = partials2[id(node)]
+                if len(children) == 1:
+                    terms.append(_product(g, q[0], tangents.get(id(child))))
+                else:
+                    # (d2/da2, d2/dadb) for a, (d2/dadb, d2/db2) for b
+                    row = (q[0], q[1]) if j == 0 else (q[1], q[2])
+                    for other, q_l in zip(children, row):
+                        terms.append(_product(g, q_l,
+                                              tangents.get(id(other))))
+                _accumulate(hessians, child, 'h%d' % k, terms, lines)
+    return grads, hessians
+
+
+def _locals(prefix, vals, lines, keep):
+    """Helper - Assigns the stand-ins in vals to new locals, appending the
+    assignments to lines. Numbers are kept as they are, and values whose
+    keep flag is False become None."""
+    ret = []
+    for j, (val, is_kept) in enumerate(zip(vals, keep)):
+        if not is_kept:
+            ret.append(None)
+        elif isinstance(val, _Source):
+            lines.append('%s%d = %s' % (prefix, j, val.text))
+            ret.append('%s%d' % (prefix, j))
+        else:
+            ret.append(val)
+    return ret
+
+
+def _accumulate(store, node, name, terms, lines):
+    """Helper - Adds the terms that are not structurally zero to the local
+    name of node in store, creating it on the first one."""
+    terms = [term for term in terms if term is not None]
+    if not terms:
+        return
+    total = ' + '.join(terms)
+    if id(node) in store:
+        lines.append('%s = %s + %s' % (name, name, total))
+    else:
+        store[id(node)] = name
+        lines.append('%s = %s' % (name, total))
+
+
+def _shape(*args):
+    """Shape of the batch of points given as arguments."""
+    return _batch_shape(dict(enumerate(args)))
+
+
+def _seed(i, n_vars, shape):
+    """Tangent of the i-th variable, with room for the batch dimensions."""
+    ret = np.zeros((n_vars,) + (1,) * len(shape))
+    ret[i] = 1.0
+    return ret
+
+
+def _gradient(grads, shape):
+    """Packs the adjoints of the variables into a gradient array."""
+    ret = np.zeros(shape + (len(grads),))
+    for i, grad in enumerate(grads):
+        ret[..., i] = grad
+    return ret
+
+
+def _hessian(rows, n_vars, shape):
+    """Packs the adjoint tangents of the variables into a hessian array."""
+    ret = np.zeros(shape + (n_vars, n_vars))
+    for i, row in enumerate(rows):
+        ret[..., i, :] = np.moveaxis(_broadcast(row, (n_vars,) + shape), 0,
+                                     -1)
+    return ret
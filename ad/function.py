@@ -0,0 +1,124 @@
+"""Vector valued functions made of several Expressions. The outputs usually
+share large parts of their graphs, so a Function works on the union of the
+graphs and evaluates every node once per call, whatever the number of
+outputs it feeds.
+"""
+import numpy as np
+
+from .ad import Variable, _topological_sort, _batch_shape, _broadcast, \
+    _tangents, _second_order, _unpack_symmetric
+
+__all__ = ['Function']
+
+
+class Function(object):
+    """A function with one output per Expression.
+
+    Examples
+    --------
+    >>> import ad
+    >>> x, y = ad.Variable('x'), ad.Variable('y')
+    >>> shared = ad.Exp(x * y)
+    >>> f = ad.Function([shared + x, shared * y])
+    >>> f.eval({x: 0.0, y: 2.0})
+    array([1., 2.])
+    >>> f.jacobian({x: 0.0, y: 2.0}, wrt=[x, y])
+    array([[3., 0.],
+           [4., 1.]])
+
+    Attributes
+    ----------
+    exprs: list of Expression
+        The M outputs of the function.
+    nodes: list of Expression
+        Every node of the union of the graphs, children before parents.
+    variables: list of Variable
+        The variables any output depends on, in the order of nodes. This is
+        the default for wrt.
+    """
+    def __init__(self, exprs):
+        """
+        Parameters
+        ----------
+        exprs : list of Expression
+            The outputs of the function.
+        """
+        self.exprs = list(exprs)
+        self.nodes = _topological_sort(self.exprs)
+        self.variables = [node for node in self.nodes
+                          if isinstance(node, Variable)]
+
+    def __len__(self):
+        return len(self.exprs)
+
+    def _values(self, feed_dict, e_cache_dict):
+        '''Helper - Evaluates every node once, children first, and returns
+        the values of the outputs.'''
+        for node in self.nodes:
+            node._eval(feed_dict, e_cache_dict)
+        return [expr._eval(feed_dict, e_cache_dict) for expr in self.exprs]
+
+    def eval(self, feed_dict):
+        '''Evaluates every output at the points given. Returns an (M,) float
+        array, or an (N, M) array for a batch of N points.'''
+        shape = _batch_shape(feed_dict)
+        vals = self._values(feed_dict, dict())
+        ret = np.zeros(shape + (len(self.exprs),))
+        for i, val in enumerate(vals):
+            ret[..., i] = val
+        return ret
+
+    def jacobian(self, feed_dict, wrt=None, mode=None):
+        '''Evaluates the jacobian at the points given with respect to the
+        variables in wrt. Returns an (M, V) float array, or an (N, M, V)
+        array for a batch of N points.
+
+        In forward mode all V tangents are pushed through the graph in one
+        sweep, in reverse mode there is one sweep per output. By default the
+        mode with the fewest sweeps is picked, forward mode when there are
+        fewer variables than outputs.'''
+        if wrt is None:
+            wrt = self.variables
+        if mode is None:
+            mode = 'forward' if len(wrt) < len(self.exprs) else 'reverse'
+        shape = _batch_shape(feed_dict)
+        ret = np.zeros(shape + (len(self.exprs), len(wrt)))
+        e_cache_dict = dict()
+        self._values(feed_dict, e_cache_dict)
+        if mode == 'forward':
+            n_vars = len(wrt)
+            # Leave room for the batch dimensions so everything broadcasts
+            seed_shape = (n_vars,) + (1,) * len(shape)
+            seeds = dict()
+            for j, var in enumerate(wrt):
+                seeds[id(var)] = np.zeros(seed_shape)
+                seeds[id(var)][j] = 1.0
+            dots = _tangents(self.exprs, feed_dict, seeds, e_cache_dict)
+            for i, dot in enumerate(dots):
+                if dot is not None:
+                    ret[..., i, :] = np.moveaxis(
+                        _broadcast(dot, (n_vars,) + shape), 0, -1)
+        elif mode == 'reverse':
+            for i, expr in enumerate(self.exprs):
+                adjoints = expr._adjoints(feed_dict, e_cache_dict)
+                for j, var in enumerate(wrt):
+                    if expr._depends_on(var):
+                        ret[..., i, j] = adjoints[id(var)]
+        else:
+            raise ValueError('Unknown mode %r, expected forward or reverse'
+                             % (mode,))
+        return ret
+
+    def hessians(self, feed_dict, wrt=None):
+        '''Evaluates the hessian of every output at the points given with
+        respect to the variables in wrt, in a single forward sweep over the
+        graph. Returns an (M, V, V) float array, or an (N, M, V, V) array
+        for a batch of N points.'''
+        if wrt is None:
+            wrt = self.variables
+        shape = _batch_shape(feed_dict)
+        results = _second_order(self.exprs, feed_dict, wrt)
+        ret = np.zeros(shape + (len(self.exprs), len(wrt), len(wrt)))
+        for i, (_, _, packed) in enumerate(results):
+            ret[..., i, :, :] = _unpack_symmetric(packed, len(wrt), shape)
+        return ret
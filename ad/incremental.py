@@ -0,0 +1,157 @@
+"""Incremental re-evaluation of an Expression. Loops such as coordinate
+descent change only a few variables between calls. An Incremental keeps the
+node values and derivatives of the last call and, on the next one, only
+recomputes the nodes whose dep_vars contain a variable whose value changed.
+"""
+import collections
+
+import numpy as np
+
+from .ad import Variable, _topological_sort, _batch_shape, _broadcast
+
+__all__ = ['Incremental', 'IncrementalInfo']
+
+IncrementalInfo = collections.namedtuple(
+    'IncrementalInfo', ['calls', 'recomputed', 'total_recomputed', 'nodes'])
+
+
+class Incremental(object):
+    """Evaluation context that remembers the results of its last call.
+
+    Examples
+    --------
+    >>> import ad
+    >>> x, y = ad.Variable('x'), ad.Variable('y')
+    >>> inc = (ad.Exp(x) * ad.Sin(y)).incremental()
+    >>> inc.eval({x: 0.0, y: 0.0})
+    0.0
+    >>> inc.eval({x: 1.0, y: 0.0})
+    0.0
+    >>> inc.recomputed
+    2
+
+    Attributes
+    ----------
+    expr: Expression
+        The expression evaluated.
+    nodes: list of Expression
+        Every node of the graph, children before parents.
+    variables: list of Variable
+        The variables the expression depends on.
+    calls: int
+        Number of calls to eval, d and hessian so far.
+    recomputed: int
+        Number of nodes whose value or derivatives were recomputed by the
+        last call.
+    total_recomputed: int
+        Sum of recomputed over every call.
+    """
+    def __init__(self, expr):
+        """
+        Parameters
+        ----------
+        expr : Expression
+            The expression to evaluate.
+        """
+        self.expr = expr
+        self.nodes = _topological_sort(expr)
+        self.variables = [node for node in self.nodes
+                          if isinstance(node, Variable)]
+        # Only these nodes keep entries in the cache dictionaries
+        self._inner = [node for node in self.nodes
+                       if len(node.children) != 0]
+        self.calls = 0
+        self.recomputed = 0
+        self.total_recomputed = 0
+        self._values = {}
+        self._e_cache = {}
+        self._d_cache = {}
+        self._h_cache = {}
+
+    def __len__(self):
+        return len(self.nodes)
+
+    def _update(self, feed_dict):
+        '''Helper - Compares the values of the variables with the ones of
+        the last call and drops the cached results of every node that
+        depends on a variable that changed.'''
+        changed = 0
+        for var in self.variables:
+            val = np.array(var._eval(feed_dict, None), dtype=float)
+            last = self._values.get(var)
+            if last is None or last.shape != val.shape or \
+                    not np.array_equal(last, val):
+                changed |= var._deps
+                self._values[var] = val
+        if changed == 0:
+            return
+        for node in self._inner:
+            if node._deps & changed:
+                self._e_cache.pop(id(node), None)
+                self._d_cache.pop(id(node), None)
+                self._h_cache.pop(id(node), None)
+
+    def _count(self, cache_dicts):
+        '''Helper - Counts the nodes missing from any of the caches given,
+        which are the nodes the coming call recomputes.'''
+        count = 0
+        for node in self._inner:
+            if any(id(node) not in cache for cache in cache_dicts):
+                count += 1
+        self.calls += 1
+        self.recomputed = count
+        self.total_recomputed += count
+
+    def eval(self, feed_dict):
+        '''Evaluates the expression like Expression.eval, recomputing only
+        the nodes that depend on variables that changed since the last
+        call.'''
+        self._update(feed_dict)
+        self._count([self._e_cache])
+        for node in self.nodes:
+            node._eval(feed_dict, self._e_cache)
+        return _broadcast(self.expr._eval(feed_dict, self._e_cache),
+                          _batch_shape(feed_dict))
+
+    def d(self, feed_dict):
+        '''Evaluates the derivative like Expression.d, recomputing only the
+        nodes that depend on variables that changed since the last call.'''
+        self._update(feed_dict)
+        self._count([self._e_cache, self._d_cache])
+        # Children first, so that nothing recurses
+        for node in self.nodes:
+            node._eval(feed_dict, self._e_cache)
+            node._d(feed_dict, self._e_cache, self._d_cache)
+        res = self.expr._d(feed_dict, self._e_cache, self._d_cache)
+        return self.expr._format_d(res, _batch_shape(feed_dict))
+
+    def hessian(self, feed_dict):
+        '''Evaluates the hessian like Expression.hessian, recomputing only
+        the nodes that depend on variables that changed since the last
+        call.'''
+        self._update(feed_dict)
+        self._count([self._e_cache, self._d_cache, self._h_cache])
+        e_cache, d_cache, h_cache = self._e_cache, self._d_cache, \
+            self._h_cache
+        for node in self.nodes:
+            node._eval(feed_dict, e_cache)
+            node._d(feed_dict, e_cache, d_cache)
+            node._h(feed_dict, e_cache, d_cache, h_cache)
+        res = self.expr._h(feed_dict, e_cache, d_cache, h_cache)
+        return self.expr._format_h(res, _batch_shape(feed_dict))
+
+    def info(self):
+        '''Returns the number of calls, the nodes recomputed by the last
+        call and by all of them, and the number of nodes of the graph.'''
+        return IncrementalInfo(self.calls, self.recomputed,
+                               self.total_recomputed, len(self.nodes))
+
+    def reset(self):
+        '''Forgets the results of the last call and the counters.'''
+        self._values.clear()
+        self._e_cache.clear()
+        self._d_cache.clear()
+        self._h_cache.clear()
+        self.calls = 0
+        self.recomputed = 0
+        self.total_recomputed = 0
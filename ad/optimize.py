@@ -0,0 +1,298 @@
+"""Quasi-Newton minimization of Expressions. The value and the gradient are
+always computed together, with one forward and one backward sweep (see
+Expression.value_and_grad), and the points already evaluated are cached so
+the line search never evaluates the same point twice.
+
+Both minimizers use a line search satisfying the strong Wolfe conditions
+(Nocedal and Wright, Numerical Optimization, algorithms 3.5 and 3.6).
+"""
+import collections
+import time
+
+import numpy as np
+
+__all__ = ['bfgs', 'lbfgs', 'OptimizeResult']
+
+OptimizeResult = collections.namedtuple(
+    'OptimizeResult', ['x', 'fun', 'grad', 'converged', 'message',
+                       'iterations', 'function_evals', 'gradient_evals',
+                       'wall_time'])
+
+# Sufficient decrease and curvature constants of the Wolfe conditions
+_C1 = 1e-4
+_C2 = 0.9
+# Points kept by the cache of evaluations
+_CACHE_SIZE = 8
+
+
+def bfgs(expr, x0, wrt=None, gtol=1e-6, max_iter=200):
+    """Minimizes expr with the BFGS method, which keeps a dense
+    approximation of the inverse hessian.
+
+    Examples
+    --------
+    >>> import ad
+    >>> x, y = ad.Variable('x'), ad.Variable('y')
+    >>> f = (1 - x) ** 2 + 100 * (y - x * x) ** 2
+    >>> res = ad.bfgs(f, {x: -1.2, y: 1.0})
+    >>> res.converged, round(res.x[x], 6), round(res.x[y], 6)
+    (True, 1.0, 1.0)
+
+    Parameters
+    ----------
+    expr : Expression
+        The function to minimize.
+    x0 : dict or array
+        The initial point, as a dictionary of Variables mapped to values,
+        or as an array of values of the variables in wrt.
+    wrt : list of Variable, optional
+        The variables to minimize over, in order. Defaults to the keys of
+        x0 when it is a dictionary.
+    gtol : float, optional
+        Stop once the largest component of the gradient is below gtol.
+    max_iter : int, optional
+        Maximum number of iterations.
+
+    Returns
+    -------
+    OptimizeResult
+        The final point x, as a dictionary of the variables mapped to
+        values if x0 was one and as an array in the order of wrt otherwise,
+        with the value and gradient there, whether the gradient got below
+        gtol, the number of iterations, of evaluations of the value and of
+        the gradient, and the wall time in seconds.
+    """
+    start = time.perf_counter()
+    wrt, x, as_dict = _initial_point(x0, wrt)
+    fg = _Evaluator(expr, wrt)
+    f, g = fg(x)
+    n = len(x)
+    h = np.eye(n)
+    message = 'Maximum number of iterations reached'
+    k = 0
+    for k in range(max_iter + 1):
+        if np.max(np.abs(g), initial=0) <= gtol:
+            message = 'Gradient below gtol'
+            break
+        if k == max_iter:
+            break
+        p = - h @ g
+        step = _line_search(fg, x, f, g, p)
+        if step is None:
+            message = 'Line search failed'
+            break
+        alpha, f_new, g_new = step
+        s = alpha * p
+        y = g_new - g
+        sy = s @ y
+        if sy > 1e-10 * np.linalg.norm(s) * np.linalg.norm(y):
+            if k == 0:
+                # Scale the initial guess to the curvature seen so far
+                h = np.eye(n) * sy / (y @ y)
+            rho = 1.0 / sy
+            hy = h @ y
+            h += (rho * rho * (y @ hy) + rho) * np.outer(s, s) - \
+                rho * (np.outer(hy, s) + np.outer(s, hy))
+        x, f, g = x + s, f_new, g_new
+    return _result(wrt, x, f, g, message, k, fg, start, as_dict)
+
+
+def lbfgs(expr, x0, wrt=None, memory=10, gtol=1e-6, max_iter=500):
+    """Minimizes expr with the limited memory BFGS method, which only keeps
+    the last few steps and gradient changes instead of a dense inverse
+    hessian, so each iteration costs O(memory * V).
+
+    Examples
+    --------
+    >>> import ad
+    >>> x, y = ad.Variable('x'), ad.Variable('y')
+    >>> f = (1 - x) ** 2 + 100 * (y - x * x) ** 2
+    >>> res = ad.lbfgs(f, [-1.2, 1.0], wrt=[x, y])
+    >>> res.converged, res.x.round(6)
+    (True, array([1., 1.]))
+
+    Parameters
+    ----------
+    expr : Expression
+        The function to minimize.
+    x0 : dict or array
+        The initial point, see bfgs.
+    wrt : list of Variable, optional
+        The variables to minimize over, see bfgs.
+    memory : int, optional
+        Number of steps kept.
+    gtol : float, optional
+        Stop once the largest component of the gradient is below gtol.
+    max_iter : int, optional
+        Maximum number of iterations.
+
+    Returns
+    -------
+    OptimizeResult
+        See bfgs.
+    """
+    start = time.perf_counter()
+    wrt, x, as_dict = _initial_point(x0, wrt)
+    fg = _Evaluator(expr, wrt)
+    f, g = fg(x)
+    history = collections.deque(maxlen=memory)
+    message = 'Maximum number of iterations reached'
+    k = 0
+    for k in range(max_iter + 1):
+        if np.max(np.abs(g), initial=0) <= gtol:
+            message = 'Gradient below gtol'
+            break
+        if k == max_iter:
+            break
+        p = - _two_loop(g, history)
+        step = _line_search(fg, x, f, g, p)
+        if step is None:
+            message = 'Line search failed'
+            break
+        alpha, f_new, g_new = step
+        s = alpha * p
+        y = g_new - g
+        sy = s @ y
+        if sy > 1e-10 * np.linalg.norm(s) * np.linalg.norm(y):
+            history.append((s, y, 1.0 / sy))
+        x, f, g = x + s, f_new, g_new
+    return _result(wrt, x, f, g, message, k, fg, start, as_dict)
+
+
+def _two_loop(g, history):
+    """Helper - Multiplies g by the inverse hessian approximation given by
+    the (s, y, 1 / s.y) pairs in history, with the two loop recursion."""
+    q = g.copy()
+    alphas = []
+    for s, y, rho in reversed(history):
+        alpha = rho * (s @ q)
+        q -= alpha * y
+        alphas.append(alpha)
+    if history:
+        s, y, rho = history[-1]
+        q *= 1.0 / (rho * (y @ y))
+    for (s, y, rho), alpha in zip(history, reversed(alphas)):
+        beta = rho * (y @ q)
+        q += (alpha - beta) * s
+    return q
+
+
+class _Evaluator(object):
+    """Computes the value and the gradient at a point together, and
+    remembers the last few points."""
+    def __init__(self, expr, wrt):
+        self.expr = expr
+        self.wrt = wrt
+        self.evals = 0
+        self._cache = collections.OrderedDict()
+
+    def __call__(self, x):
+        key = x.tobytes()
+        if key in self._cache:
+            self._cache.move_to_end(key)
+            return self._cache[key]
+        self.evals += 1
+        feed = {var: val for var, val in zip(self.wrt, x)}
+        val, grad = self.expr.value_and_grad(feed, self.wrt)
+        self._cache[key] = (float(val), grad)
+        if len(self._cache) > _CACHE_SIZE:
+            self._cache.popitem(last=False)
+        return self._cache[key]
+
+
+def _initial_point(x0, wrt):
+    """Helper - Returns the variables, the initial point as a float array,
+    and whether x0 was a dictionary."""
+    if isinstance(x0, dict):
+        if wrt is None:
+            wrt = list(x0.keys())
+        return list(wrt), np.array([x0[var] for var in wrt],
+                                   dtype=float), True
+    if wrt is None:
+        raise ValueError('wrt is needed when x0 is not a dictionary')
+    x = np.array(x0, dtype=float).reshape(-1)
+    if len(x) != len(wrt):
+        raise ValueError('x0 has %d values for %d variables'
+                         % (len(x), len(wrt)))
+    return list(wrt), x, False
+
+
+def _result(wrt, x, f, g, message, iterations, fg, start, as_dict):
+    """Helper - Packs the final point and statistics."""
+    if as_dict:
+        x = {var: val for var, val in zip(wrt, x)}
+    return OptimizeResult(x=x, fun=f, grad=g,
+                          converged=message == 'Gradient below gtol',
+                          message=message, iterations=iterations,
+                          function_evals=fg.evals, gradient_evals=fg.evals,
+                          wall_time=time.perf_counter() - start)
+
+
+def _line_search(fg, x, f0, g0, p, max_evals=30):
+    """Helper - Finds a step length along p satisfying the strong Wolfe
+    conditions. Returns (alpha, f, g) at the accepted step, or None if p is
+    not a descent direction or no step was found."""
+    dphi0 = g0 @ p
+    if not dphi0 < 0:
+        return None
+
+    def phi(alpha):
+        f, g = fg(x + alpha * p)
+        # Points outside the domain count as no decrease at all
+        if not np.isfinite(f):
+            f = np.inf
+        return f, g, g @ p
+
+    alpha_lo, f_lo, dphi_lo = 0.0, f0, dphi0
+    alpha = 1.0
+    for i in range(max_evals):
+        f, g, dphi = phi(alpha)
+        if f > f0 + _C1 * alpha * dphi0 or (i > 0 and f >= f_lo):
+            return _zoom(phi, f0, dphi0, alpha_lo, f_lo, dphi_lo,
+                         alpha, f, dphi, max_evals - i - 1)
+        if abs(dphi) <= - _C2 * dphi0:
+            return alpha, f, g
+        if dphi >= 0:
+            return _zoom(phi, f0, dphi0, alpha, f, dphi,
+                         alpha_lo, f_lo, dphi_lo, max_evals - i - 1)
+        alpha_lo, f_lo, dphi_lo = alpha, f, dphi
+        alpha *= 2.0
+    return None
+
+
+def _zoom(phi, f0, dphi0, alpha_lo, f_lo, dphi_lo, alpha_hi, f_hi, dphi_hi,
+          max_evals):
+    """Helper - Shrinks the interval between alpha_lo, the best step so
+    far, and alpha_hi until a step satisfies the strong Wolfe
+    conditions."""
+    for _ in range(max_evals):
+        alpha = _cubic_min(alpha_lo, f_lo, dphi_lo, alpha_hi, f_hi, dphi_hi)
+        f, g, dphi = phi(alpha)
+        if f > f0 + _C1 * alpha * dphi0 or f >= f_lo:
+            alpha_hi, f_hi, dphi_hi = alpha, f, dphi
+            continue
+        if abs(dphi) <= - _C2 * dphi0:
+            return alpha, f, g
+        if dphi * (alpha_hi - alpha_lo) >= 0:
+            alpha_hi, f_hi, dphi_hi = alpha_lo, f_lo, dphi_lo
+        alpha_lo, f_lo, dphi_lo = alpha, f, dphi
+    return None
+
+
+def _cubic_min(a, fa, da, b, fb, db):
+    """Helper - Minimizer of the cubic matching the values and slopes at a
+    and b, kept away from the ends of the interval. Falls back to bisection
+    when the cubic has no usable minimum."""
+    lo, hi = min(a, b), max(a, b)
+    margin = 0.1 * (hi - lo)
+    if np.isfinite(fb):
+        d1 = da + db - 3 * (fa - fb) / (a - b)
+        disc = d1 * d1 - da * db
+        if disc >= 0:
+            d2 = np.sign(b - a) * np.sqrt(disc)
+            denom = db - da + 2 * d2
+            if denom != 0:
+                alpha = b - (b - a) * (db + d2 - d1) / denom
+                if lo + margin <= alpha <= hi - margin:
+                    return alpha
+    return 0.5 * (a + b)
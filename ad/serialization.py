@@ -0,0 +1,185 @@
+"""Saving expression graphs to files and loading them back. Graphs are
+written as a flat table with one row per node, in topological order, so
+neither saving nor loading recurses with the depth of the graph. Arrays held
+by Constants are written once each as raw buffers, which load can memory-map
+instead of reading, so many workers can share one copy of large constants.
+
+The file starts with a magic string and the length of a JSON header. The
+header lists the ops, the names of the variables, the plain numbers and the
+layout of the buffers. The node table and the array buffers follow, each
+aligned to _ALIGN bytes.
+"""
+import importlib
+import json
+import struct
+
+import numpy as np
+
+from .ad import Variable, Constant, Unop, Binop, _topological_sort
+
+__all__ = ['save', 'load']
+
+_MAGIC = b'ADGRAPH\x01'
+_ALIGN = 64
+# Modules load looks up the ops of a file in
+_OP_MODULES = (__package__ + '.ad', __package__ + '.simple_ops')
+# Columns of the node table
+_OP, _CHILD1, _CHILD2, _GRAD, _PAYLOAD = range(5)
+
+
+def save(expr, path):
+    """Writes the graph of expr, or of a list of expressions sharing
+    nodes, to the file at path.
+
+    Examples
+    --------
+    >>> import ad, os, tempfile
+    >>> x = ad.Variable('x')
+    >>> path = os.path.join(tempfile.mkdtemp(), 'f.adg')
+    >>> ad.save(ad.Sin(x) * 2.0, path)
+    >>> ad.load(path).eval({'x': 0.0})
+    0.0
+    """
+    roots = expr if isinstance(expr, (list, tuple)) else [expr]
+    nodes = _topological_sort(list(roots))
+    slots = {id(node): i for i, node in enumerate(nodes)}
+    ops, op_codes = [], {}
+    names, numbers, arrays = [], [], []
+    array_index = {}
+    table = np.full((len(nodes), 5), -1, dtype=np.int64)
+    for i, node in enumerate(nodes):
+        cls = type(node)
+        if cls not in op_codes:
+            op_codes[cls] = len(ops)
+            ops.append(_op_name(cls))
+        table[i, _OP] = op_codes[cls]
+        table[i, _GRAD] = bool(node.grad)
+        for j, child in enumerate(node.children):
+            table[i, _CHILD1 + j] = slots[id(child)]
+        if isinstance(node, Variable):
+            table[i, _PAYLOAD] = len(names)
+            names.append(node.name)
+        elif isinstance(node, Constant):
+            val = node.val
+            if type(val) in (bool, int, float):
+                # Plain numbers go in the header, numbered from -2 down
+                table[i, _PAYLOAD] = -2 - len(numbers)
+                numbers.append(val)
+                continue
+            # The same array in several Constants is written once
+            if id(val) not in array_index:
+                array_index[id(val)] = len(arrays)
+                arrays.append(val)
+            table[i, _PAYLOAD] = array_index[id(val)]
+
+    buffers = [table] + [np.asarray(val) for val in arrays]
+    layout, offset = [], 0
+    for buf in buffers:
+        if buf.dtype.hasobject:
+            raise TypeError('Constants holding Python objects cannot be '
+                            'saved, got dtype %s' % buf.dtype)
+        layout.append({'dtype': buf.dtype.str, 'shape': list(buf.shape),
+                       'offset': offset})
+        offset = _aligned(offset + buf.nbytes)
+    header = {
+        'version': 1,
+        'ops': ops,
+        'names': names,
+        'numbers': numbers,
+        'scalars': [not isinstance(val, np.ndarray) for val in arrays],
+        'roots': [slots[id(root)] for root in roots],
+        'list': isinstance(expr, (list, tuple)),
+        'buffers': layout,
+    }
+    header = json.dumps(header).encode('utf-8')
+    start = _aligned(len(_MAGIC) + 8 + len(header))
+    with open(path, 'wb') as f:
+        f.write(_MAGIC)
+        f.write(struct.pack('<Q', len(header)))
+        f.write(header)
+        for buf, entry in zip(buffers, layout):
+            f.seek(start + entry['offset'])
+            f.write(np.ascontiguousarray(buf).tobytes())
+
+
+def load(path, mmap_mode=None):
+    """Reads back the expression, or list of expressions, saved to the file
+    at path. The Variables are new objects, with the names they were saved
+    with. With mmap_mode ('r' or 'c', as for numpy.load) the arrays of the
+    Constants are memory-mapped from the file instead of read into memory.
+    """
+    with open(path, 'rb') as f:
+        if f.read(len(_MAGIC)) != _MAGIC:
+            raise ValueError('%s is not a saved expression graph' % path)
+        size, = struct.unpack('<Q', f.read(8))
+        header = json.loads(f.read(size).decode('utf-8'))
+        start = _aligned(len(_MAGIC) + 8 + size)
+        buffers = [_read_buffer(f, path, start, entry, mmap_mode)
+                   for entry in header['buffers']]
+
+    ops = [_op_class(name) for name in header['ops']]
+    table = buffers[0]
+    arrays = buffers[1:]
+    for k, is_scalar in enumerate(header['scalars']):
+        if is_scalar:
+            arrays[k] = arrays[k][()]
+    nodes = []
+    for row in table.tolist():
+        cls = ops[row[_OP]]
+        grad = bool(row[_GRAD])
+        payload = row[_PAYLOAD]
+        if issubclass(cls, Variable):
+            node = cls(header['names'][payload], grad=grad)
+        elif issubclass(cls, Constant):
+            if payload < 0:
+                val = header['numbers'][-2 - payload]
+            else:
+                val = arrays[payload]
+            node = cls(val, grad=grad)
+        elif issubclass(cls, Binop):
+            node = cls(nodes[row[_CHILD1]], nodes[row[_CHILD2]], grad=grad)
+        else:
+            node = cls(nodes[row[_CHILD1]], grad=grad)
+        nodes.append(node)
+    roots = [nodes[i] for i in header['roots']]
+    if header['list']:
+        return roots
+    return roots[0]
+
+
+def _aligned(offset):
+    """Rounds offset up to a multiple of _ALIGN."""
+    return -(-offset // _ALIGN) * _ALIGN
+
+
+def _op_name(cls):
+    """Returns the name an op is saved under."""
+    return '%s:%s' % (cls.__module__, cls.__qualname__)
+
+
+def _op_class(name):
+    """Returns the op saved under name. Only Expression classes defined in
+    _OP_MODULES are accepted, and no other module is imported."""
+    module, _, qualname = name.partition(':')
+    if module not in _OP_MODULES:
+        raise ValueError('%s is not an expression op' % name)
+    obj = getattr(importlib.import_module(module), qualname, None)
+    if not isinstance(obj, type) or \
+            not issubclass(obj, (Variable, Constant, Unop, Binop)):
+        raise ValueError('%s is not an expression op' % name)
+    return obj
+
+
+def _read_buffer(f, path, start, entry, mmap_mode):
+    """Helper - Reads, or memory-maps, one buffer of the file."""
+    dtype = np.dtype(entry['dtype'])
+    shape = tuple(entry['shape'])
+    count = int(np.prod(shape))
+    if count == 0:
+        return np.empty(shape, dtype=dtype)
+    offset = start + entry['offset']
+    if mmap_mode is not None:
+        return np.memmap(path, dtype=dtype, mode=mmap_mode, offset=offset,
+                         shape=shape)
+    f.seek(offset)
+    return np.fromfile(f, dtype=dtype, count=count).reshape(shape)
@@ -1,6 +1,7 @@
 """Implementations of most simple trigonometic operations and other simple
 unops that are used frequently"""
-from .ad import Unop, Constant
+from .ad import Unop, _constant, _vars_of, _taylor_chain, _taylor_mul, \
+    _taylor_exp, _taylor_log
 import numpy as np
 
 __all__ = ['Sin', 'Cos', 'Tan', 'Sinh', 'Cosh', 'Tanh', 'Exp', 'Log', 'Arcsin',
@@ -20,56 +21,35 @@ class Sin(Unop):
     >>> y.d({x: 1.0})
     0.54030230586813977
     """
-    def _eval(self, feed_dict, cache_dict):
-        if id(self) not in cache_dict:
-            res1 = self.expr1._eval(feed_dict, cache_dict)
-            cache_dict[id(self)] = np.sin(res1)
-        return cache_dict[id(self)]
+    __slots__ = ()
+
+    def _op(self, res1):
+        return np.sin(res1)
 
     def _d(self, feed_dict, e_cache_dict, d_cache_dict):
         if id(self) not in d_cache_dict:
             d1 = self.expr1._d(feed_dict, e_cache_dict, d_cache_dict)
             res1 = self.expr1._eval(feed_dict, e_cache_dict)
             ret = {}
-            for var in self.dep_vars:
+            for var in _vars_of(self._deps):
                 ret[var] = d1.get(var, 0) * np.cos(res1)
             d_cache_dict[id(self)] = ret
         return d_cache_dict[id(self)]
 
+    def _partials(self, res, res1):
+        return (np.cos(res1),)
+
+    def _partials2(self, res, res1):
+        return (- res,)
+
     def _d_expr(self, var):
-        if var not in self.dep_vars:
-            return Constant(0)
+        if not self._depends_on(var):
+            return _constant(0)
         return Cos(self.expr1) * self.expr1._d_expr(var)
 
-    def _d_n(self, n, feed_dict, e_cache_dict, d_cache_dict):
-        if (id(self), n) in d_cache_dict:
-            return d_cache_dict[(id(self), n)]
-        if n == 0:
-            res = self._eval(feed_dict, e_cache_dict)
-            d_cache_dict[(id(self), 0)] = res
-            return d_cache_dict[(id(self), 0)]
-        res = 0
-        cos_g = Cos(self.expr1)
-        for i in range(1, n+1):
-            if (id(self.expr1), i) not in d_cache_dict:
-                g_i = self.expr1._d_n(i, feed_dict, e_cache_dict, d_cache_dict)
-                d_cache_dict[(id(self.expr1), i)] = g_i
-            if (id(cos_g), n-i) not in d_cache_dict:
-                cos_g_ni = cos_g._d_n(n-i, feed_dict, e_cache_dict,
-                                      d_cache_dict)
-                d_cache_dict[(id(cos_g), n-i)] = cos_g_ni
-            g_i = d_cache_dict[(id(self.expr1), i)]
-            cos_g_ni = d_cache_dict[(id(cos_g), n-i)]
-            res += (i * g_i * cos_g_ni)
-        # Clear the caching for cos_g
-        if e_cache_dict.get(id(cos_g)):
-            del e_cache_dict[id(cos_g)]
-        for i in range(1, n+1):
-            if d_cache_dict.get((id(cos_g), n-i)):
-                del d_cache_dict[(id(cos_g), n-i)]
-        res /= n
-        d_cache_dict[(id(self), n)] = res
-        return d_cache_dict[(id(self), n)]
+    def _taylor(self, t1):
+        sin, _ = _taylor_sin_cos(t1)
+        return sin
 
     def _h(self, feed_dict, e_cache, d_cache, h_cache):
         if id(self) not in h_cache:
@@ -77,9 +57,9 @@ class Sin(Unop):
             h1 = self.expr1._h(feed_dict, e_cache, d_cache, h_cache)
             d1 = self.expr1._d(feed_dict, e_cache, d_cache)
             v1 = self.expr1._eval(feed_dict, e_cache)
-            ret = {var:{} for var in self.dep_vars}
-            for var1 in self.dep_vars:
-                for var2 in self.dep_vars:
+            ret = {var:{} for var in _vars_of(self._deps)}
+            for var1 in _vars_of(self._deps):
+                for var2 in _vars_of(self._deps):
                     dxy1 = h1.get(var1, {}).get(var2, 0) 
                     ret[var1][var2] = -np.sin(v1) * d1.get(var1, 0) * d1.get(var2, 0) \
                                       +np.cos(v1) * dxy1
@@ -100,56 +80,35 @@ class Cos(Unop):
     >>> y.d({x: 1.0})
     -0.8414709848078965
     """
-    def _eval(self, feed_dict, cache_dict):
-        if id(self) not in cache_dict:
-            res1 = self.expr1._eval(feed_dict, cache_dict)
-            cache_dict[id(self)] = np.cos(res1)
-        return cache_dict[id(self)]
+    __slots__ = ()
+
+    def _op(self, res1):
+        return np.cos(res1)
 
     def _d(self, feed_dict, e_cache_dict, d_cache_dict):
         if id(self) not in d_cache_dict:
             d1 = self.expr1._d(feed_dict, e_cache_dict, d_cache_dict)
             res1 = self.expr1._eval(feed_dict, e_cache_dict)
             ret = {}
-            for var in self.dep_vars:
+            for var in _vars_of(self._deps):
                 ret[var] = - d1.get(var, 0) * np.sin(res1)
             d_cache_dict[id(self)] = ret
         return d_cache_dict[id(self)]
 
+    def _partials(self, res, res1):
+        return (- np.sin(res1),)
+
+    def _partials2(self, res, res1):
+        return (- res,)
+
     def _d_expr(self, var):
-        if var not in self.dep_vars:
-            return Constant(0)
+        if not self._depends_on(var):
+            return _constant(0)
         return - Sin(self.expr1) * self.expr1._d_expr(var)
 
-    def _d_n(self, n, feed_dict, e_cache_dict, d_cache_dict):
-        if (id(self), n) in d_cache_dict:
-            return d_cache_dict[(id(self), n)]
-        if n == 0:
-            res = self._eval(feed_dict, e_cache_dict)
-            d_cache_dict[(id(self), 0)] = res
-            return d_cache_dict[(id(self), 0)]
-        res = 0
-        sin_g = Sin(self.expr1)
-        for i in range(1, n+1):
-            if (id(self.expr1), i) not in d_cache_dict:
-                g_i = self.expr1._d_n(i, feed_dict, e_cache_dict, d_cache_dict)
-                d_cache_dict[(id(self.expr1), i)] = g_i
-            if (id(sin_g), n-i) not in d_cache_dict:
-                sin_g_ni = sin_g._d_n(n-i, feed_dict, e_cache_dict,
-                                      d_cache_dict)
-                d_cache_dict[(id(sin_g), n-i)] = sin_g_ni
-            g_i = d_cache_dict[(id(self.expr1), i)]
-            sin_g_ni = d_cache_dict[(id(sin_g), n-i)]
-            res -= (i * g_i * sin_g_ni)
-        # Clear the caching for sin_g
-        if e_cache_dict.get(id(sin_g)):
-            del e_cache_dict[id(sin_g)]
-        for i in range(1, n+1):
-            if d_cache_dict.get((id(sin_g), n-i)):
-                del d_cache_dict[(id(sin_g), n-i)]
-        res /= n
-        d_cache_dict[(id(self), n)] = res
-        return d_cache_dict[(id(self), n)]
+    def _taylor(self, t1):
+        _, cos = _taylor_sin_cos(t1)
+        return cos
 
     def _h(self, feed_dict, e_cache, d_cache, h_cache):
         if id(self) not in h_cache:
@@ -157,9 +116,9 @@ class Cos(Unop):
             h1 = self.expr1._h(feed_dict, e_cache, d_cache, h_cache)
             d1 = self.expr1._d(feed_dict, e_cache, d_cache)
             v1 = self.expr1._eval(feed_dict, e_cache)
-            ret = {var:{} for var in self.dep_vars}
-            for var1 in self.dep_vars:
-                for var2 in self.dep_vars:
+            ret = {var:{} for var in _vars_of(self._deps)}
+            for var1 in _vars_of(self._deps):
+                for var2 in _vars_of(self._deps):
                     dxy1 = h1.get(var1, {}).get(var2, 0) 
                     ret[var1][var2] = -np.cos(v1) * d1.get(var1, 0) * d1.get(var2, 0) \
                                       -np.sin(v1) * dxy1
@@ -180,11 +139,10 @@ class Tan(Unop):
     >>> y.d({x: 1.0})
     3.42551882081476
     """
-    def _eval(self, feed_dict, cache_dict):
-        if id(self) not in cache_dict:
-            res1 = self.expr1._eval(feed_dict, cache_dict)
-            cache_dict[id(self)] = np.tan(res1)
-        return cache_dict[id(self)]
+    __slots__ = ()
+
+    def _op(self, res1):
+        return np.tan(res1)
 
     def _d(self, feed_dict, e_cache_dict, d_cache_dict):
         if id(self) not in d_cache_dict:
@@ -192,7 +150,7 @@ class Tan(Unop):
             res1 = self.expr1._eval(feed_dict, e_cache_dict)
             tan_tmp = np.tan(res1)
             ret = {}
-            for var in self.dep_vars:
+            for var in _vars_of(self._deps):
                 ret[var] = d1.get(var, 0) * (1 + tan_tmp * tan_tmp)
             d_cache_dict[id(self)] = ret
         return d_cache_dict[id(self)]
@@ -203,9 +161,9 @@ class Tan(Unop):
             h1 = self.expr1._h(feed_dict, e_cache, d_cache, h_cache)
             d1 = self.expr1._d(feed_dict, e_cache, d_cache)
             v1 = self.expr1._eval(feed_dict, e_cache)
-            ret = {var:{} for var in self.dep_vars}
-            for var1 in self.dep_vars:
-                for var2 in self.dep_vars:
+            ret = {var:{} for var in _vars_of(self._deps)}
+            for var1 in _vars_of(self._deps):
+                for var2 in _vars_of(self._deps):
                     dxy1 = h1.get(var1, {}).get(var2, 0) 
                     ret[var1][var2] = 2 * ((1.0 / np.cos(v1)) ** 2) * np.tan(v1) * d1.get(var1, 0) * d1.get(var2, 0) \
                                       +((1.0 / np.cos(v1)) ** 2) * dxy1
@@ -213,11 +171,27 @@ class Tan(Unop):
         return h_cache[id(self)]
 
 
+    def _partials(self, res, res1):
+        return (1 + res * res,)
+
+    def _partials2(self, res, res1):
+        return (2 * res * (1 + res * res),)
+
     def _d_expr(self, var):
-        if var not in self.dep_vars:
-            return Constant(0)
-        return 1.0 / (Cos(self.expr1) * Cos(self.expr1)) * \
-               self.expr1._d_expr(var)
+        if not self._depends_on(var):
+            return _constant(0)
+        cos = Cos(self.expr1)
+        return 1.0 / (cos * cos) * self.expr1._d_expr(var)
+
+    def _taylor(self, t1):
+        # tan' = (1 + tan^2) u'
+        ret, w = np.zeros(np.shape(t1)), np.zeros(np.shape(t1))
+        ret[0] = np.tan(t1[0])
+        w[0] = 1 + ret[0] * ret[0]
+        for k in range(1, len(t1)):
+            ret[k] = _taylor_chain(t1, w, k)
+            w[k] = np.sum(ret[:k + 1] * ret[k::-1], axis=0)
+        return ret
 
 
 class Sinh(Unop):
@@ -233,36 +207,45 @@ class Sinh(Unop):
     >>> y.d({x: 1.0})
     1.5430806348152437
     """
-    def _eval(self, feed_dict, cache_dict):
-        if id(self) not in cache_dict:
-            res1 = self.expr1._eval(feed_dict, cache_dict)
-            cache_dict[id(self)] = np.sinh(res1)
-        return cache_dict[id(self)]
+    __slots__ = ()
+
+    def _op(self, res1):
+        return np.sinh(res1)
 
     def _d(self, feed_dict, e_cache_dict, d_cache_dict):
         if id(self) not in d_cache_dict:
             d1 = self.expr1._d(feed_dict, e_cache_dict, d_cache_dict)
             res1 = self.expr1._eval(feed_dict, e_cache_dict)
             ret = {}
-            for var in self.dep_vars:
+            for var in _vars_of(self._deps):
                 ret[var] = d1.get(var, 0) * np.cosh(res1)
             d_cache_dict[id(self)] = ret
         return d_cache_dict[id(self)]
 
+    def _partials(self, res, res1):
+        return (np.cosh(res1),)
+
+    def _partials2(self, res, res1):
+        return (res,)
+
     def _d_expr(self, var):
-        if var not in self.dep_vars:
-            return Constant(0)
+        if not self._depends_on(var):
+            return _constant(0)
         return Cosh(self.expr1) * self.expr1._d_expr(var)
 
+    def _taylor(self, t1):
+        sinh, _ = _taylor_sinh_cosh(t1)
+        return sinh
+
     def _h(self, feed_dict, e_cache, d_cache, h_cache):
         if id(self) not in h_cache:
             # Both dx^2 and dxdy are just the additions 
             h1 = self.expr1._h(feed_dict, e_cache, d_cache, h_cache)
             d1 = self.expr1._d(feed_dict, e_cache, d_cache)
             v1 = self.expr1._eval(feed_dict, e_cache)
-            ret = {var:{} for var in self.dep_vars}
-            for var1 in self.dep_vars:
-                for var2 in self.dep_vars:
+            ret = {var:{} for var in _vars_of(self._deps)}
+            for var1 in _vars_of(self._deps):
+                for var2 in _vars_of(self._deps):
                     dxy1 = h1.get(var1, {}).get(var2, 0) 
                     ret[var1][var2] = np.sinh(v1) * d1.get(var1, 0) * d1.get(var2, 0) + \
                                       np.cosh(v1) * dxy1
@@ -283,37 +266,46 @@ class Cosh(Unop):
     >>> y.d({x: 1.0})
     1.1752011936438014
     """
-    def _eval(self, feed_dict, cache_dict):
-        if id(self) not in cache_dict:
-            res1 = self.expr1._eval(feed_dict, cache_dict)
-            cache_dict[id(self)] = np.cosh(res1)
-        return cache_dict[id(self)]
+    __slots__ = ()
+
+    def _op(self, res1):
+        return np.cosh(res1)
 
     def _d(self, feed_dict, e_cache_dict, d_cache_dict):
         if id(self) not in d_cache_dict:
             d1 = self.expr1._d(feed_dict, e_cache_dict, d_cache_dict)
             res1 = self.expr1._eval(feed_dict, e_cache_dict)
             ret = {}
-            for var in self.dep_vars:
+            for var in _vars_of(self._deps):
                 ret[var] = d1.get(var, 0) * np.sinh(res1)
             d_cache_dict[id(self)] = ret
         return d_cache_dict[id(self)]
 
 
+    def _partials(self, res, res1):
+        return (np.sinh(res1),)
+
+    def _partials2(self, res, res1):
+        return (res,)
+
     def _d_expr(self, var):
-        if var not in self.dep_vars:
-            return Constant(0)
+        if not self._depends_on(var):
+            return _constant(0)
         return Sinh(self.expr1) * self.expr1._d_expr(var)
 
+    def _taylor(self, t1):
+        _, cosh = _taylor_sinh_cosh(t1)
+        return cosh
+
     def _h(self, feed_dict, e_cache, d_cache, h_cache):
         if id(self) not in h_cache:
             # Both dx^2 and dxdy are just the additions 
             h1 = self.expr1._h(feed_dict, e_cache, d_cache, h_cache)
             d1 = self.expr1._d(feed_dict, e_cache, d_cache)
             v1 = self.expr1._eval(feed_dict, e_cache)
-            ret = {var:{} for var in self.dep_vars}
-            for var1 in self.dep_vars:
-                for var2 in self.dep_vars:
+            ret = {var:{} for var in _vars_of(self._deps)}
+            for var1 in _vars_of(self._deps):
+                for var2 in _vars_of(self._deps):
                     dxy1 = h1.get(var1, {}).get(var2, 0) 
                     ret[var1][var2] = np.cosh(v1) * d1.get(var1, 0) * d1.get(var2, 0) + \
                                       np.sinh(v1) * dxy1
@@ -334,11 +326,10 @@ class Tanh(Unop):
     >>> y.d({x: 1.0})
     0.41997434161402614
     """
-    def _eval(self, feed_dict, cache_dict):
-        if id(self) not in cache_dict:
-            res1 = self.expr1._eval(feed_dict, cache_dict)
-            cache_dict[id(self)] = np.tanh(res1)
-        return cache_dict[id(self)]
+    __slots__ = ()
+
+    def _op(self, res1):
+        return np.tanh(res1)
 
     def _d(self, feed_dict, e_cache_dict, d_cache_dict):
         if id(self) not in d_cache_dict:
@@ -346,16 +337,32 @@ class Tanh(Unop):
             res1 = self.expr1._eval(feed_dict, e_cache_dict)
             tanh_tmp = np.tanh(res1)
             ret = {}
-            for var in self.dep_vars:
+            for var in _vars_of(self._deps):
                 ret[var] = d1.get(var, 0) * (1 - tanh_tmp * tanh_tmp)
             d_cache_dict[id(self)] = ret
         return d_cache_dict[id(self)]
 
+    def _partials(self, res, res1):
+        return (1 - res * res,)
+
+    def _partials2(self, res, res1):
+        return (- 2 * res * (1 - res * res),)
+
     def _d_expr(self, var):
-        if var not in self.dep_vars:
-            return Constant(0)
-        return 1.0 / (Cosh(self.expr1) * Cosh(self.expr1)) * \
-               self.expr1._d_expr(var)
+        if not self._depends_on(var):
+            return _constant(0)
+        cosh = Cosh(self.expr1)
+        return 1.0 / (cosh * cosh) * self.expr1._d_expr(var)
+
+    def _taylor(self, t1):
+        # tanh' = (1 - tanh^2) u'
+        ret, w = np.zeros(np.shape(t1)), np.zeros(np.shape(t1))
+        ret[0] = np.tanh(t1[0])
+        w[0] = 1 - ret[0] * ret[0]
+        for k in range(1, len(t1)):
+            ret[k] = _taylor_chain(t1, w, k)
+            w[k] = - np.sum(ret[:k + 1] * ret[k::-1], axis=0)
+        return ret
 
     def _h(self, feed_dict, e_cache, d_cache, h_cache):
         if id(self) not in h_cache:
@@ -363,9 +370,9 @@ class Tanh(Unop):
             h1 = self.expr1._h(feed_dict, e_cache, d_cache, h_cache)
             d1 = self.expr1._d(feed_dict, e_cache, d_cache)
             v1 = self.expr1._eval(feed_dict, e_cache)
-            ret = {var:{} for var in self.dep_vars}
-            for var1 in self.dep_vars:
-                for var2 in self.dep_vars:
+            ret = {var:{} for var in _vars_of(self._deps)}
+            for var1 in _vars_of(self._deps):
+                for var2 in _vars_of(self._deps):
                     dxy1 = h1.get(var1, {}).get(var2, 0) 
                     ret[var1][var2] = -2 * ((1.0 / np.cosh(v1)) ** 2) * np.tanh(v1) * d1.get(var1, 0) * d1.get(var2, 0) \
                                       +((1.0 / np.cosh(v1)) ** 2) * dxy1
@@ -386,48 +393,34 @@ class Exp(Unop):
     >>> y.d({x: 1.0})
     2.7182818284590451
     """
-    def _eval(self, feed_dict, cache_dict):
-        if id(self) not in cache_dict:
-            res1 = self.expr1._eval(feed_dict, cache_dict)
-            cache_dict[id(self)] = np.exp(res1)
-        return cache_dict[id(self)]
+    __slots__ = ()
+
+    def _op(self, res1):
+        return np.exp(res1)
 
     def _d(self, feed_dict, e_cache_dict, d_cache_dict):
         if id(self) not in d_cache_dict:
             d1 = self.expr1._d(feed_dict, e_cache_dict, d_cache_dict)
             res1 = self.expr1._eval(feed_dict, e_cache_dict)
             ret = {}
-            for var in self.dep_vars:
+            for var in _vars_of(self._deps):
                 ret[var] = d1.get(var, 0) * np.exp(res1)
             d_cache_dict[id(self)] = ret
         return d_cache_dict[id(self)]
 
+    def _partials(self, res, res1):
+        return (res,)
+
+    def _partials2(self, res, res1):
+        return (res,)
+
     def _d_expr(self, var):
-        if var not in self.dep_vars:
-            return Constant(0)
+        if not self._depends_on(var):
+            return _constant(0)
         return self * self.expr1._d_expr(var)
 
-    def _d_n(self, n, feed_dict, e_cache_dict, d_cache_dict):
-        if (id(self), n) in d_cache_dict:
-            return d_cache_dict[(id(self), n)]
-        if n == 0:
-            res = self._eval(feed_dict, e_cache_dict)
-            d_cache_dict[(id(self), 0)] = res
-            return d_cache_dict[(id(self), 0)]
-        res = 0
-        for i in range(1, n+1):
-            if (id(self.expr1), i) not in d_cache_dict:
-                g_i = self.expr1._d_n(i, feed_dict, e_cache_dict, d_cache_dict)
-                d_cache_dict[(id(self.expr1), i)] = g_i
-            if (id(self), n-i) not in d_cache_dict:
-                exp_g_ni = self._d_n(n-i, feed_dict, e_cache_dict, d_cache_dict)
-                d_cache_dict[(id(self), n-i)] = exp_g_ni
-            g_i = d_cache_dict[(id(self.expr1), i)]
-            exp_g_ni = d_cache_dict[(id(self), n-i)]
-            res += (i * g_i * exp_g_ni)
-        res /= n
-        d_cache_dict[(id(self), n)] = res
-        return d_cache_dict[(id(self), n)]
+    def _taylor(self, t1):
+        return _taylor_exp(t1)
 
     def _h(self, feed_dict, e_cache, d_cache, h_cache):
         if id(self) not in h_cache:
@@ -435,9 +428,9 @@ class Exp(Unop):
             h1 = self.expr1._h(feed_dict, e_cache, d_cache, h_cache)
             d1 = self.expr1._d(feed_dict, e_cache, d_cache)
             v1 = self.expr1._eval(feed_dict, e_cache)
-            ret = {var:{} for var in self.dep_vars}
-            for var1 in self.dep_vars:
-                for var2 in self.dep_vars:
+            ret = {var:{} for var in _vars_of(self._deps)}
+            for var1 in _vars_of(self._deps):
+                for var2 in _vars_of(self._deps):
                     dxy1 = h1.get(var1, {}).get(var2, 0) 
                     ret[var1][var2] = np.exp(v1) * d1.get(var1, 0) * d1.get(var2, 0) \
                                       +np.exp(v1) * dxy1
@@ -460,59 +453,34 @@ class Log(Unop):
     >>> y.d({x: 1.0})
     1.0
     """
-    def _eval(self, feed_dict, cache_dict):
-        if id(self) not in cache_dict:
-            res1 = self.expr1._eval(feed_dict, cache_dict)
-            cache_dict[id(self)] = np.log(res1)
-        return cache_dict[id(self)]
+    __slots__ = ()
+
+    def _op(self, res1):
+        return np.log(res1)
 
     def _d(self, feed_dict, e_cache_dict, d_cache_dict):
         if id(self) not in d_cache_dict:
             d1 = self.expr1._d(feed_dict, e_cache_dict, d_cache_dict)
             res1 = self.expr1._eval(feed_dict, e_cache_dict)
             ret = {}
-            for var in self.dep_vars:
+            for var in _vars_of(self._deps):
                 ret[var] = d1.get(var, 0) / res1
             d_cache_dict[id(self)] = ret
         return d_cache_dict[id(self)]
 
+    def _partials(self, res, res1):
+        return (1.0 / res1,)
+
+    def _partials2(self, res, res1):
+        return (- 1.0 / (res1 * res1),)
+
     def _d_expr(self, var):
-        if var not in self.dep_vars:
-            return Constant(0)
-        return Constant(1.0) / self.expr1 * self.expr1._d_expr(var)
-
-    def _d_n(self, n, feed_dict, e_cache_dict, d_cache_dict):
-        if (id(self), n) in d_cache_dict:
-            return d_cache_dict[(id(self), n)]
-        if n == 0:
-            res = self._eval(feed_dict, e_cache_dict)
-            d_cache_dict[(id(self), 0)] = res
-            return d_cache_dict[(id(self), 0)]
-        res = 0
-        for i in range(1, n):
-            if (id(self), i) not in d_cache_dict:
-                log_g_i = self._d_n(i, feed_dict, e_cache_dict, d_cache_dict)
-                d_cache_dict[(id(self), i)] = log_g_i
-            if (id(self.expr1), n-i) not in d_cache_dict:
-                g_ni = self.expr1._d_n(n-i, feed_dict, e_cache_dict,
-                                       d_cache_dict)
-                d_cache_dict[(id(self.expr1), n-i)] = g_ni
-            log_g_i = d_cache_dict[(id(self), i)]
-            g_ni = d_cache_dict[(id(self.expr1), n-i)]
-            res += (i * log_g_i * g_ni)
-        res /= n
-        if (id(self.expr1), n) not in d_cache_dict:
-            g_n = self.expr1._d_n(n, feed_dict, e_cache_dict, d_cache_dict)
-            d_cache_dict[(id(self.expr1), n)] = g_n
-        g_n = d_cache_dict[(id(self.expr1), n)]
-        res = g_n - res
-        if (id(self.expr1), 0) not in d_cache_dict:
-            g_0 = self.expr1._eval(feed_dict, e_cache_dict)
-            d_cache_dict[(id(self.expr1), 0)] = g_0
-        g_0 = d_cache_dict[(id(self.expr1), 0)]
-        res /= g_0
-        d_cache_dict[(id(self), n)] = res
-        return d_cache_dict[(id(self), n)]
+        if not self._depends_on(var):
+            return _constant(0)
+        return _constant(1.0) / self.expr1 * self.expr1._d_expr(var)
+
+    def _taylor(self, t1):
+        return _taylor_log(t1)
 
     def _h(self, feed_dict, e_cache, d_cache, h_cache):
         if id(self) not in h_cache:
@@ -520,9 +488,9 @@ class Log(Unop):
             h1 = self.expr1._h(feed_dict, e_cache, d_cache, h_cache)
             d1 = self.expr1._d(feed_dict, e_cache, d_cache)
             v1 = self.expr1._eval(feed_dict, e_cache)
-            ret = {var:{} for var in self.dep_vars}
-            for var1 in self.dep_vars:
-                for var2 in self.dep_vars:
+            ret = {var:{} for var in _vars_of(self._deps)}
+            for var1 in _vars_of(self._deps):
+                for var2 in _vars_of(self._deps):
                     dxy1 = h1.get(var1, {}).get(var2, 0) 
                     ret[var1][var2] = -(d1.get(var1, 0) * d1.get(var2, 0))/(v1 ** 2) \
                                       +dxy1 / v1
@@ -531,75 +499,109 @@ class Log(Unop):
 
 
 class Arcsin(Unop):
-    def _eval(self, feed_dict, cache_dict):
-        if id(self) not in cache_dict:
-            res1 = self.expr1._eval(feed_dict, cache_dict)
-            cache_dict[id(self)] = np.arcsin(res1)
-        return cache_dict[id(self)]
+    __slots__ = ()
+
+    def _op(self, res1):
+        return np.arcsin(res1)
 
     def _d(self, feed_dict, e_cache_dict, d_cache_dict):
         if id(self) not in d_cache_dict:
             d1 = self.expr1._d(feed_dict, e_cache_dict, d_cache_dict)
             res1 = self.expr1._eval(feed_dict, e_cache_dict)
             ret = {}
-            for var in self.dep_vars:
+            for var in _vars_of(self._deps):
                 ret[var] = d1.get(var, 0) / np.sqrt(1 - res1 ** 2)
             d_cache_dict[id(self)] = ret
         return d_cache_dict[id(self)]
 
+    def _partials(self, res, res1):
+        return (1.0 / np.sqrt(1 - res1 ** 2),)
+
+    def _partials2(self, res, res1):
+        return (res1 / (1 - res1 ** 2) ** 1.5,)
+
     def _d_expr(self, var):
-        if var not in self.dep_vars:
-            return Constant(0)
+        if not self._depends_on(var):
+            return _constant(0)
         return 1.0 / ((1.0 - self.expr1 * self.expr1) ** 0.5) * \
                self.expr1.d_expr()
 
+    def _taylor(self, t1):
+        return _taylor_arcsin(t1)
+
 
 class Arccos(Unop):
-    def _eval(self, feed_dict, cache_dict):
-        if id(self) not in cache_dict:
-            res1 = self.expr1._eval(feed_dict, cache_dict)
-            cache_dict[id(self)] = np.arccos(res1)
-        return cache_dict[id(self)]
+    __slots__ = ()
+
+    def _op(self, res1):
+        return np.arccos(res1)
 
     def _d(self, feed_dict, e_cache_dict, d_cache_dict):
         if id(self) not in d_cache_dict:
             d1 = self.expr1._d(feed_dict, e_cache_dict, d_cache_dict)
             res1 = self.expr1._eval(feed_dict, e_cache_dict)
             ret = {}
-            for var in self.dep_vars:
+            for var in _vars_of(self._deps):
                 ret[var] = - d1.get(var, 0) / np.sqrt(1 - res1 ** 2)
             d_cache_dict[id(self)] = ret
         return d_cache_dict[id(self)]
 
+    def _partials(self, res, res1):
+        return (- 1.0 / np.sqrt(1 - res1 ** 2),)
+
+    def _partials2(self, res, res1):
+        return (- res1 / (1 - res1 ** 2) ** 1.5,)
+
     def _d_expr(self, var):
-        if var not in self.dep_vars:
-            return Constant(0)
+        if not self._depends_on(var):
+            return _constant(0)
         return - 1.0 / ((1.0 - self.expr1 * self.expr1) ** 0.5) * \
                self.expr1.d_expr()
 
+    def _taylor(self, t1):
+        # arccos = pi / 2 - arcsin
+        ret = - _taylor_arcsin(t1)
+        ret[0] = np.arccos(t1[0])
+        return ret
+
 
 class Arctan(Unop):
-    def _eval(self, feed_dict, cache_dict):
-        if id(self) not in cache_dict:
-            res1 = self.expr1._eval(feed_dict, cache_dict)
-            cache_dict[id(self)] = np.arctan(res1)
-        return cache_dict[id(self)]
+    __slots__ = ()
+
+    def _op(self, res1):
+        return np.arctan(res1)
 
     def _d(self, feed_dict, e_cache_dict, d_cache_dict):
         if id(self) not in d_cache_dict:
             d1 = self.expr1._d(feed_dict, e_cache_dict, d_cache_dict)
             res1 = self.expr1._eval(feed_dict, e_cache_dict)
             ret = {}
-            for var in self.dep_vars:
+            for var in _vars_of(self._deps):
                 ret[var] = d1.get(var, 0) / (1 + res1 ** 2)
             d_cache_dict[id(self)] = ret
         return d_cache_dict[id(self)]
 
+    def _partials(self, res, res1):
+        return (1.0 / (1 + res1 ** 2),)
+
+    def _partials2(self, res, res1):
+        return (- 2 * res1 / (1 + res1 ** 2) ** 2,)
+
     def _d_expr(self, var):
-        if var not in self.dep_vars:
-            return Constant(0)
+        if not self._depends_on(var):
+            return _constant(0)
         return 1.0 / (1.0 + self.expr1 * self.expr1) * self.expr1.d_expr()
 
+    def _taylor(self, t1):
+        # (1 + u^2) v' = u'
+        q = _taylor_mul(t1, t1)
+        q[0] = q[0] + 1
+        ret = np.zeros(np.shape(t1))
+        ret[0] = np.arctan(t1[0])
+        for k in range(1, len(t1)):
+            ret[k] = (t1[k] - _taylor_chain(ret, q, k)) / q[0]
+        return ret
+
 
 def Logistic(x):
     """Logistic function."""
@@ -613,4 +615,48 @@ def Logb(b, x):
 
 def Sqrt(x):
     """Square root function."""
-    return x ** 0.5
\ No newline at end of file
+    return x ** 0.5
+
+
+def _taylor_sin_cos(u):
+    """Returns the coefficients of sin(u) and cos(u), which are needed
+    together since sin' = cos u' and cos' = - sin u'."""
+    sin, cos = np.zeros(np.shape(u)), np.zeros(np.shape(u))
+    sin[0], cos[0] = np.sin(u[0]), np.cos(u[0])
+    for k in range(1, len(u)):
+        sin[k] = _taylor_chain(u, cos, k)
+        cos[k] = - _taylor_chain(u, sin, k)
+    return sin, cos
+
+
+def _taylor_sinh_cosh(u):
+    """Returns the coefficients of sinh(u) and cosh(u)."""
+    sinh, cosh = np.zeros(np.shape(u)), np.zeros(np.shape(u))
+    sinh[0], cosh[0] = np.sinh(u[0]), np.cosh(u[0])
+    for k in range(1, len(u)):
+        sinh[k] = _taylor_chain(u, cosh, k)
+        cosh[k] = _taylor_chain(u, sinh, k)
+    return sinh, cosh
+
+
+def _taylor_sqrt(q):
+    """Returns the coefficients of sqrt(q)."""
+    ret = np.zeros(np.shape(q))
+    ret[0] = np.sqrt(q[0])
+    for k in range(1, len(q)):
+        ret[k] = (q[k] - np.sum(ret[1:k] * ret[k - 1:0:-1], axis=0)) / \
+                 (2 * ret[0])
+    return ret
+
+
+def _taylor_arcsin(u):
+    """Returns the coefficients of arcsin(u), using
+    sqrt(1 - u^2) arcsin' = u'."""
+    q = - _taylor_mul(u, u)
+    q[0] = q[0] + 1
+    r = _taylor_sqrt(q)
+    ret = np.zeros(np.shape(u))
+    ret[0] = np.arcsin(u[0])
+    for k in range(1, len(u)):
+        ret[k] = (u[k] - _taylor_chain(ret, r, k)) / r[0]
+    return ret
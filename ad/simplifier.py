@@ -0,0 +1,228 @@
+"""Algebraic simplification of expression graphs. d_expr applies the
+differentiation rules mechanically, so its output is full of zero terms,
+factors of one and repeated copies of the same product rule branches, and
+it grows exponentially with the order.
+
+simplify rebuilds a graph bottom up. Constant subgraphs are folded,
+identities such as x * 1 and x + 0 are removed, and structurally identical
+subgraphs become a single node (see ad.interning). Nested sums and products
+are also flattened, so like terms (2 * a + 3 * a) and repeated factors
+(a * b * a) are collected.
+"""
+import numpy as np
+
+from .ad import Constant, Negation, Power, Addition, Subtraction, \
+    Multiplication, Division, Variable, interning, _topological_sort
+
+__all__ = ['simplify', 'node_count']
+
+
+def node_count(expr):
+    """Returns the number of distinct nodes in the graph of expr."""
+    return len(_topological_sort(expr))
+
+
+def simplify(expr, return_counts=False):
+    """Returns an expression equal to expr with a graph that is usually
+    much smaller.
+
+    Parameters
+    ----------
+    expr : Expression
+        The expression to simplify, it is not modified.
+    return_counts : bool, optional
+        If True, also return the node counts of the graph before and after.
+
+    Examples
+    --------
+    >>> import ad
+    >>> x = ad.Variable('x')
+    >>> f = (x * 1.0 + 0.0) * (x + x) - ad.Sin(x) * 0.0
+    >>> g, before, after = ad.simplify(f, return_counts=True)
+    >>> before, after
+    (11, 5)
+    >>> g.eval({x: 3.0})
+    18.0
+    """
+    order = _topological_sort(expr)
+    parents, kinds = dict(), dict()
+    for node in order:
+        kinds[id(node)] = _kind(node)
+        for child in node.children:
+            parents[id(child)] = parents.get(id(child), 0) + 1
+    # Sums inside sums and products inside products that are used only once
+    # are flattened into the outermost one instead of being rebuilt
+    inlined = set()
+    for node in order:
+        for child in node.children:
+            if parents[id(child)] == 1 and kinds[id(child)] is not None \
+                    and kinds[id(child)] == kinds[id(node)]:
+                inlined.add(id(child))
+
+    new = dict()
+    with interning():
+        for node in order:
+            if id(node) in inlined:
+                continue
+            if kinds[id(node)] == 'sum':
+                new[id(node)] = _simplify_sum(node, new, inlined)
+            elif kinds[id(node)] == 'product':
+                new[id(node)] = _simplify_product(node, new, inlined)
+            else:
+                new[id(node)] = _simplify_node(node, new)
+    ret = new[id(expr)]
+    if return_counts:
+        return ret, len(order), node_count(ret)
+    return ret
+
+
+def _kind(node):
+    """Returns 'sum' for nodes that are linear in their variable children,
+    'product' for products of two such children and None otherwise."""
+    if node._deps == 0:
+        return None
+    if isinstance(node, (Addition, Subtraction, Negation)):
+        return 'sum'
+    if isinstance(node, Multiplication):
+        if node.expr1._deps == 0 or node.expr2._deps == 0:
+            return 'sum'
+        return 'product'
+    if isinstance(node, Division) and node.expr2._deps == 0:
+        return 'sum'
+    return None
+
+
+def _is_value(val, target):
+    """Checks whether val is the single number target."""
+    return np.ndim(val) == 0 and val == target
+
+
+def _simplify_node(node, new):
+    """Rebuilds any node that is not part of a sum or a product."""
+    if isinstance(node, Variable):
+        return node
+    if isinstance(node, Constant):
+        return Constant(node.val)
+    children = [new[id(child)] for child in node.children]
+    if all(isinstance(child, Constant) for child in children):
+        return Constant(node._op(*[child.val for child in children]))
+    if isinstance(node, Power) and isinstance(children[1], Constant):
+        if _is_value(children[1].val, 1):
+            return children[0]
+        if _is_value(children[1].val, 0):
+            return Constant(1.0)
+    if isinstance(node, Division) and isinstance(children[0], Constant) \
+            and _is_value(children[0].val, 0):
+        return Constant(0.0)
+    return type(node)(*children, grad=node.grad)
+
+
+def _split_coefficient(node):
+    """Splits a simplified node into a constant coefficient and the rest."""
+    if isinstance(node, Negation):
+        return -1.0, node.expr1
+    if isinstance(node, Multiplication) and isinstance(node.expr1, Constant):
+        return node.expr1.val, node.expr2
+    return 1.0, node
+
+
+def _simplify_sum(root, new, inlined):
+    """Collects the terms of a sum (including the inlined sums below it) as
+    coefficients of distinct simplified nodes, then rebuilds it."""
+    const, terms = 0.0, dict()
+    stack = [(root, 1.0)]
+    while stack:
+        node, coeff = stack.pop()
+        if node is not root and id(node) not in inlined:
+            term = new[id(node)]
+            if isinstance(term, Constant):
+                const = const + coeff * term.val
+                continue
+            factor, term = _split_coefficient(term)
+            if id(term) in terms:
+                terms[id(term)][1] = terms[id(term)][1] + coeff * factor
+            else:
+                terms[id(term)] = [term, coeff * factor]
+        elif isinstance(node, Addition):
+            stack.append((node.expr2, coeff))
+            stack.append((node.expr1, coeff))
+        elif isinstance(node, Subtraction):
+            stack.append((node.expr2, -coeff))
+            stack.append((node.expr1, coeff))
+        elif isinstance(node, Negation):
+            stack.append((node.expr1, -coeff))
+        elif isinstance(node, Division):
+            stack.append((node.expr1, coeff / new[id(node.expr2)].val))
+        elif node.expr1._deps == 0:
+            stack.append((node.expr2, coeff * new[id(node.expr1)].val))
+        else:
+            stack.append((node.expr1, coeff * new[id(node.expr2)].val))
+
+    positive, negative = [], []
+    for term, coeff in terms.values():
+        if _is_value(coeff, 0):
+            continue
+        elif _is_value(coeff, 1):
+            positive.append(term)
+        elif _is_value(coeff, -1):
+            negative.append(term)
+        elif np.ndim(coeff) == 0 and coeff < 0:
+            negative.append(Multiplication(Constant(-coeff), term))
+        else:
+            positive.append(Multiplication(Constant(coeff), term))
+    ret = None
+    for term in positive:
+        ret = term if ret is None else Addition(ret, term)
+    for term in negative:
+        ret = Negation(term) if ret is None else Subtraction(ret, term)
+    if ret is None:
+        return Constant(const)
+    if _is_value(const, 0):
+        return ret
+    if np.ndim(const) == 0 and const < 0:
+        return Subtraction(ret, Constant(-const))
+    return Addition(ret, Constant(const))
+
+
+def _simplify_product(root, new, inlined):
+    """Collects the factors of a product (including the inlined products
+    below it) as powers of distinct simplified nodes, then rebuilds it."""
+    coeff, factors = 1.0, dict()
+    stack = [root]
+    while stack:
+        node = stack.pop()
+        if node is root or id(node) in inlined:
+            stack.append(node.expr2)
+            stack.append(node.expr1)
+            continue
+        factor = new[id(node)]
+        if isinstance(factor, Constant):
+            coeff = coeff * factor.val
+            continue
+        scale, factor = _split_coefficient(factor)
+        coeff = coeff * scale
+        power = 1
+        if isinstance(factor, Power) and isinstance(factor.expr2, Constant) \
+                and np.ndim(factor.expr2.val) == 0:
+            factor, power = factor.expr1, factor.expr2.val
+        if id(factor) in factors:
+            factors[id(factor)][1] += power
+        else:
+            factors[id(factor)] = [factor, power]
+
+    if _is_value(coeff, 0):
+        return Constant(0.0)
+    ret = None
+    for factor, power in factors.values():
+        if power == 0:
+            continue
+        if power != 1:
+            factor = Power(factor, Constant(power))
+        ret = factor if ret is None else Multiplication(ret, factor)
+    if ret is None:
+        return Constant(coeff)
+    if _is_value(coeff, 1):
+        return ret
+    if _is_value(coeff, -1):
+        return Negation(ret)
+    return Multiplication(Constant(coeff), ret)
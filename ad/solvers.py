@@ -0,0 +1,268 @@
+"""Newton's method for systems of equations made of Expressions. The
+equations are evaluated together as a Function, so the nodes they share are
+computed once per point, and the jacobian is assembled from the same graph.
+
+Computing and factoring the jacobian dominates the cost on large systems,
+so the chord (Shamanskii) mode keeps using one LU factorization for several
+iterations and only refreshes it when the residual stops dropping fast
+enough.
+
+For many independent scalar problems, newton runs the iterations for all
+the starting points at once with array feeds.
+"""
+import collections
+import time
+
+import numpy as np
+
+from .function import Function
+
+__all__ = ['solve', 'SolveResult', 'newton', 'RootResult']
+
+SolveResult = collections.namedtuple(
+    'SolveResult', ['x', 'fun', 'converged', 'message', 'iterations',
+                    'function_evals', 'jacobian_evals', 'factorizations',
+                    'wall_time'])
+
+RootResult = collections.namedtuple(
+    'RootResult', ['x', 'fun', 'converged', 'iterations'])
+
+
+def solve(equations, variables, x0, method='newton', tol=1e-10, max_iter=50,
+          reuse=5, rate=0.5):
+    """Finds a point where every equation is zero with Newton's method.
+
+    Examples
+    --------
+    >>> import ad
+    >>> x, y = ad.Variable('x'), ad.Variable('y')
+    >>> res = ad.solve([x * x + y * y - 4, x - y], [x, y], [1.0, 2.0])
+    >>> res.converged, res.x.round(6)
+    (True, array([1.414214, 1.414214]))
+
+    Parameters
+    ----------
+    equations : list of Expression
+        The M equations, each one equal to zero at the solution.
+    variables : list of Variable
+        The M unknowns, in order.
+    x0 : dict or array
+        The initial point, as a dictionary of the variables mapped to
+        values or as an array in the order of variables.
+    method : str, optional
+        'newton' computes and factors the jacobian at every iteration.
+        'chord' reuses the factorization of an earlier jacobian for up to
+        reuse iterations, and refreshes it as soon as an iteration reduces
+        the residual by less than the factor rate. Steps from an old
+        factorization that increase the residual are rejected.
+    tol : float, optional
+        Stop once the largest residual is below tol.
+    max_iter : int, optional
+        Maximum number of iterations.
+    reuse : int, optional
+        Number of iterations a factorization is used for in chord mode.
+    rate : float, optional
+        Slowest acceptable reduction of the residual per iteration in chord
+        mode.
+
+    Returns
+    -------
+    SolveResult
+        The final point x, a dictionary if x0 was one and an array
+        otherwise, with the residuals there, whether they got below tol,
+        the number of iterations, of evaluations of the equations and of
+        the jacobian, of factorizations, and the wall time in seconds.
+    """
+    if method not in ('newton', 'chord'):
+        raise ValueError('Unknown method %r, expected newton or chord'
+                         % (method,))
+    start = time.perf_counter()
+    variables = list(variables)
+    if len(equations) != len(variables):
+        raise ValueError('%d equations for %d variables'
+                         % (len(equations), len(variables)))
+    function = Function(equations)
+    as_dict = isinstance(x0, dict)
+    if as_dict:
+        x = np.array([x0[var] for var in variables], dtype=float)
+    else:
+        x = np.array(x0, dtype=float).reshape(-1)
+
+    def feed(x):
+        return {var: val for var, val in zip(variables, x)}
+
+    counts = collections.Counter()
+    fx = function.eval(feed(x))
+    counts['function'] += 1
+    norm = np.max(np.abs(fx), initial=0)
+    factors = None
+    # Iterations the current factorization has been used for
+    age = 0
+    message = 'Maximum number of iterations reached'
+    k = 0
+    for k in range(max_iter + 1):
+        if not np.isfinite(norm):
+            message = 'Residual is not finite'
+            break
+        if norm <= tol:
+            message = 'Residual below tol'
+            break
+        if k == max_iter:
+            break
+        if factors is None or method == 'newton' or age >= reuse:
+            factors = function.jacobian(feed(x), wrt=variables)
+            counts['jacobian'] += 1
+            if method == 'chord':
+                try:
+                    factors = _lu_factor(factors)
+                except np.linalg.LinAlgError:
+                    message = 'Singular jacobian'
+                    break
+                counts['factorization'] += 1
+            age = 0
+        try:
+            if method == 'newton':
+                # Factors the jacobian and solves with it in one go
+                step = np.linalg.solve(factors, fx)
+                counts['factorization'] += 1
+            else:
+                step = _lu_solve(factors, fx)
+        except np.linalg.LinAlgError:
+            message = 'Singular jacobian'
+            break
+        x_new = x - step
+        fx_new = function.eval(feed(x_new))
+        counts['function'] += 1
+        new_norm = np.max(np.abs(fx_new), initial=0)
+        if age > 0 and not new_norm <= norm:
+            # An old factorization made the residual worse, reject the step
+            # and retry from the same point with a fresh jacobian
+            age = reuse
+            continue
+        x, fx = x_new, fx_new
+        age += 1
+        if new_norm > rate * norm:
+            # Converging too slowly, refresh the jacobian next time
+            age = reuse
+        norm = new_norm
+    if as_dict:
+        x = feed(x)
+    return SolveResult(x=x, fun=fx, converged=message == 'Residual below tol',
+                       message=message, iterations=k,
+                       function_evals=counts['function'],
+                       jacobian_evals=counts['jacobian'],
+                       factorizations=counts['factorization'],
+                       wall_time=time.perf_counter() - start)
+
+
+def newton(expr, var, x0, params=None, tol=1e-10, xtol=1e-12, max_iter=50):
+    """Finds roots of the scalar expr in var from many starting points at
+    once. Each iteration evaluates the value and the derivative at all the
+    points still running in one sweep over the graph, with array feeds, and
+    the points that converged or failed are dropped from the next ones.
+
+    Examples
+    --------
+    >>> import ad
+    >>> x, a = ad.Variable('x'), ad.Variable('a')
+    >>> res = ad.newton(x * x - a, x, 1.0, params={a: [2.0, 9.0, 16.0]})
+    >>> res.converged, res.x.round(6)
+    (array([ True,  True,  True]), array([1.414214, 3.      , 4.      ]))
+
+    Parameters
+    ----------
+    expr : Expression
+        The scalar function whose roots are wanted.
+    var : Variable
+        The variable to solve for.
+    x0 : float or array
+        The starting points.
+    params : dict, optional
+        Values of the other variables of expr, numbers or arrays. The
+        starting points and the parameters are broadcast together, and
+        there is one problem for every element of the result.
+    tol : float, optional
+        A point has converged once the absolute value of expr is below tol.
+    xtol : float, optional
+        A point has converged as well once the Newton step is below
+        xtol * (1 + abs(x)).
+    max_iter : int, optional
+        Maximum number of iterations.
+
+    Returns
+    -------
+    RootResult
+        Arrays of the final points x, of expr there, of whether each point
+        converged and of the number of iterations each point ran for, all
+        with the broadcast shape of x0 and the parameters. Points where the
+        derivative vanishes or the values stop being finite are reported
+        as not converged.
+    """
+    params = dict(params or {})
+    arrays = np.broadcast_arrays(np.asarray(x0, dtype=float),
+                                 *[np.asarray(val) for val in params.values()])
+    shape = arrays[0].shape
+    x = arrays[0].astype(float).reshape(-1)
+    params = {p: val.reshape(-1) for p, val in zip(params, arrays[1:])}
+    fun = np.full(x.shape, np.nan)
+    converged = np.zeros(x.shape, dtype=bool)
+    iterations = np.zeros(x.shape, dtype=int)
+    # Points whose last step was below xtol, done once evaluated again
+    settled = np.zeros(x.shape, dtype=bool)
+    # Indices of the points still running
+    active = np.arange(len(x))
+    for k in range(max_iter + 1):
+        if len(active) == 0:
+            break
+        feed = {p: val[active] for p, val in params.items()}
+        feed[var] = x[active]
+        value, grad = expr.value_and_grad(feed, [var])
+        value = np.broadcast_to(value, active.shape)
+        grad = np.broadcast_to(grad[..., 0], active.shape)
+        fun[active] = value
+        done = (np.abs(value) <= tol) | settled[active]
+        converged[active[done]] = True
+        if k == max_iter:
+            break
+        running = ~done & np.isfinite(value) & np.isfinite(grad) & \
+            (grad != 0)
+        active = active[running]
+        step = value[running] / grad[running]
+        x[active] -= step
+        iterations[active] += 1
+        settled[active] = np.abs(step) <= xtol * (1 + np.abs(x[active]))
+    return RootResult(x=x.reshape(shape), fun=fun.reshape(shape),
+                      converged=converged.reshape(shape),
+                      iterations=iterations.reshape(shape))
+
+
+def _lu_factor(a):
+    """Helper - LU factorization with partial pivoting. Returns the unit
+    lower and the upper triangles packed in one array, and the row order.
+    NumPy only solves systems without keeping the factors, hence this."""
+    lu = np.array(a, dtype=float)
+    n = len(lu)
+    piv = np.arange(n)
+    for k in range(n):
+        p = k + np.argmax(np.abs(lu[k:, k]))
+        if lu[p, k] == 0:
+            raise np.linalg.LinAlgError('Singular matrix')
+        if p != k:
+            lu[[k, p]] = lu[[p, k]]
+            piv[[k, p]] = piv[[p, k]]
+        lu[k + 1:, k] /= lu[k, k]
+        lu[k + 1:, k + 1:] -= np.outer(lu[k + 1:, k], lu[k, k + 1:])
+    return lu, piv
+
+
+def _lu_solve(factors, b):
+    """Helper - Solves the system factored by _lu_factor, by forward and
+    back substitution."""
+    lu, piv = factors
+    y = np.array(b, dtype=float)[piv]
+    n = len(y)
+    for i in range(1, n):
+        y[i] -= lu[i, :i] @ y[:i]
+    for i in range(n - 1, -1, -1):
+        y[i] = (y[i] - lu[i, i + 1:] @ y[i + 1:]) / lu[i, i]
+    return y
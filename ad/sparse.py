@@ -0,0 +1,191 @@
+"""Structural sparsity of jacobians and hessians. The patterns are worked out
+from the variables each node depends on and from which second derivatives
+of each op can be nonzero (see _hessian_pattern), so Addition for instance
+never couples two variables. The sparse modes of jacobian() and hessian()
+then only compute the entries in these patterns.
+
+Sparse results are returned in coordinate format, as (rows, cols, vals)
+arrays sorted by row and then column.
+"""
+import numpy as np
+
+from .ad import Variable, _topological_sort, _batch_shape, _vars_of
+
+__all__ = ['jacobian_sparsity', 'hessian_sparsity']
+
+
+def jacobian_sparsity(exprs, wrt):
+    """Returns the (rows, cols) of the structurally nonzero entries of the
+    jacobian of the list of expressions with respect to the variables in
+    wrt.
+
+    Examples
+    --------
+    >>> import ad
+    >>> x, y, z = ad.Variable('x'), ad.Variable('y'), ad.Variable('z')
+    >>> rows, cols = ad.jacobian_sparsity([x * y, ad.Sin(z)], [x, y, z])
+    >>> rows.tolist(), cols.tolist()
+    ([0, 0, 1], [0, 1, 2])
+    """
+    index = {var: j for j, var in enumerate(wrt)}
+    rows, cols = [], []
+    for i, expr in enumerate(exprs):
+        row = sorted(index[var] for var in _vars_of(expr._deps)
+                     if var in index)
+        rows.extend([i] * len(row))
+        cols.extend(row)
+    return np.array(rows, dtype=int), np.array(cols, dtype=int)
+
+
+def hessian_sparsity(expr, wrt):
+    """Returns the (rows, cols) of the structurally nonzero entries of the
+    hessian of expr with respect to the variables in wrt. Both triangles of
+    the symmetric matrix are included.
+
+    Examples
+    --------
+    >>> import ad
+    >>> x, y, z = ad.Variable('x'), ad.Variable('y'), ad.Variable('z')
+    >>> rows, cols = ad.hessian_sparsity(x * y + ad.Sin(z) + x, [x, y, z])
+    >>> rows.tolist(), cols.tolist()
+    ([0, 1, 2], [1, 0, 2])
+    """
+    index = {var: j for j, var in enumerate(wrt)}
+    pairs = set()
+    for node in _topological_sort(expr):
+        if len(node.children) == 0:
+            continue
+        deps = [[index[var] for var in _vars_of(child._deps) if var in index]
+                for child in node.children]
+        pattern = node._hessian_pattern
+        if len(deps) == 1:
+            if pattern[0]:
+                _add_pairs(pairs, deps[0], deps[0])
+            continue
+        if pattern[0]:
+            _add_pairs(pairs, deps[0], deps[0])
+        if pattern[1]:
+            _add_pairs(pairs, deps[0], deps[1])
+        if pattern[2]:
+            _add_pairs(pairs, deps[1], deps[1])
+    pairs = sorted(pairs)
+    rows = np.array([i for i, _ in pairs], dtype=int)
+    cols = np.array([j for _, j in pairs], dtype=int)
+    return rows, cols
+
+
+def _add_pairs(pairs, deps1, deps2):
+    """Marks every pair between deps1 and deps2 as nonzero, symmetrically."""
+    for i in deps1:
+        for j in deps2:
+            pairs.add((i, j))
+            pairs.add((j, i))
+
+
+def _sparse_jacobian(exprs, feed_dict, wrt):
+    """Helper - Evaluates only the structurally nonzero entries of the
+    jacobian, each row with one reverse sweep over its own expression."""
+    rows, cols = jacobian_sparsity(exprs, wrt)
+    vals = np.zeros(_batch_shape(feed_dict) + (len(rows),))
+    e_cache_dict = dict()
+    adjoints = None
+    for k, (i, j) in enumerate(zip(rows, cols)):
+        if k == 0 or rows[k - 1] != i:
+            adjoints = exprs[i]._adjoints(feed_dict, e_cache_dict)
+        vals[..., k] = adjoints[id(wrt[j])]
+    return rows, cols, vals
+
+
+def _sparse_hessian(expr, feed_dict, wrt):
+    """Helper - Evaluates only the structurally nonzero entries of the
+    hessian."""
+    rows, cols = hessian_sparsity(expr, wrt)
+    weights = _edge_pushing(expr, feed_dict)
+    vals = np.zeros(_batch_shape(feed_dict) + (len(rows),))
+    for k, (i, j) in enumerate(zip(rows, cols)):
+        vals[..., k] = weights.get(id(wrt[i]), {}).get(id(wrt[j]), 0)
+    return rows, cols, vals
+
+
+def _edge_pushing(expr, feed_dict):
+    """Helper - Computes the hessian with the edge pushing algorithm of
+    Gower and Mello. This is a reverse sweep, like the one for the
+    gradient. It keeps a symmetric matrix of weights between pairs of
+    nodes. When a node is reached, its weights are pushed down onto its
+    children and the node's own curvature is added, so the work follows
+    the nonzeros of the hessian rather than the number of variables.
+
+    @return: dictionary of dictionaries mapping pairs of node ids to the
+             weight between them, symmetric, and the hessian for pairs of
+             variables
+    """
+    e_cache = dict()
+    order = _topological_sort(expr)
+    for node in order:
+        node._eval(feed_dict, e_cache)
+    adjoints = {id(expr): 1.0}
+    weights = dict()
+
+    def add(j, k, val):
+        row = weights.setdefault(j, {})
+        row[k] = row.get(k, 0) + val
+        if j != k:
+            row = weights.setdefault(k, {})
+            row[j] = row.get(j, 0) + val
+
+    for node in reversed(order):
+        if node._deps == 0 or isinstance(node, Variable):
+            continue
+        key = id(node)
+        adj = adjoints[key]
+        res = node._eval(feed_dict, e_cache)
+        args = [child._eval(feed_dict, e_cache) for child in node.children]
+        partials = node._partials(res, *args)
+        active = [child._deps != 0 for child in node.children]
+        # Partials with respect to each distinct child, so that x * x is
+        # handled as a single child
+        phi = {}
+        for child, is_active, partial in zip(node.children, active, partials):
+            if is_active:
+                phi[id(child)] = phi.get(id(child), 0) + partial
+
+        # Pushing: move the weights of this node onto its children
+        row = weights.pop(key, {})
+        for other, w in row.items():
+            if other == key:
+                continue
+            del weights[other][key]
+            for j, phi_j in phi.items():
+                if j == other:
+                    add(j, j, 2 * phi_j * w)
+                else:
+                    add(other, j, phi_j * w)
+        if key in row:
+            w = row[key]
+            items = list(phi.items())
+            for a, (j, phi_j) in enumerate(items):
+                for k, phi_k in items[a:]:
+                    add(j, k, phi_j * phi_k * w)
+
+        # Creating: the curvature of this node itself
+        pattern = node._hessian_pattern
+        if any(pattern):
+            partials2 = node._partials2(res, *args)
+            ids = [id(child) for child in node.children]
+            if len(ids) == 1:
+                add(ids[0], ids[0], adj * partials2[0])
+            else:
+                d2a, dadb, d2b = partials2
+                if pattern[0] and active[0]:
+                    add(ids[0], ids[0], adj * d2a)
+                if pattern[2] and active[1]:
+                    add(ids[1], ids[1], adj * d2b)
+                if pattern[1] and active[0] and active[1]:
+                    if ids[0] == ids[1]:
+                        add(ids[0], ids[0], 2 * adj * dadb)
+                    else:
+                        add(ids[0], ids[1], adj * dadb)
+
+        for j, phi_j in phi.items():
+            adjoints[j] = adjoints.get(j, 0) + adj * phi_j
+    return weights
@@ -0,0 +1,208 @@
+"""A compiled, flat form of an Expression graph. The graph is topologically
+sorted once and turned into a list of instructions that read and write
+integer slots, so repeated evaluations do not have to walk the graph or
+allocate cache dictionaries.
+"""
+import numpy as np
+
+from .ad import Variable, Constant, _topological_sort, _batch_shape, \
+    _broadcast
+
+__all__ = ['Tape']
+
+
+class Tape(object):
+    """Linear evaluation program for an Expression.
+
+    Every node of the graph gets one slot, numbered in topological order so
+    the output of the expression is always the last slot. Each instruction
+    computes one slot from the slots of its children.
+
+    Examples
+    --------
+    >>> import ad
+    >>> x, y = ad.Variable('x'), ad.Variable('y')
+    >>> tape = (x * ad.Sin(y)).compile()
+    >>> tape.eval({x: 2.0, y: 0.0})
+    0.0
+    >>> tape.grad({x: 2.0, y: 0.0})[y]
+    2.0
+
+    Attributes
+    ----------
+    expr: Expression
+        The expression that was compiled.
+    nodes: list of Expression
+        Every node of the graph, the index in the list is its slot.
+    variables: list of Variable
+        The variables the expression depends on, in slot order.
+    """
+    def __init__(self, expr):
+        """
+        Parameters
+        ----------
+        expr : Expression
+            The expression to compile.
+        """
+        self.expr = expr
+        self.nodes = _topological_sort(expr)
+        slots = {id(node): i for i, node in enumerate(self.nodes)}
+
+        self._template = [None] * len(self.nodes)
+        self._var_slots = []
+        self._instructions = []
+        for slot, node in enumerate(self.nodes):
+            if isinstance(node, Variable):
+                self._var_slots.append((slot, node))
+            elif isinstance(node, Constant):
+                self._template[slot] = node.val
+            else:
+                args = [slots[id(child)] for child in node.children]
+                # Children without variables never receive an adjoint
+                active = [child._deps != 0 for child in node.children]
+                self._instructions.append((slot, node, args, active))
+        self.variables = [var for _, var in self._var_slots]
+        self._var_index = {id(var): slot for slot, var in self._var_slots}
+
+    def __len__(self):
+        return len(self._instructions)
+
+    def _forward(self, feed_dict):
+        '''Helper - Fills and returns the list of values of every slot.'''
+        vals = list(self._template)
+        for slot, var in self._var_slots:
+            vals[slot] = var._eval(feed_dict, None)
+        for slot, node, args, _ in self._instructions:
+            if len(args) == 1:
+                vals[slot] = node._op(vals[args[0]])
+            else:
+                vals[slot] = node._op(vals[args[0]], vals[args[1]])
+        return vals
+
+    def _backward(self, vals):
+        '''Helper - Propagates adjoints from the output back to every slot.'''
+        adjs = [0.0] * len(vals)
+        adjs[-1] = 1.0
+        for slot, node, args, active in reversed(self._instructions):
+            adj = adjs[slot]
+            partials = node._partials(vals[slot], *[vals[a] for a in args])
+            for arg, is_active, partial in zip(args, active, partials):
+                if is_active:
+                    adjs[arg] = adjs[arg] + adj * partial
+        return adjs
+
+    def eval(self, feed_dict):
+        '''Evaluates the compiled expression given a dictionary of variables
+        mapped to values.'''
+        return self._forward(feed_dict)[-1]
+
+    def grad(self, feed_dict):
+        '''Evaluates the derivative with one forward and one backward pass
+        over the tape. Returns the same results as Expression.d().'''
+        if len(self.variables) == 0:
+            return 0
+        adjs = self._backward(self._forward(feed_dict))
+        res = {var: adjs[slot] for slot, var in self._var_slots}
+        if len(res) == 1:
+            return list(res.values())[0]
+        return res
+
+    def gradient(self, feed_dict, wrt):
+        '''Evaluates the derivative with respect to the variables in wrt.
+        Returns the same array as Expression.gradient().'''
+        adjs = self._backward(self._forward(feed_dict))
+        ret = np.zeros(_batch_shape(feed_dict) + (len(wrt),))
+        for i, var in enumerate(wrt):
+            if id(var) in self._var_index:
+                ret[..., i] = adjs[self._var_index[id(var)]]
+        return ret
+
+    def _tangents(self, vals, dots):
+        '''Helper - Pushes the tangents seeded at the variable slots of dots
+        forward through the tape, filling every other slot.'''
+        for slot, node, args, active in self._instructions:
+            partials = node._partials(vals[slot], *[vals[a] for a in args])
+            dot = 0.0
+            for arg, is_active, partial in zip(args, active, partials):
+                if is_active:
+                    dot = dot + partial * dots[arg]
+            dots[slot] = dot
+        return dots
+
+    def _adjoint_tangents(self, vals, dots):
+        '''Helper - Propagates the adjoints and the tangents of the adjoints
+        backward through the tape (forward-over-reverse). The tangent of the
+        adjoint of a variable is the hessian times the seeded direction.'''
+        adjs = [0.0] * len(vals)
+        adj_dots = [0.0] * len(vals)
+        adjs[-1] = 1.0
+        for slot, node, args, active in reversed(self._instructions):
+            adj, adj_dot = adjs[slot], adj_dots[slot]
+            child_vals = [vals[a] for a in args]
+            partials = node._partials(vals[slot], *child_vals)
+            partials2 = node._partials2(vals[slot], *child_vals)
+            if len(args) == 1:
+                a, = args
+                if active[0]:
+                    adjs[a] = adjs[a] + adj * partials[0]
+                    adj_dots[a] = adj_dots[a] + adj_dot * partials[0] + \
+                                  adj * partials2[0] * dots[a]
+                continue
+            a, b = args
+            d2a, dadb, d2b = partials2
+            if active[0]:
+                adjs[a] = adjs[a] + adj * partials[0]
+                adj_dots[a] = adj_dots[a] + adj_dot * partials[0] + \
+                              adj * (d2a * dots[a] + dadb * dots[b])
+            if active[1]:
+                adjs[b] = adjs[b] + adj * partials[1]
+                adj_dots[b] = adj_dots[b] + adj_dot * partials[1] + \
+                              adj * (dadb * dots[a] + d2b * dots[b])
+        return adj_dots
+
+    def hessian(self, feed_dict):
+        '''Evaluates the hessian by pushing one tangent per variable forward
+        through the tape and then propagating adjoints and their tangents
+        backward (forward-over-reverse). Returns the same results as
+        Expression.hessian().'''
+        n_vars = len(self.variables)
+        if n_vars == 0:
+            return 0
+        shape = _batch_shape(feed_dict)
+        vals = self._forward(feed_dict)
+        dots = [0.0] * len(vals)
+        # Leave room for the batch dimensions so everything broadcasts
+        seeds = np.eye(n_vars).reshape((n_vars, n_vars) + (1,) * len(shape))
+        for i, (slot, _) in enumerate(self._var_slots):
+            dots[slot] = seeds[i]
+        adj_dots = self._adjoint_tangents(vals, self._tangents(vals, dots))
+
+        res = {}
+        for slot, var in self._var_slots:
+            row = _broadcast(adj_dots[slot], (n_vars,) + shape)
+            res[var] = {var2: row[j] for j, var2 in enumerate(self.variables)}
+        if n_vars == 1:
+            return list(list(res.values())[0].values())[0]
+        return res
+
+    def hvp(self, feed_dict, v, wrt):
+        '''Evaluates the hessian with respect to the variables in wrt times
+        v without forming the hessian. Returns the same array as
+        Expression.hvp().'''
+        v = np.asarray(v, dtype=float)
+        shape = _batch_shape(feed_dict)
+        vals = self._forward(feed_dict)
+        dots = [0.0] * len(vals)
+        # Directions go first while sweeping so they broadcast against the
+        # batch dimensions, and are moved last at the end
+        extra = (1,) * len(shape)
+        for i, var in enumerate(wrt):
+            if id(var) in self._var_index:
+                dots[self._var_index[id(var)]] = v[i].reshape(
+                    v.shape[1:] + extra)
+        adj_dots = self._adjoint_tangents(vals, self._tangents(vals, dots))
+        ret = np.zeros(v.shape + shape)
+        for i, var in enumerate(wrt):
+            if id(var) in self._var_index:
+                ret[i] = adj_dots[self._var_index[id(var)]]
+        return np.moveaxis(ret, range(v.ndim), range(-v.ndim, 0))
@@ -0,0 +1,84 @@
+"""Tests for evaluating expressions at a batch of points at once"""
+import ad
+import pytest
+import numpy as np
+
+
+def test_batch_eval():
+    x, y = ad.Variable('x'), ad.Variable('y')
+    f = ad.Sin(x) * y ** 2 + ad.Exp(x / y) - ad.Log(y) + x ** y
+    xs, ys = np.linspace(0.1, 2.0, 7), np.linspace(0.5, 3.0, 7)
+    res = f.eval({x: xs, y: ys})
+    assert res.shape == (7,)
+    for i in range(7):
+        assert np.isclose(res[i], f.eval({x: xs[i], y: ys[i]}))
+
+
+def test_batch_broadcasts_scalars():
+    x, y = ad.Variable('x'), ad.Variable('y')
+    assert np.allclose(ad.Constant(2.0).eval({x: np.ones(4)}), 2.0 * np.ones(4))
+    res = (x * y).eval({x: np.arange(4.0), y: 2.0})
+    assert np.allclose(res, 2.0 * np.arange(4.0))
+
+
+def test_batch_integer_power():
+    x = ad.Variable('x')
+    f = x ** -2
+    xs = np.arange(1, 5)
+    assert np.allclose(f.eval({x: xs}), 1.0 / xs ** 2)
+    assert np.allclose(f.d({x: xs}), -2.0 / xs ** 3)
+    assert np.allclose(f.hessian({x: xs}), 6.0 / xs ** 4)
+
+
+def test_batch_d():
+    x, y = ad.Variable('x'), ad.Variable('y')
+    f = ad.Tan(x * y) + ad.Cosh(x) / ad.Sinh(y) - ad.Tanh(x - y) + \
+        ad.Arctan(x) * ad.Arcsin(y / 4) + ad.Arccos(x / 4) + x + 2 ** y
+    xs, ys = np.linspace(0.1, 1.0, 5), np.linspace(0.5, 1.5, 5)
+    for mode in ['forward', 'reverse']:
+        d = f.d({x: xs, y: ys}, mode=mode)
+        for i in range(5):
+            di = f.d({x: xs[i], y: ys[i]})
+            assert np.isclose(d[x][i], di[x])
+            assert np.isclose(d[y][i], di[y])
+
+
+def test_batch_d_linear():
+    x, y = ad.Variable('x'), ad.Variable('y')
+    d = (x + y).d({x: np.zeros(3), y: np.zeros(3)})
+    assert d[x].shape == (3,)
+    assert np.allclose(d[x], 1.0)
+    assert np.allclose(x.d({x: np.zeros(3)}), np.ones(3))
+
+
+def test_batch_variable_exponent():
+    x, y = ad.Variable('x'), ad.Variable('y')
+    f = x ** y
+    xs, ys = np.array([1.0, 2.0, 3.0]), np.array([2.0, 0.5, 1.0])
+    d = f.d({x: xs, y: ys})
+    assert np.allclose(d[x], ys * xs ** (ys - 1))
+    assert np.allclose(d[y], xs ** ys * np.log(xs))
+
+
+def test_batch_hessian():
+    x, y, z = ad.Variable(), ad.Variable(), ad.Variable()
+    f = ad.Sinh(ad.Exp(x - 3.0) * y) + ad.Log(y + x ** 2) * z * ad.Sin(x)
+    xs = np.linspace(0.5, 1.5, 4)
+    ys = np.linspace(2.0, 3.0, 4)
+    zs = np.linspace(4.0, 5.0, 4)
+    h = f.hessian({x: xs, y: ys, z: zs}, wrt=[x, y, z])
+    assert h.shape == (4, 3, 3)
+    for i in range(4):
+        hi = f.hessian({x: xs[i], y: ys[i], z: zs[i]})
+        for j, var1 in enumerate([x, y, z]):
+            for k, var2 in enumerate([x, y, z]):
+                assert np.isclose(h[i, j, k], hi[var1][var2])
+
+
+def test_hessian_wrt_order():
+    x, y = ad.Variable('x'), ad.Variable('y')
+    f = x * x * y
+    h = f.hessian({x: 1.0, y: 2.0}, wrt=[y, x])
+    assert np.allclose(h, [[0.0, 2.0], [2.0, 4.0]])
+    h = x.hessian({x: 1.0}, wrt=[x, y])
+    assert np.allclose(h, np.zeros((2, 2)))
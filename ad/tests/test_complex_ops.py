@@ -94,7 +94,7 @@ def test_expression_exceptions():
     with pytest.raises(NotImplementedError):
         c._d_expr(x)
     with pytest.raises(NotImplementedError):
-        c._d_n(1, {}, {}, {})
+        c._taylor()
 
 def test_variable_exceptions():
     x = ad.Variable('x')
@@ -0,0 +1,38 @@
+"""Tests for the compact nodes and graph construction"""
+import ad
+import pytest
+import numpy as np
+
+
+def test_nodes_have_no_dict():
+    x = ad.Variable('x')
+    for node in [x, ad.Constant(3.0), ad.Sin(x), x * 2.0, -x, x ** 3]:
+        assert not hasattr(node, '__dict__')
+        with pytest.raises(AttributeError):
+            node.extra = 1
+
+
+def test_common_constants_shared():
+    x = ad.Variable('x')
+    assert (x * 2.0).expr2 is (x + 2.0).expr2
+    assert (1 - x).expr1 is (x ** 1).expr2
+    # 1 and 1.0 stay apart, other values are not shared
+    assert (x * 1).expr2 is not (x * 1.0).expr2
+    assert (x * 3.0).expr2 is not (x * 3.0).expr2
+    # -0.0 gives a different reciprocal than 0.0
+    f = x / -0.0
+    assert np.copysign(1.0, f.expr2.val) < 0
+
+
+def test_coerce_numbers_and_arrays():
+    x = ad.Variable('x')
+    vals = np.array([1.0, 2.0])
+    f = x * vals + np.float64(3.0)
+    assert isinstance(f.expr2, ad.Constant)
+    assert np.allclose(f.eval({x: 2.0}), [5.0, 7.0])
+    # Plain numbers given straight to a Binop become constants too
+    g = ad.ad.Subtraction(x, 2.0)
+    assert g.eval({x: 5.0}) == 3.0
+    # The result needs the gradient unless an Expression operand does not
+    assert (x * 2.0).grad
+    assert not (x * ad.Constant(2.0)).grad
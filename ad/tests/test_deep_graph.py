@@ -0,0 +1,75 @@
+"""Tests for graphs that are deeper than the Python recursion limit"""
+import ad
+import pytest
+import numpy as np
+
+DEPTH = 5000
+# Forward mode on a sum is quadratic in the number of variables, so keep this
+# just above the default recursion limit
+N_VARS = 1500
+
+
+def test_deep_sum_over_variables():
+    xs = [ad.Variable('x%d' % i) for i in range(N_VARS)]
+    s = xs[0]
+    for x in xs[1:]:
+        s = s + x
+    feed = {x: float(i) for i, x in enumerate(xs)}
+    assert np.isclose(s.eval(feed), N_VARS * (N_VARS - 1) / 2)
+    d = s.d(feed)
+    assert len(d) == N_VARS
+    assert all(d[x] == 1.0 for x in xs)
+    r = s.d(feed, mode='reverse')
+    assert all(r[x] == 1.0 for x in xs)
+
+
+def test_deep_chain_single_variable():
+    x = ad.Variable('x')
+    s = x
+    for i in range(DEPTH):
+        s = s + x * x
+    assert np.isclose(s.eval({x: 2.0}), 2.0 + DEPTH * 4.0)
+    assert np.isclose(s.d({x: 2.0}), 1.0 + DEPTH * 4.0)
+    assert np.isclose(s.d({x: 2.0}, mode='reverse'), 1.0 + DEPTH * 4.0)
+    assert np.isclose(s.hessian({x: 2.0}), DEPTH * 2.0)
+    assert np.isclose(s.d_n(2, 2.0), DEPTH * 2.0)
+    assert np.isclose(s.d_n(3, 2.0), 0.0)
+
+
+def test_deep_chain_unops():
+    x = ad.Variable('x')
+    s = x
+    for i in range(DEPTH):
+        s = ad.Sin(s) + 0.5 * x
+    feed = {x: 0.3}
+    val = 0.3
+    for i in range(DEPTH):
+        val = np.sin(val) + 0.15
+    assert np.isclose(s.eval(feed), val)
+    assert np.isclose(s.d(feed), s.compile().grad(feed))
+    assert np.isclose(s.hessian(feed), s.compile().hessian(feed))
+    assert np.isclose(s.d_n(1, 0.3), s.d(feed))
+
+
+def test_shallow_graph_has_no_checkpoints():
+    x = ad.Variable('x')
+    s = x
+    for i in range(10):
+        s = s * x
+    assert ad.ad._checkpoints(s) == []
+
+
+def test_checkpoints_cached():
+    import gc
+    x = ad.Variable('x')
+    s = x
+    for i in range(1000):
+        s = s * 0.5 + x
+    checkpoints = ad.ad._checkpoints(s)
+    assert len(checkpoints) > 0 and s not in checkpoints
+    assert ad.ad._checkpoints(s) is checkpoints
+    assert np.isclose(s.eval({x: 1.0}), 2.0)
+    # The cache does not keep the graph alive
+    del s, checkpoints
+    gc.collect()
+    assert len(ad.ad._checkpoint_cache) == 0
@@ -0,0 +1,67 @@
+"""Tests for the bitmasks of dependencies"""
+import gc
+
+import ad
+import numpy as np
+
+
+def test_dep_vars_property():
+    x, y, z = ad.Variable('x'), ad.Variable('y'), ad.Variable('z')
+    f = ad.Sin(x) * y + 2.0
+    assert f.dep_vars == {x, y}
+    assert isinstance(f.dep_vars, frozenset)
+    assert ad.Constant(1.0).dep_vars == set()
+    assert (f + z).dep_vars == {x, y, z}
+    assert (ad.Constant(2.0) * 3.0).dep_vars == set()
+    assert f._depends_on(x) and not f._depends_on(z)
+
+
+def test_masks():
+    x, y = ad.Variable('x'), ad.Variable('y')
+    assert x._deps == 1 << x._index
+    assert x._index != y._index
+    f = ad.Exp(x) + x * y
+    assert f._deps == x._deps | y._deps
+    assert ad.Sin(x)._deps == x._deps
+    assert ad.Constant(1.0)._deps == 0
+
+
+def test_indices_reused():
+    x = ad.Variable('x')
+    y = ad.Variable('y')
+    index = y._index
+    del y
+    gc.collect()
+    z = ad.Variable('z')
+    assert z._index == index
+    f = x * z
+    assert f.dep_vars == {x, z}
+    assert np.isclose(f.d({x: 2.0, z: 3.0})[z], 2.0)
+
+
+def test_sum_of_many_variables():
+    xs = [ad.Variable('x%d' % i) for i in range(2000)]
+    f = xs[0]
+    for x in xs[1:]:
+        f = f + x * x
+    assert len(f.dep_vars) == 2000
+    feed = {x: 1.0 for x in xs}
+    assert np.isclose(f.eval(feed), 1.0 + 1999)
+    grad = f.gradient(feed, xs)
+    assert np.isclose(grad[0], 1.0)
+    assert np.allclose(grad[1:], 2.0)
+
+
+def test_long_masks_not_cached():
+    from ad.ad import _cached_bit_indices, _MAX_CACHED_BITS
+    xs = [ad.Variable('x%d' % i) for i in range(2 * _MAX_CACHED_BITS)]
+    sums = [xs[0]]
+    for x in xs[1:]:
+        sums.append(sums[-1] + x)
+    _cached_bit_indices.cache_clear()
+    for i, f in enumerate(sums):
+        assert f.dep_vars == set(xs[:i + 1])
+    short = sum(f._deps & (f._deps - 1) != 0 and
+                f._deps.bit_length() <= _MAX_CACHED_BITS for f in sums)
+    assert _cached_bit_indices.cache_info().currsize == short
+    assert short < len(sums) - 1
@@ -0,0 +1,64 @@
+"""Tests for multi-output functions"""
+import ad
+import pytest
+import numpy as np
+
+
+def _system():
+    x, y, z = ad.Variable('x'), ad.Variable('y'), ad.Variable('z')
+    shared = ad.Exp(x * y) + ad.Sin(z)
+    exprs = [shared * x, shared / y, ad.Log(shared) - z * z, x + y]
+    return [x, y, z], exprs
+
+
+def test_function_eval():
+    wrt, exprs = _system()
+    f = ad.Function(exprs)
+    feed = {wrt[0]: 0.5, wrt[1]: 2.0, wrt[2]: 1.0}
+    assert len(f) == 4
+    assert np.allclose(f.eval(feed), [e.eval(feed) for e in exprs])
+
+
+def test_function_jacobian_modes():
+    wrt, exprs = _system()
+    f = ad.Function(exprs)
+    feed = {wrt[0]: 0.5, wrt[1]: 2.0, wrt[2]: 1.0}
+    expected = ad.jacobian(exprs, feed, wrt)
+    assert np.allclose(f.jacobian(feed, wrt), expected)
+    assert np.allclose(f.jacobian(feed, wrt, mode='forward'), expected)
+    assert np.allclose(f.jacobian(feed, wrt, mode='reverse'), expected)
+    with pytest.raises(ValueError):
+        f.jacobian(feed, wrt, mode='sideways')
+
+
+def test_function_default_variables():
+    wrt, exprs = _system()
+    f = ad.Function(exprs)
+    assert set(f.variables) == set(wrt)
+    feed = {wrt[0]: 0.5, wrt[1]: 2.0, wrt[2]: 1.0}
+    assert np.allclose(f.jacobian(feed),
+                       ad.jacobian(exprs, feed, f.variables))
+
+
+def test_function_batch():
+    wrt, exprs = _system()
+    f = ad.Function(exprs)
+    feed = {wrt[0]: np.array([0.5, 1.0, 1.5]), wrt[1]: 2.0, wrt[2]: 1.0}
+    assert f.eval(feed).shape == (3, 4)
+    expected = ad.jacobian(exprs, feed, wrt)
+    assert np.allclose(f.jacobian(feed, wrt, mode='forward'), expected)
+    assert np.allclose(f.jacobian(feed, wrt, mode='reverse'), expected)
+    h = f.hessians(feed, wrt)
+    assert h.shape == (3, 4, 3, 3)
+    assert np.allclose(h[:, 1], exprs[1].hessian(feed, wrt))
+
+
+def test_function_hessians():
+    wrt, exprs = _system()
+    # An output that is also part of another output
+    exprs.append(exprs[0] * exprs[1])
+    f = ad.Function(exprs)
+    feed = {wrt[0]: 0.5, wrt[1]: 2.0, wrt[2]: 1.0}
+    h = f.hessians(feed, wrt)
+    for i, expr in enumerate(exprs):
+        assert np.allclose(h[i], expr.hessian(feed, wrt))
@@ -0,0 +1,62 @@
+"""Tests for dense gradient and jacobian arrays"""
+import ad
+import pytest
+import numpy as np
+
+
+def test_gradient_order():
+    x, y, z = ad.Variable('x'), ad.Variable('y'), ad.Variable('z')
+    f = x * y + ad.Sin(z) * x
+    feed = {x: 2.0, y: 3.0, z: 0.5}
+    g = f.gradient(feed, wrt=[z, x, y])
+    assert g.dtype == np.float64
+    assert g.flags['C_CONTIGUOUS']
+    assert np.allclose(g, [2.0 * np.cos(0.5), 3.0 + np.sin(0.5), 2.0])
+
+
+def test_gradient_single_and_missing_variables():
+    x, y = ad.Variable('x'), ad.Variable('y')
+    assert np.allclose((x ** 2).gradient({x: 3.0}, wrt=[x]), [6.0])
+    assert np.allclose((x ** 2).gradient({x: 3.0}, wrt=[x, y]), [6.0, 0.0])
+    assert np.allclose(ad.Constant(2.0).gradient({}, wrt=[x]), [0.0])
+
+
+def test_gradient_matches_d():
+    x, y = ad.Variable('x'), ad.Variable('y')
+    f = ad.Exp(x / y) * ad.Log(x * y) - ad.Tanh(y) ** 2
+    feed = {x: 1.5, y: 0.5}
+    d = f.d(feed)
+    assert np.allclose(f.gradient(feed, wrt=[x, y]), [d[x], d[y]])
+    assert np.allclose(f.compile().gradient(feed, wrt=[x, y]), [d[x], d[y]])
+
+
+def test_gradient_batch():
+    x, y = ad.Variable('x'), ad.Variable('y')
+    f = x * x * y
+    xs, ys = np.arange(4.0), np.ones(4)
+    g = f.gradient({x: xs, y: ys}, wrt=[x, y])
+    assert g.shape == (4, 2)
+    assert np.allclose(g[:, 0], 2 * xs)
+    assert np.allclose(g[:, 1], xs * xs)
+
+
+def test_jacobian():
+    x, y = ad.Variable('x'), ad.Variable('y')
+    s = ad.Sin(x * y)
+    exprs = [s + x, s * y, ad.Constant(1.0)]
+    jac = ad.jacobian(exprs, {x: 1.0, y: 2.0}, wrt=[x, y])
+    c = np.cos(2.0)
+    assert jac.shape == (3, 2)
+    assert np.allclose(jac, [[2 * c + 1, c],
+                             [4 * c, 2 * c + np.sin(2.0)],
+                             [0.0, 0.0]])
+
+
+def test_jacobian_batch():
+    x, y = ad.Variable('x'), ad.Variable('y')
+    xs, ys = np.arange(3.0), np.arange(3.0) + 1
+    jac = ad.jacobian([x * y, x - y], {x: xs, y: ys}, wrt=[x, y])
+    assert jac.shape == (3, 2, 2)
+    assert np.allclose(jac[:, 0, 0], ys)
+    assert np.allclose(jac[:, 0, 1], xs)
+    assert np.allclose(jac[:, 1], [1.0, -1.0])
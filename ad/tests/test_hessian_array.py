@@ -0,0 +1,57 @@
+"""Tests for the array based hessian, checked against the dictionary one"""
+import ad
+import pytest
+import numpy as np
+
+
+def check_matches(f, feed, wrt):
+    h = f.hessian(feed)
+    arr = f.hessian(feed, wrt=wrt)
+    assert arr.shape == (len(wrt), len(wrt))
+    assert np.allclose(arr, arr.T)
+    for i, var1 in enumerate(wrt):
+        for j, var2 in enumerate(wrt):
+            assert np.isclose(arr[i, j], h[var1][var2])
+
+
+def test_arithmetic():
+    x, y, z = ad.Variable(), ad.Variable(), ad.Variable()
+    f = 3 * x * x * y + (z - 1.0 / x) ** 5 - x / (y * z) + (x - y) ** -4
+    check_matches(f, {x: 1, y: 3, z: 5}, [x, y, z])
+
+
+def test_trig():
+    x, y, z = ad.Variable(), ad.Variable(), ad.Variable()
+    f = ad.Sin(x * y) + z * ad.Cos(z * ad.Tan(1 / z)) + \
+        ad.Sinh(x * y) + (x + y) * (z ** 2) * ad.Cosh(z * ad.Tanh(1 / z))
+    check_matches(f, {x: 1, y: 2, z: 3}, [x, y, z])
+
+
+def test_logexp():
+    x, y, z = ad.Variable(), ad.Variable(), ad.Variable()
+    f = ad.Sinh(ad.Exp(x - 3.0) * y) + ad.Log(y + x ** 2) * z * ad.Sin(x) - \
+        ad.Logistic(x * z)
+    check_matches(f, {x: 1, y: 3, z: 5}, [x, y, z])
+
+
+def test_subset_of_variables():
+    x, y = ad.Variable('x'), ad.Variable('y')
+    f = x * x * y * y
+    h = f.hessian({x: 1.0, y: 2.0}, wrt=[y])
+    assert np.allclose(h, [[2.0]])
+
+
+def test_variable_exponent():
+    x, y = ad.Variable('x'), ad.Variable('y')
+    h = (x ** y).hessian({x: 2.0, y: 3.0}, wrt=[x, y])
+    cross = 4.0 * (1 + 3 * np.log(2.0))
+    assert np.allclose(h, [[12.0, cross], [cross, 8.0 * np.log(2.0) ** 2]])
+
+
+def test_many_variables():
+    xs = [ad.Variable('x%d' % i) for i in range(30)]
+    f = ad.Constant(0.0)
+    for i in range(len(xs) - 1):
+        f = f + 100 * (xs[i + 1] - xs[i] ** 2) ** 2 + (1 - xs[i]) ** 2
+    feed = {x: 0.1 * i for i, x in enumerate(xs)}
+    check_matches(f, feed, xs)
@@ -0,0 +1,84 @@
+"""Tests for hessian-vector products"""
+import ad
+import pytest
+import numpy as np
+
+
+def test_hvp_matches_hessian():
+    x, y, z = ad.Variable(), ad.Variable(), ad.Variable()
+    f = ad.Sinh(ad.Exp(x - 3.0) * y) + ad.Log(y + x ** 2) * z * ad.Sin(x) + \
+        x * x / y - ad.Tan(z) * ad.Cos(x)
+    feed = {x: 1.0, y: 3.0, z: 5.0}
+    h = f.hessian(feed, wrt=[x, y, z])
+    v = np.array([0.5, -1.0, 2.0])
+    assert np.allclose(f.hvp(feed, v, wrt=[x, y, z]), h.dot(v))
+
+
+def test_hvp_many_directions():
+    x, y = ad.Variable('x'), ad.Variable('y')
+    f = x ** 3 * y + ad.Exp(x * y)
+    feed = {x: 0.5, y: -0.5}
+    h = f.hessian(feed, wrt=[x, y])
+    v = np.arange(6.0).reshape(2, 3)
+    hv = f.hvp(feed, v, wrt=[x, y])
+    assert hv.shape == (2, 3)
+    assert np.allclose(hv, h.dot(v))
+
+
+def test_hvp_subset_of_variables():
+    x, y = ad.Variable('x'), ad.Variable('y')
+    f = x * x * y
+    # Only the y block, with x held fixed
+    assert np.allclose(f.hvp({x: 1.0, y: 2.0}, [1.0], wrt=[y]), [0.0])
+    assert np.allclose(f.hvp({x: 1.0, y: 2.0}, [1.0, 0.0], wrt=[x, y]),
+                       [4.0, 2.0])
+    z = ad.Variable('z')
+    assert np.allclose(f.hvp({x: 1.0, y: 2.0}, [1.0, 1.0], wrt=[x, z]),
+                       [4.0, 0.0])
+
+
+def test_hvp_compiled_tape():
+    xs = [ad.Variable('x%d' % i) for i in range(20)]
+    f = ad.Constant(0.0)
+    for i in range(19):
+        f = f + 100 * (xs[i + 1] - xs[i] ** 2) ** 2 + (1 - xs[i]) ** 2
+    tape = f.compile()
+    feed = {x: 0.05 * i for i, x in enumerate(xs)}
+    h = f.hessian(feed, wrt=xs)
+    v = np.linspace(-1, 1, 20)
+    assert np.allclose(tape.hvp(feed, v, wrt=xs), h.dot(v))
+
+
+def test_hvp_batch():
+    x, y = ad.Variable('x'), ad.Variable('y')
+    f = x * x * y + ad.Sin(y)
+    for n in [2, 3]:
+        feed = {x: np.arange(1.0, n + 1), y: np.arange(3.0, n + 3)}
+        h = f.hessian(feed, wrt=[x, y])
+        v = np.array([1.0, -2.0])
+        res = f.hvp(feed, v, [x, y])
+        assert res.shape == (n, 2)
+        assert np.allclose(res, h.dot(v))
+        vs = np.array([[1.0, 0.5, 0.0], [-2.0, 1.0, 3.0]])
+        res = f.hvp(feed, vs, [x, y])
+        assert res.shape == (n, 2, 3)
+        assert np.allclose(res, h.dot(vs))
+
+
+def test_hvp_reuses_tape():
+    import copy
+    import pickle
+    x, y = ad.Variable('x'), ad.Variable('y')
+    f = ad.Sin(x * y) + x ** 3
+    feed = {x: 0.5, y: 2.0}
+    first = f.hvp(feed, [1.0, 0.0], [x, y])
+    tape = f._tape
+    assert isinstance(tape, ad.Tape)
+    assert np.allclose(f.hvp(feed, [1.0, 0.0], [x, y]), first)
+    assert f._tape is tape
+    assert np.allclose(first, f.hessian(feed, [x, y])[:, 0])
+    # Copies compile their own tape
+    for g in [pickle.loads(pickle.dumps(f)), copy.deepcopy(f)]:
+        assert g._tape is None
+        feed = {'x': 0.5, 'y': 2.0}
+        assert np.isclose(g.eval(feed), f.eval({x: 0.5, y: 2.0}))
@@ -0,0 +1,75 @@
+"""Tests for incremental re-evaluation"""
+import ad
+import numpy as np
+
+
+def make_graph():
+    x, y, z = ad.Variable('x'), ad.Variable('y'), ad.Variable('z')
+    f = ad.Sin(x * y) + ad.Exp(z) * z + x * z
+    return f, x, y, z
+
+
+def test_incremental_matches_eval():
+    f, x, y, z = make_graph()
+    inc = f.incremental()
+    rng = np.random.RandomState(0)
+    feed = {x: 0.5, y: 1.5, z: -0.3}
+    for i in range(6):
+        var = [x, y, z][i % 3]
+        feed[var] = rng.uniform(-1, 1)
+        assert np.isclose(inc.eval(feed), f.eval(feed))
+        d = inc.d(feed)
+        expected = f.d(feed)
+        for v in [x, y, z]:
+            assert np.isclose(d[v], expected[v])
+        h = inc.hessian(feed)
+        expected = f.hessian(feed)
+        for v1 in [x, y, z]:
+            for v2 in [x, y, z]:
+                assert np.isclose(h[v1][v2], expected[v1][v2])
+
+
+def test_incremental_counts():
+    f, x, y, z = make_graph()
+    inc = f.incremental()
+    n_inner = len([node for node in inc.nodes if node.children])
+    inc.eval({x: 0.5, y: 1.5, z: -0.3})
+    assert inc.recomputed == n_inner
+    # Nothing changed
+    inc.eval({x: 0.5, y: 1.5, z: -0.3})
+    assert inc.recomputed == 0
+    # x * y, its Sin and the two additions depend on y
+    inc.eval({x: 0.5, y: 2.0, z: -0.3})
+    assert inc.recomputed == 4
+    # x * z as well for x
+    inc.eval({x: 1.0, y: 2.0, z: -0.3})
+    assert inc.recomputed == 5
+    assert inc.info() == ad.IncrementalInfo(calls=4, recomputed=5,
+                                            total_recomputed=n_inner + 9,
+                                            nodes=len(inc.nodes))
+
+
+def test_incremental_derivatives_reused():
+    f, x, y, z = make_graph()
+    inc = f.incremental()
+    feed = {x: 0.5, y: 1.5, z: -0.3}
+    inc.d(feed)
+    # Changing z leaves Sin(x * y) and its derivatives alone
+    feed[z] = 0.7
+    inc.d(feed)
+    assert inc.recomputed == 5
+
+
+def test_incremental_in_place_and_reset():
+    x = ad.Variable('x')
+    inc = (ad.Sin(x) * 2.0).incremental()
+    vals = np.array([0.0, 1.0])
+    assert np.allclose(inc.eval({x: vals}), 2 * np.sin(vals))
+    # Changing the array in place is seen as a change
+    vals[0] = 2.0
+    assert np.allclose(inc.eval({x: vals}), 2 * np.sin(vals))
+    assert inc.recomputed == 2
+    inc.reset()
+    assert inc.info() == ad.IncrementalInfo(0, 0, 0, len(inc.nodes))
+    assert np.allclose(inc.eval({'x': vals}), 2 * np.sin(vals))
+    assert inc.recomputed == 2
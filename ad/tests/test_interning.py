@@ -0,0 +1,76 @@
+"""Tests for interning of structurally identical nodes"""
+import gc
+import ad
+import pytest
+import numpy as np
+
+
+def test_interning_shares_nodes():
+    x, y = ad.Variable('x'), ad.Variable('y')
+    with ad.interning():
+        assert ad.Sin(x) is ad.Sin(x)
+        assert x * y + 2.0 is x * y + 2.0
+        assert ad.Constant(2.0) is ad.Constant(2.0)
+        # Different ops, children, order or constant types stay apart
+        assert ad.Sin(x) is not ad.Cos(x)
+        assert ad.Sin(x) is not ad.Sin(y)
+        assert x - y is not y - x
+        assert ad.Constant(2) is not ad.Constant(2.0)
+        # Variables are never merged
+        assert ad.Variable('x') is not x
+    assert ad.Sin(x) is not ad.Sin(x)
+
+
+def test_interning_arrays_not_shared():
+    with ad.interning():
+        a = ad.Constant(np.array([1.0, 2.0]))
+        assert ad.Constant(np.array([1.0, 2.0])) is not a
+
+
+def test_interning_d_expr():
+    x = ad.Variable('x')
+    with ad.interning():
+        f = ad.Tan(ad.Sin(x))
+        df = f.d_expr()
+        assert f.d_expr() is df
+    assert np.isclose(df.eval({x: 0.3}), f.d({x: 0.3}))
+
+
+def test_interning_same_results():
+    x, y = ad.Variable('x'), ad.Variable('y')
+
+    def build():
+        return ad.Exp(x * y) * ad.Exp(x * y) + ad.Log(x * y) / (x * y)
+
+    feed = {x: 1.5, y: 0.5}
+    f = build()
+    with ad.interning():
+        g = build()
+    assert len(g.compile()) < len(f.compile())
+    assert np.isclose(f.eval(feed), g.eval(feed))
+    assert np.allclose(f.gradient(feed, [x, y]), g.gradient(feed, [x, y]))
+    assert np.allclose(f.hessian(feed, [x, y]), g.hessian(feed, [x, y]))
+
+
+def test_interning_weak_references():
+    x = ad.Variable('x')
+    with ad.interning():
+        table = ad.ad._intern_table
+        node = ad.Sinh(x)
+        size = len(table)
+        del node
+        gc.collect()
+        assert len(table) < size
+
+
+def test_interning_signed_zero():
+    x = ad.Variable('x')
+    with ad.interning():
+        neg, pos = ad.Constant(-0.0), ad.Constant(0.0)
+        assert neg is not pos
+        assert ad.Constant(-0.0) is neg
+        assert np.copysign(1.0, neg.val) == -1.0
+        with np.errstate(divide='ignore'):
+            assert (x / neg).eval({x: np.float64(1.0)}) == -np.inf
+            assert (x / pos).eval({x: np.float64(1.0)}) == np.inf
+        assert ad.Constant(0) is ad.Constant(0)
@@ -0,0 +1,59 @@
+"""Tests for jacobian-vector products"""
+import ad
+import pytest
+import numpy as np
+
+
+def test_jvp_matches_gradient():
+    x, y, z = ad.Variable('x'), ad.Variable('y'), ad.Variable('z')
+    f = ad.Sinh(ad.Exp(x - 3.0) * y) + ad.Log(y + x ** 2) * z * ad.Sin(x) + \
+        x * x / y - ad.Tan(z) * ad.Cos(x)
+    feed = {x: 1.0, y: 3.0, z: 5.0}
+    g = f.gradient(feed, [x, y, z])
+    assert np.isclose(f.jvp(feed, {x: 0.5, y: -1.0, z: 2.0}),
+                      g.dot([0.5, -1.0, 2.0]))
+    # Missing variables have no tangent
+    assert np.isclose(f.jvp(feed, {y: 1.0}), g[1])
+
+
+def test_jvp_many_directions():
+    x, y = ad.Variable('x'), ad.Variable('y')
+    f = x ** 3 * y + ad.Exp(x * y)
+    feed = {x: 0.5, y: -0.5}
+    g = f.gradient(feed, [x, y])
+    v = np.arange(6.0).reshape(2, 3)
+    res = f.jvp(feed, v, wrt=[x, y])
+    assert res.shape == (3,)
+    assert np.allclose(res, g.dot(v))
+    res = f.jvp(feed, {x: v[0], y: v[1]})
+    assert np.allclose(res, g.dot(v))
+
+
+def test_jvp_batch():
+    x, y = ad.Variable('x'), ad.Variable('y')
+    f = ad.Sin(x) * y
+    feed = {x: np.array([0.0, 1.0, 2.0, 3.0]), y: 2.0}
+    g = f.gradient(feed, [x, y])
+    assert np.allclose(f.jvp(feed, {x: 1.0, y: 1.0}), g.sum(axis=1))
+    v = np.array([[1.0, 0.0], [0.0, 1.0]])
+    res = f.jvp(feed, v, wrt=[x, y])
+    assert res.shape == (4, 2)
+    assert np.allclose(res, g)
+
+
+def test_jvp_constant():
+    x = ad.Variable('x')
+    f = ad.Constant(2.0) * 3.0
+    assert f.jvp({x: 1.0}, {x: 1.0}) == 0
+    assert np.allclose(f.jvp({x: 1.0}, [[1.0, 2.0]], wrt=[x]), [0.0, 0.0])
+
+
+def test_jvp_returns_numbers():
+    x, y = ad.Variable('x'), ad.Variable('y')
+    feed = {x: 2.0, y: 3.0}
+    cases = [(x, 1.0), (x * 1, 1.0), (y, 0.0), (ad.Constant(2.0), 0.0)]
+    for f, expected in cases:
+        res = f.jvp(feed, {x: 1.0})
+        assert type(res) is float and res == expected
+    assert type((x * y).jvp(feed, [1.0, 0.0], wrt=[x, y])) is float
+    assert np.shape(x.jvp(feed, {x: [1.0, 2.0]})) == (2,)
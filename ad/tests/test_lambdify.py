@@ -0,0 +1,73 @@
+"""Tests for the functions generated by lambdify"""
+import ad
+import pytest
+import numpy as np
+
+
+def make_graph():
+    x, y = ad.Variable('x'), ad.Variable('y')
+    f = ad.Sin(x * y) ** 2 + x / y - ad.Exp(-x) + ad.Log(y) * ad.Cos(x)
+    f = f + ad.Tan(x) * ad.Tanh(y) - ad.Sinh(x) / ad.Cosh(y)
+    f = f + ad.Arcsin(x / 2) + ad.Arccos(y / 4) * ad.Arctan(x * x)
+    f = f + y ** x + ad.Sqrt(y) + ad.Logistic(x) - 3.0
+    return f, x, y
+
+
+def test_value_gradient_hessian():
+    f, x, y = make_graph()
+    feed = {x: 0.3, y: 1.2}
+    value, grad, hess = f.value_grad_hessian(feed, [x, y])
+    g0 = ad.lambdify(f, [x, y])
+    g1 = ad.lambdify(f, [x, y], derivatives=1)
+    g2 = f.lambdify([x, y], derivatives=2)
+    assert np.isclose(g0(0.3, 1.2), value)
+    res = g1(0.3, 1.2)
+    assert np.isclose(res[0], value)
+    assert np.allclose(res[1], grad)
+    res = g2(0.3, 1.2)
+    assert np.isclose(res[0], value)
+    assert np.allclose(res[1], grad)
+    assert np.allclose(res[2], hess)
+
+
+def test_batches():
+    f, x, y = make_graph()
+    xs = np.linspace(0.1, 0.5, 5)
+    g = f.lambdify([x, y], derivatives=2)
+    value, grad, hess = g(xs, 1.2)
+    assert value.shape == (5,)
+    assert grad.shape == (5, 2)
+    assert hess.shape == (5, 2, 2)
+    value2, grad2, hess2 = f.value_grad_hessian({x: xs, y: 1.2}, [x, y])
+    assert np.allclose(value, value2)
+    assert np.allclose(grad, grad2)
+    assert np.allclose(hess, hess2)
+
+
+def test_constants_and_unused_args():
+    x, y, z = ad.Variable('x'), ad.Variable('y'), ad.Variable('z')
+    vals = np.array([1.0, 2.0, 3.0])
+    g = (x * vals + 2.0).lambdify([x, z])
+    assert np.allclose(g(2.0, 5.0), [4.0, 6.0, 8.0])
+    g = (x * np.float32(3.0) + 2.0).lambdify([x, z], derivatives=2)
+    value, grad, hess = g(2.0, 5.0)
+    assert np.isclose(value, 8.0)
+    assert np.allclose(grad, [3.0, 0.0])
+    assert np.allclose(hess, 0.0)
+    # A variable alone and a constant alone
+    value, grad, hess = ad.lambdify(x, [x], 2)(3.0)
+    assert value == 3.0 and np.allclose(grad, [1.0]) and hess.shape == (1, 1)
+    value, grad = ad.lambdify(ad.Constant(2.0) * 3.0, [x], 1)(1.0)
+    assert value == 6.0 and np.allclose(grad, [0.0])
+    with pytest.raises(ValueError):
+        ad.lambdify(x * y, [x])
+    with pytest.raises(ValueError):
+        ad.lambdify(x, [x], derivatives=3)
+
+
+def test_cached():
+    f, x, y = make_graph()
+    assert f.lambdify([x, y], 1) is f.lambdify([x, y], 1)
+    assert f.lambdify([x, y], 1) is not f.lambdify([y, x], 1)
+    value, grad = f.lambdify([y, x], 1)(1.2, 0.3)
+    assert np.allclose(grad[::-1], f.gradient({x: 0.3, y: 1.2}, [x, y]))
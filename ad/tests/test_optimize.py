@@ -0,0 +1,55 @@
+"""Tests for the quasi-Newton minimizers"""
+import ad
+import pytest
+import numpy as np
+
+
+def rosenbrock(n):
+    xs = [ad.Variable('x%d' % i) for i in range(n)]
+    f = 0
+    for i in range(n - 1):
+        f = f + (1 - xs[i]) ** 2 + 100 * (xs[i + 1] - xs[i] * xs[i]) ** 2
+    return f, xs
+
+
+@pytest.mark.parametrize('method', [ad.bfgs, ad.lbfgs])
+def test_rosenbrock(method):
+    f, xs = rosenbrock(6)
+    res = method(f, np.zeros(6), wrt=xs)
+    assert res.converged
+    assert np.allclose(res.x, 1.0, atol=1e-5)
+    assert np.isclose(res.fun, 0.0, atol=1e-10)
+    assert np.max(np.abs(res.grad)) <= 1e-6
+    assert res.iterations > 0
+    assert res.function_evals == res.gradient_evals
+    assert res.function_evals >= res.iterations
+    assert res.wall_time > 0
+
+
+@pytest.mark.parametrize('method', [ad.bfgs, ad.lbfgs])
+def test_quadratic_dict(method):
+    x, y = ad.Variable('x'), ad.Variable('y')
+    f = 3 * (x - 1) ** 2 + (y + 2) ** 2 + x * y
+    res = method(f, {x: 5.0, y: 5.0})
+    # Minimum of the quadratic from its linear system
+    expected = np.linalg.solve([[6.0, 1.0], [1.0, 2.0]], [6.0, -4.0])
+    assert res.converged
+    assert set(res.x) == {x, y}
+    assert np.isclose(res.x[x], expected[0])
+    assert np.isclose(res.x[y], expected[1])
+
+
+def test_domain_and_limits():
+    x = ad.Variable('x')
+    # The first trial steps land where the log is not defined
+    f = x - 10 * ad.Log(x)
+    res = ad.bfgs(f, {x: 0.5})
+    assert res.converged and np.isclose(res.x[x], 10.0)
+    f, xs = rosenbrock(4)
+    res = ad.lbfgs(f, np.zeros(4), wrt=xs, max_iter=3)
+    assert not res.converged and res.iterations == 3
+    assert res.message == 'Maximum number of iterations reached'
+    with pytest.raises(ValueError):
+        ad.bfgs(f, np.zeros(4))
+    with pytest.raises(ValueError):
+        ad.bfgs(f, np.zeros(3), wrt=xs)
@@ -0,0 +1,85 @@
+"""Tests for mixed higher-order partial derivatives"""
+import ad
+import pytest
+import numpy as np
+
+
+def test_partials_polynomial():
+    x, y = ad.Variable('x'), ad.Variable('y')
+    f = x ** 2 * y ** 3 + ad.Sin(x * y)
+    a, b = 0.7, 1.3
+    res = f.partials({x: a, y: b}, order=4, wrt=[x, y])
+    assert len(res) == 15
+    s, c = np.sin(a * b), np.cos(a * b)
+    assert np.isclose(res[(0, 0)], a ** 2 * b ** 3 + s)
+    assert np.isclose(res[(1, 0)], 2 * a * b ** 3 + b * c)
+    assert np.isclose(res[(1, 1)], 6 * a * b ** 2 + c - a * b * s)
+    assert np.isclose(res[(3, 0)], - b ** 3 * c)
+    assert np.isclose(res[(2, 2)], 12 * b - 2 * s - 4 * a * b * c +
+                      a * a * b * b * s)
+    assert np.isclose(res[(0, 4)], a ** 4 * s)
+
+
+def test_partials_match_gradient_and_hessian():
+    x, y, z = ad.Variable('x'), ad.Variable('y'), ad.Variable('z')
+    f = ad.Exp(x * y) / (1 + z * z) + ad.Log(x + 2) * ad.Cos(z)
+    feed = {x: 0.3, y: -0.5, z: 0.8}
+    wrt = [x, y, z]
+    value, grad, hess = f.partials(feed, order=2, wrt=wrt, dense=True)
+    assert np.isclose(value, f.eval(feed))
+    assert np.allclose(grad, f.gradient(feed, wrt))
+    assert np.allclose(hess, f.hessian(feed, wrt))
+
+
+def test_partials_third_order_tensor():
+    x, y = ad.Variable('x'), ad.Variable('y')
+    f = x * x * x * y + ad.Exp(y) * x
+    tensors = f.partials({x: 1.5, y: 0.5}, order=3, wrt=[x, y], dense=True)
+    t3 = tensors[3]
+    assert t3.shape == (2, 2, 2)
+    assert np.isclose(t3[0, 0, 0], 6 * 0.5)
+    assert np.isclose(t3[0, 0, 1], 6 * 1.5)
+    assert np.isclose(t3[1, 0, 0], 6 * 1.5)
+    assert np.isclose(t3[0, 1, 1], np.exp(0.5))
+    assert np.isclose(t3[1, 1, 1], 1.5 * np.exp(0.5))
+
+
+def test_partials_batch_and_subset():
+    x, y = ad.Variable('x'), ad.Variable('y')
+    f = ad.Sin(x) * y ** 2
+    xs = np.array([0.1, 0.2, 0.3])
+    res = f.partials({x: xs, y: 2.0}, order=3, wrt=[x])
+    assert res[(3,)].shape == (3,)
+    assert np.allclose(res[(3,)], - np.cos(xs) * 4.0)
+    assert np.allclose(res[(2,)], - np.sin(xs) * 4.0)
+    grad, = f.partials({x: xs, y: 2.0}, order=1, wrt=[x, y],
+                       dense=True)[1:]
+    assert grad.shape == (3, 2)
+    assert np.allclose(grad, f.gradient({x: xs, y: 2.0}, [x, y]))
+
+
+def test_partials_default_variables():
+    x, y = ad.Variable('x'), ad.Variable('y')
+    f = x * y * y
+    res = f.partials({x: 2.0, y: 3.0}, order=3)
+    assert len(res) == 10
+    assert sum(res.values()) == pytest.approx(18 + 9 + 12 + 6 + 4 + 2)
+
+
+def test_partials_reuse_weights():
+    from ad.ad import _interpolation_weights
+    xs = [ad.Variable('x%d' % i) for i in range(5)]
+    f = xs[0]
+    for i in range(1, 5):
+        f = f * ad.Sin(xs[i] + xs[i - 1])
+    feed = {x: 0.1 * (i + 1) for i, x in enumerate(xs)}
+    first = f.partials(feed, order=4, wrt=xs)
+    hits = _interpolation_weights.cache_info().hits
+    second = f.partials(feed, order=4, wrt=xs)
+    assert _interpolation_weights.cache_info().hits == hits + 4
+    assert first.keys() == second.keys()
+    for key in first:
+        assert first[key] == second[key]
+    h = f.hessian(feed, wrt=xs)
+    assert np.isclose(first[(1, 1, 0, 0, 0)], h[0, 1])
+    assert np.isclose(first[(0, 0, 2, 0, 0)], h[2, 2])
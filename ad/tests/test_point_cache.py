@@ -0,0 +1,131 @@
+"""Tests for the cache of results by point"""
+import ad
+import pytest
+import numpy as np
+
+
+class Counting(ad.ad.Unop):
+    """Identity that counts how many times it is evaluated"""
+    calls = 0
+
+    def _op(self, res1):
+        Counting.calls += 1
+        return res1
+
+    def _partials(self, res, res1):
+        return (1.0,)
+
+
+def test_cache_reuses_values():
+    x, y = ad.Variable('x'), ad.Variable('y')
+    f = Counting(x * y) + ad.Sin(x)
+    f.enable_cache(maxsize=2)
+    Counting.calls = 0
+    feed = {x: 1.0, y: 2.0}
+    value = f.eval(feed)
+    grad = f.gradient(feed, [x, y])
+    assert Counting.calls == 1
+    assert f.cache_info() == ad.CacheInfo(hits=1, misses=1, maxsize=2,
+                                          currsize=1)
+    assert np.isclose(value, 2.0 + np.sin(1.0))
+    assert np.allclose(grad, [2.0 + np.cos(1.0), 1.0])
+    # Equal values in a new dictionary are the same point
+    f.eval({x: 1.0, y: 2.0})
+    assert Counting.calls == 1
+
+
+def test_cache_eviction():
+    x = ad.Variable('x')
+    f = Counting(x) * 2.0
+    f.enable_cache(maxsize=2)
+    Counting.calls = 0
+    for val in [1.0, 2.0, 1.0, 3.0, 2.0, 1.0]:
+        assert f.eval({x: val}) == 2 * val
+    # 2.0 is dropped when 3.0 comes in, and then 1.0 when 2.0 comes back
+    assert Counting.calls == 5
+    info = f.cache_info()
+    assert (info.hits, info.misses, info.currsize) == (1, 5, 2)
+    f._point_cache.clear()
+    assert f.cache_info() == (0, 0, 2, 0)
+
+
+def test_cache_eval_d_hessian():
+    x, y = ad.Variable('x'), ad.Variable('y')
+    f = ad.Exp(x * y) + x * x * y
+    expected = (f.eval({x: 0.5, y: 1.5}), f.d({x: 0.5, y: 1.5}),
+                f.hessian({x: 0.5, y: 1.5}))
+    f.enable_cache()
+    for i in range(2):
+        feed = {x: 0.5, y: 1.5}
+        assert f.eval(feed) == expected[0]
+        d = f.d(feed)
+        assert d == expected[1]
+        assert f.d(feed, mode='reverse') == pytest.approx(expected[1])
+        h = f.hessian(feed)
+        assert h == expected[2]
+        assert np.allclose(f.hessian(feed, wrt=[x, y]),
+                           [[h[x][x], h[x][y]], [h[y][x], h[y][y]]])
+        # Changing the results must not change the cache
+        d[x] = None
+        h[x][y] = None
+    assert f.cache_info().misses == 1
+
+
+def test_cache_batch_and_names():
+    x = ad.Variable('x')
+    f = Counting(ad.Sin(x))
+    f.enable_cache()
+    Counting.calls = 0
+    xs = np.linspace(0, 1, 4)
+    assert np.allclose(f.eval({x: xs}), np.sin(xs))
+    assert np.allclose(f.eval({x: xs.copy()}), np.sin(xs))
+    assert Counting.calls == 1
+    # Changing an array in place makes it a different point
+    xs[0] = 5.0
+    assert np.allclose(f.eval({x: xs}), np.sin(xs))
+    assert Counting.calls == 2
+    # Feeding by name is a different key from feeding the variable
+    assert np.allclose(f.eval({'x': xs}), np.sin(xs))
+    assert Counting.calls == 3
+
+
+def test_cache_disabled():
+    x = ad.Variable('x')
+    f = ad.Sin(x)
+    assert f.cache_info() is None
+    f.enable_cache()
+    f.disable_cache()
+    assert f.cache_info() is None
+    with pytest.raises(ValueError):
+        ad.PointCache(0)
+
+
+class CountingPartials(Counting):
+    """Identity that counts how many times its partials are taken"""
+    partial_calls = 0
+
+    def _partials(self, res, res1):
+        CountingPartials.partial_calls += 1
+        return (1.0,)
+
+
+def test_cache_reverse_mode():
+    x, y = ad.Variable('x'), ad.Variable('y')
+    f = CountingPartials(x * y) * ad.Sin(x)
+    expected = f.gradient({x: 1.0, y: 2.0}, [x, y])
+    f.enable_cache()
+    feed = {x: 1.0, y: 2.0}
+    f.value_and_grad(feed)
+    adjoints = f._point_cache.lookup(feed)[3]
+    assert id(x) in adjoints
+    # Every later reverse mode call reuses the adjoints
+    CountingPartials.partial_calls = 0
+    for i in range(2):
+        assert np.allclose(f.gradient(feed, [x, y]), expected)
+        value, grad = f.value_and_grad(feed, [x, y])
+        assert np.allclose(grad, expected)
+        d = f.d(feed, mode='reverse')
+        assert np.allclose([d[x], d[y]], expected)
+        d[x] = None
+    assert CountingPartials.partial_calls == 0
+    assert f._point_cache.lookup(feed)[3] is adjoints
@@ -0,0 +1,65 @@
+"""Tests for the reverse mode gradient, checked against forward mode d()"""
+import ad
+import pytest
+import numpy as np
+
+
+def test_reverse_variable_and_constant():
+    x = ad.Variable('x')
+    c = ad.Constant(5)
+    assert x.d({x: 3.0}, mode='reverse') == 1.0
+    assert c.d({}, mode='reverse') == 0
+
+
+def test_reverse_matches_d_binops():
+    x, y = ad.Variable('x'), ad.Variable('y')
+    f = 3 * x * y - x / y + (x + y) ** 3 - y ** 0.5 + 2 ** x
+    feed = {x: 1.5, y: 2.0}
+    d = f.d(feed)
+    g = f.d(feed, mode='reverse')
+    assert set(g) == set(d)
+    for var in d:
+        assert np.isclose(g[var], d[var])
+
+
+def test_reverse_matches_d_unops():
+    x, y, z = ad.Variable('x'), ad.Variable('y'), ad.Variable('z')
+    f = ad.Sin(x * y) + ad.Cos(z) * ad.Tan(x) - ad.Sinh(y) / ad.Cosh(z) + \
+        ad.Tanh(x * z) + ad.Exp(-y) * ad.Log(z) + ad.Arcsin(x / 4) + \
+        ad.Arccos(y / 4) + ad.Arctan(x * z) + ad.Logistic(y) + ad.Sqrt(z)
+    feed = {x: 0.5, y: 1.5, z: 2.5}
+    d = f.d(feed)
+    g = f.d(feed, mode='reverse')
+    for var in d:
+        assert np.isclose(g[var], d[var])
+
+
+def test_reverse_shared_subexpression():
+    x = ad.Variable('x')
+    s = ad.Sin(x)
+    f = s * s + s
+    assert np.isclose(f.d({x: 0.3}, mode='reverse'), f.d({x: 0.3}))
+
+
+def test_reverse_variable_exponent():
+    x, y = ad.Variable('x'), ad.Variable('y')
+    f = x ** y
+    g = f.d({x: 2.0, y: 3.0}, mode='reverse')
+    assert np.isclose(g[x], 12.0)
+    assert np.isclose(g[y], 8.0 * np.log(2.0))
+
+
+def test_reverse_many_variables():
+    xs = [ad.Variable('x%d' % i) for i in range(50)]
+    f = xs[0] * xs[0]
+    for x in xs[1:]:
+        f = f + x * x
+    g = f.d({x: float(i) for i, x in enumerate(xs)}, mode='reverse')
+    for i, x in enumerate(xs):
+        assert np.isclose(g[x], 2.0 * i)
+
+
+def test_unknown_mode_raises():
+    x = ad.Variable('x')
+    with pytest.raises(ValueError):
+        x.d({x: 1.0}, mode='sideways')
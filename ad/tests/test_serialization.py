@@ -0,0 +1,92 @@
+"""Tests for saving and loading expression graphs"""
+import ad
+import sys
+import pytest
+import numpy as np
+
+
+def test_round_trip(tmp_path):
+    x, y = ad.Variable('x'), ad.Variable('y')
+    f = ad.Sin(x) * y ** 2 - ad.Exp(x / y) + ad.Log(y) - 3 * ad.Arctan(x)
+    f = f + ad.Sqrt(ad.Cosh(x)) - (-ad.Tanh(y))
+    path = str(tmp_path / 'f.adg')
+    ad.save(f, path)
+    g = ad.load(path)
+    assert isinstance(g, ad.Expression)
+    assert len(ad.ad._topological_sort(g)) == len(ad.ad._topological_sort(f))
+    feed = {'x': 0.3, 'y': 1.7}
+    assert np.isclose(g.eval(feed), f.eval(feed))
+    df, dg = f.d(feed), g.d(feed)
+    assert sorted(var.name for var in dg) == ['x', 'y']
+    for var in dg:
+        assert np.isclose(dg[var], df[x if var.name == 'x' else y])
+
+
+def test_constants(tmp_path):
+    x = ad.Variable('x')
+    vals = np.arange(4.0)
+    f = x * vals + vals + np.float32(0.5) + 1
+    path = str(tmp_path / 'f.adg')
+    ad.save(f, path)
+    for mmap_mode in [None, 'r']:
+        g = ad.load(path, mmap_mode=mmap_mode)
+        assert np.allclose(g.eval({'x': 2.0}), f.eval({x: 2.0}))
+        arrays = [node.val for node in ad.ad._topological_sort(g)
+                  if isinstance(node, ad.Constant)]
+        # The array used twice is stored, and loaded, once
+        assert arrays[0] is arrays[1]
+        assert isinstance(arrays[0], np.memmap) == (mmap_mode == 'r')
+        assert isinstance(arrays[2], np.float32)
+        assert type(arrays[3]) is int
+
+
+def test_shared_roots_and_deep_graph(tmp_path):
+    x = ad.Variable('x')
+    shared = x
+    for i in range(20000):
+        shared = shared * 0.5 + 1.0
+    path = str(tmp_path / 'f.adg')
+    ad.save([shared, ad.Sin(shared)], path)
+    g, h = ad.load(path)
+    assert h.expr1 is g
+    assert np.isclose(g.eval({'x': 3.0}), shared.eval({x: 3.0}))
+    assert np.isclose(h.d({'x': 3.0}), ad.Sin(shared).d({x: 3.0}))
+
+
+def test_load_errors(tmp_path):
+    path = tmp_path / 'f.adg'
+    path.write_bytes(b'not a graph')
+    with pytest.raises(ValueError):
+        ad.load(str(path))
+    x = ad.Variable('x')
+    with pytest.raises(TypeError):
+        ad.save(x * np.array([object()]), str(path))
+
+
+def test_load_rejects_other_modules(tmp_path):
+    path = tmp_path / 'f.adg'
+    x = ad.Variable('x')
+    ad.save(ad.Sin(x), str(path))
+    # Same length header, naming an op in a module outside ad
+    op = b'"ad.simple_ops:Sin"'
+    data = path.read_bytes()
+    assert op in data
+    path.write_bytes(data.replace(op, b'"this:Sin"'.ljust(len(op))))
+    with pytest.raises(ValueError):
+        ad.load(str(path))
+    assert 'this' not in sys.modules
+
+
+def test_pickle_and_copy():
+    import copy
+    import pickle
+    x, y = ad.Variable('x'), ad.Variable('y')
+    f = ad.Sin(x) * y + 3.0
+    for g in [pickle.loads(pickle.dumps(f)), copy.deepcopy(f)]:
+        # The copies of x and y are new variables with their own indices
+        assert sorted(var.name for var in g.dep_vars) == ['x', 'y']
+        assert not g.dep_vars & f.dep_vars
+        feed = {'x': 1.0, 'y': 2.0}
+        assert np.isclose(g.eval(feed), f.eval(feed))
+        assert np.allclose(g.gradient(feed, sorted(g.dep_vars, key=str)),
+                           f.gradient(feed, [x, y]))
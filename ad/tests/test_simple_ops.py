@@ -131,7 +131,7 @@ def test_logb():
 def test_power_base0():
     a = ad.Variable('a')
     c = a ** 2
-    assert np.isclose(0, c.d_n(2, 0))
+    assert np.isclose(2, c.d_n(2, 0))
     assert np.isclose(0, c.d_n(4, 0))
 
     d = a ** (-1)
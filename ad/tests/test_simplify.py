@@ -0,0 +1,77 @@
+"""Tests for algebraic simplification"""
+import ad
+import pytest
+import numpy as np
+
+
+def test_simplify_identities():
+    x = ad.Variable('x')
+    assert ad.simplify(x * 1.0 + 0.0) is x
+    assert ad.simplify(x - 0.0) is x
+    assert ad.simplify(- (- x)) is x
+    assert ad.simplify(x ** 1) is x
+    zero = ad.simplify(ad.Sin(x) * 0.0 + (x - x))
+    assert isinstance(zero, ad.Constant)
+    assert zero.val == 0
+    one = ad.simplify(ad.Exp(x) ** 0)
+    assert isinstance(one, ad.Constant)
+    assert one.val == 1
+
+
+def test_simplify_constant_folding():
+    x = ad.Variable('x')
+    f = ad.simplify(ad.Sin(ad.Constant(0.5)) * ad.Exp(ad.Constant(2.0)) + x)
+    assert ad.node_count(f) == 3
+    assert np.isclose(f.eval({x: 1.0}), np.sin(0.5) * np.exp(2.0) + 1.0)
+
+
+def test_simplify_like_terms():
+    x, y = ad.Variable('x'), ad.Variable('y')
+    f = 2 * ad.Sin(x * y) + ad.Sin(x * y) * 3 - ad.Sin(x * y) / 5
+    g, before, after = ad.simplify(f, return_counts=True)
+    assert after < before
+    # 4.8 * sin(x * y)
+    assert after == 6
+    feed = {x: 0.3, y: 1.7}
+    assert np.isclose(f.eval(feed), g.eval(feed))
+
+
+def test_simplify_repeated_factors():
+    x, y = ad.Variable('x'), ad.Variable('y')
+    g = ad.simplify(x * x * x * x)
+    assert isinstance(g, ad.ad.Power)
+    assert g.expr1 is x and g.expr2.val == 4
+    f = ad.Exp(y) * x * ad.Exp(y) * (-x) * 2.0
+    g = ad.simplify(f)
+    feed = {x: 0.3, y: 1.7}
+    assert np.isclose(f.eval(feed), g.eval(feed))
+    assert np.allclose(f.gradient(feed, [x, y]), g.gradient(feed, [x, y]))
+
+
+def test_simplify_batch():
+    x, y = ad.Variable('x'), ad.Variable('y')
+    f = (x + y) * (x + y) + ad.Log(y) * 0 + x / 2.0 + x / 2.0
+    g = ad.simplify(f)
+    feed = {x: np.linspace(0.1, 1.0, 5), y: 2.0}
+    assert np.allclose(f.eval(feed), g.eval(feed))
+
+
+def test_d_expr_simplified():
+    x = ad.Variable("x")
+    y = - 12 * ad.Cos(x ** 2) + 8 * (x ** 3) * ad.Sin(x ** 2)
+    for n in range(1, 6):
+        plain, simple = y.d_expr(n), y.d_expr(n, simplify=True)
+        assert ad.node_count(simple) < ad.node_count(plain)
+        assert np.isclose(plain.eval({x: 2.0}), simple.eval({x: 2.0}))
+    yd8 = y.d_expr(8, simplify=True)
+    assert ad.node_count(yd8) < 200
+    assert np.isclose(y.d_n(8, 2.0), yd8.eval({x: 2.0}))
+
+
+def test_d_expr_chain_rule_power():
+    x = ad.Variable("x")
+    f = ad.Sin(x) ** 2
+    assert np.isclose(f.d_expr().eval({x: 0.7}), np.sin(2 * 0.7))
+    f = 2.0 ** ad.Sin(x)
+    assert np.isclose(f.d_expr().eval({x: 0.7}),
+                      np.log(2) * 2 ** np.sin(0.7) * np.cos(0.7))
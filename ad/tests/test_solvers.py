@@ -0,0 +1,126 @@
+"""Tests for the Newton solver for systems of equations"""
+import ad
+import pytest
+import numpy as np
+
+
+def bratu(n):
+    xs = [ad.Variable('u%d' % i) for i in range(n)]
+    h = 1.0 / (n + 1)
+    eqs = []
+    for i in range(n):
+        eq = 2 * xs[i]
+        if i > 0:
+            eq = eq - xs[i - 1]
+        if i < n - 1:
+            eq = eq - xs[i + 1]
+        eqs.append(eq - h * h * ad.Exp(xs[i]))
+    return eqs, xs
+
+
+def test_small_system():
+    x, y = ad.Variable('x'), ad.Variable('y')
+    eqs = [x * x + y * y - 4, ad.Exp(x) + y - 1]
+    for method in ['newton', 'chord']:
+        res = ad.solve(eqs, [x, y], {x: 1.0, y: -1.0}, method=method)
+        assert res.converged
+        assert isinstance(res.x, dict)
+        feed = {x: res.x[x], y: res.x[y]}
+        assert np.isclose(eqs[0].eval(feed), 0.0)
+        assert np.isclose(eqs[1].eval(feed), 0.0)
+        assert np.allclose(res.fun, 0.0)
+
+
+def test_chord_reuses_factorization():
+    eqs, xs = bratu(50)
+    newton = ad.solve(eqs, xs, np.zeros(50))
+    chord = ad.solve(eqs, xs, np.zeros(50), method='chord')
+    assert newton.converged and chord.converged
+    assert np.allclose(newton.x, chord.x)
+    assert newton.factorizations == newton.iterations
+    assert chord.factorizations < chord.iterations
+    assert chord.jacobian_evals == chord.factorizations
+
+
+def test_chord_refreshes_when_slow():
+    x = ad.Variable('x')
+    # The jacobian at the start is a poor guide, the chord iterations must
+    # refactor to converge
+    res = ad.solve([x ** 3 - 8], [x], [10.0], method='chord', reuse=100)
+    assert res.converged
+    assert np.isclose(res.x[0], 2.0)
+    assert res.factorizations > 1
+
+
+def test_chord_rejects_worse_steps():
+    x = ad.Variable('x')
+    # The jacobian at 1.5 is nearly flat, so after the first step a second
+    # step with it would overshoot far past the root at -4 * pi
+    first = ad.solve([ad.Sin(x)], [x], [1.5], method='chord', reuse=100,
+                     max_iter=1)
+    second = ad.solve([ad.Sin(x)], [x], [1.5], method='chord', reuse=100,
+                      max_iter=2)
+    assert np.allclose(second.x, first.x)
+    assert np.allclose(second.fun, first.fun)
+    res = ad.solve([ad.Sin(x)], [x], [1.5], method='chord', reuse=100)
+    assert res.converged
+    assert np.isclose(res.x[0], -4 * np.pi)
+    assert res.factorizations == 2
+
+
+def test_lu():
+    from ad.solvers import _lu_factor, _lu_solve
+    rng = np.random.RandomState(0)
+    a = rng.randn(6, 6)
+    b = rng.randn(6)
+    assert np.allclose(_lu_solve(_lu_factor(a), b), np.linalg.solve(a, b))
+    with pytest.raises(np.linalg.LinAlgError):
+        _lu_factor(np.ones((3, 3)))
+
+
+def test_failures():
+    x, y = ad.Variable('x'), ad.Variable('y')
+    for method in ['newton', 'chord']:
+        res = ad.solve([x * y, x * y], [x, y], [1.0, 1.0], method=method)
+        assert not res.converged and res.message == 'Singular jacobian'
+    res = ad.solve([x * x + 1], [x], [2.0], max_iter=10)
+    assert not res.converged and res.iterations == 10
+    with pytest.raises(ValueError):
+        ad.solve([x], [x, y], [1.0, 1.0])
+    with pytest.raises(ValueError):
+        ad.solve([x], [x], [1.0], method='broyden')
+
+
+def test_newton_many_starts():
+    x = ad.Variable('x')
+    f = 2 * x + 3 * ad.Sin(x) + 10 * x ** 3 + 4 * ad.Tanh(x) - 20
+    x0 = np.linspace(-5.0, 5.0, 1001)
+    res = ad.newton(f, x, x0)
+    assert res.x.shape == res.converged.shape == res.iterations.shape == \
+        (1001,)
+    assert res.converged.all()
+    assert np.allclose(res.x, res.x[0])
+    assert np.allclose(f.eval({x: res.x}), res.fun)
+    # Points close to the root need fewer iterations
+    assert res.iterations[np.argmin(np.abs(x0 - res.x[0]))] < \
+        res.iterations.max()
+
+
+def test_newton_params():
+    x, a = ad.Variable('x'), ad.Variable('a')
+    res = ad.newton(x ** 3 - a, x, [[1.0], [2.0]],
+                    params={a: np.arange(1.0, 5.0)})
+    assert res.x.shape == (2, 4)
+    assert res.converged.all()
+    assert np.allclose(res.x, np.cbrt(np.arange(1.0, 5.0)))
+
+
+def test_newton_failures():
+    x = ad.Variable('x')
+    # No real root, a zero derivative at 0, and a start at the root
+    res = ad.newton(x * x + 1, x, [2.0, 0.0], max_iter=10)
+    assert not res.converged.any()
+    assert list(res.iterations) == [10, 0]
+    res = ad.newton(ad.Log(x), x, [1.0, 0.5, 5.0])
+    assert list(res.converged) == [True, True, False]
+    assert res.iterations[0] == 0
@@ -0,0 +1,88 @@
+"""Tests for sparsity patterns and sparse jacobians and hessians"""
+import ad
+import pytest
+import numpy as np
+
+
+def to_dense(rows, cols, vals, shape):
+    ret = np.zeros(shape)
+    ret[rows, cols] = vals
+    return ret
+
+
+def chained_rosenbrock(n):
+    xs = [ad.Variable('x%d' % i) for i in range(n)]
+    f = ad.Constant(0.0)
+    for i in range(n - 1):
+        f = f + 100 * (xs[i + 1] - xs[i] ** 2) ** 2 + (1 - xs[i]) ** 2
+    return f, xs
+
+
+def test_jacobian_sparsity():
+    x, y, z = ad.Variable('x'), ad.Variable('y'), ad.Variable('z')
+    rows, cols = ad.jacobian_sparsity([z * x, y + 1, ad.Constant(2)],
+                                      [x, y, z])
+    assert rows.tolist() == [0, 0, 1]
+    assert cols.tolist() == [0, 2, 1]
+
+
+def test_hessian_sparsity_linear_ops():
+    x, y, z = ad.Variable('x'), ad.Variable('y'), ad.Variable('z')
+    rows, cols = ad.hessian_sparsity(x + y - z + 3 * x - (-y), [x, y, z])
+    assert len(rows) == 0 and len(cols) == 0
+    rows, cols = ad.hessian_sparsity(x * y + z / 2, [x, y, z])
+    assert list(zip(rows, cols)) == [(0, 1), (1, 0)]
+    rows, cols = ad.hessian_sparsity(x / y, [x, y, z])
+    assert list(zip(rows, cols)) == [(0, 1), (1, 0), (1, 1)]
+
+
+def test_hessian_sparsity_banded():
+    f, xs = chained_rosenbrock(10)
+    rows, cols = ad.hessian_sparsity(f, xs)
+    assert np.all(np.abs(rows - cols) <= 1)
+    assert len(rows) == 10 + 2 * 9
+
+
+def test_sparse_jacobian():
+    x, y, z = ad.Variable('x'), ad.Variable('y'), ad.Variable('z')
+    exprs = [ad.Sin(x * y), y * z + z, ad.Exp(z)]
+    feed = {x: 0.5, y: 2.0, z: -1.0}
+    rows, cols, vals = ad.jacobian(exprs, feed, [x, y, z], sparse=True)
+    dense = ad.jacobian(exprs, feed, [x, y, z])
+    assert len(vals) == 5
+    assert np.allclose(to_dense(rows, cols, vals, (3, 3)), dense)
+
+
+def test_sparse_hessian():
+    f, xs = chained_rosenbrock(8)
+    feed = {x: 0.3 * i - 1 for i, x in enumerate(xs)}
+    rows, cols, vals = f.hessian(feed, wrt=xs, sparse=True)
+    assert np.allclose(to_dense(rows, cols, vals, (8, 8)),
+                       f.hessian(feed, wrt=xs))
+
+
+def test_sparse_hessian_all_ops():
+    x, y, z = ad.Variable(), ad.Variable(), ad.Variable()
+    f = ad.Sinh(ad.Exp(x - 3.0) * y) + ad.Log(y + x ** 2) * z * ad.Sin(x) + \
+        x * x / y - ad.Tan(z) * ad.Cos(x) + ad.Tanh(y) ** z - \
+        ad.Arctan(x * z) + ad.Arcsin(y / 4) * ad.Arccos(z / 6)
+    feed = {x: 1.0, y: 3.0, z: 5.0}
+    rows, cols, vals = f.hessian(feed, wrt=[x, y, z], sparse=True)
+    assert np.allclose(to_dense(rows, cols, vals, (3, 3)),
+                       f.hessian(feed, wrt=[x, y, z]))
+
+
+def test_sparse_hessian_batch():
+    x, y = ad.Variable('x'), ad.Variable('y')
+    f = x * x * y + ad.Sin(y)
+    xs, ys = np.arange(3.0), np.ones(3)
+    rows, cols, vals = f.hessian({x: xs, y: ys}, wrt=[x, y], sparse=True)
+    dense = f.hessian({x: xs, y: ys}, wrt=[x, y])
+    assert vals.shape == (3, len(rows))
+    assert np.allclose(vals, dense[:, rows, cols])
+
+
+def test_sparse_hessian_needs_wrt():
+    x = ad.Variable('x')
+    with pytest.raises(ValueError):
+        (x * x).hessian({x: 1.0}, sparse=True)
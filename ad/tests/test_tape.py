@@ -0,0 +1,97 @@
+"""Tests for compiling expressions into tapes"""
+import ad
+import pytest
+import numpy as np
+
+
+def test_tape_eval():
+    x, y = ad.Variable('x'), ad.Variable('y')
+    f = x * ad.Sin(y) + x ** 2 / y
+    tape = f.compile()
+    for feed in [{x: 1.0, y: 2.0}, {x: -3.0, y: 0.5}, {'x': 2.0, 'y': 4.0}]:
+        assert np.isclose(tape.eval(feed), f.eval(feed))
+
+
+def test_tape_constant_and_variable():
+    x = ad.Variable('x')
+    assert ad.Constant(3.0).compile().eval({}) == 3.0
+    assert ad.Constant(3.0).compile().grad({}) == 0
+    assert x.compile().eval({x: 2.0}) == 2.0
+    assert x.compile().grad({x: 2.0}) == 1.0
+    assert x.compile().hessian({x: 2.0}) == 0
+
+
+def test_tape_unbound_variable_raises():
+    x = ad.Variable('x')
+    with pytest.raises(ValueError):
+        (x + 1).compile().eval({})
+
+
+def test_tape_grad_matches_d():
+    x, y, z = ad.Variable('x'), ad.Variable('y'), ad.Variable('z')
+    f = ad.Sinh(ad.Exp(x - 3.0) * y) + ad.Log(y + x ** 2) * z * ad.Sin(x) + \
+        ad.Tan(z / 10) - ad.Cos(x) * ad.Tanh(y) + ad.Arctan(x * y)
+    tape = f.compile()
+    feed = {x: 1, y: 3, z: 5}
+    d = f.d(feed)
+    g = tape.grad(feed)
+    for var in d:
+        assert np.isclose(g[var], d[var])
+
+
+def test_tape_hessian_matches_hessian():
+    x, y, z = ad.Variable(), ad.Variable(), ad.Variable()
+    f = ad.Sinh(x * y) + (x + y) * (z ** 2) * ad.Cosh(z * ad.Tanh(1 / z)) - \
+        ad.Log(z) / ad.Exp(x) + ad.Tan(x / y)
+    tape = f.compile()
+    feed = {x: 1, y: 2, z: 3}
+    h = f.hessian(feed)
+    t = tape.hessian(feed)
+    for var1 in h:
+        for var2 in h:
+            assert np.isclose(t[var1][var2], h[var1][var2])
+
+
+def test_tape_hessian_batch():
+    x, y = ad.Variable('x'), ad.Variable('y')
+    f = x * x * y + ad.Sin(y)
+    tape = f.compile()
+    # As many points as variables, and more
+    for n in [2, 3]:
+        feed = {x: np.arange(1.0, n + 1), y: np.arange(3.0, n + 3)}
+        h = f.hessian(feed, wrt=[x, y])
+        t = tape.hessian(feed)
+        for i, var1 in enumerate([x, y]):
+            for j, var2 in enumerate([x, y]):
+                assert np.shape(t[var1][var2]) == (n,)
+                assert np.allclose(t[var1][var2], h[:, i, j])
+    h = (x * 2).compile().hessian({x: np.array([1.0, 2.0])})
+    assert np.allclose(h, [0.0, 0.0])
+
+
+def test_tape_hessian_variable_exponent():
+    x, y = ad.Variable('x'), ad.Variable('y')
+    h = (x ** y).compile().hessian({x: 2.0, y: 3.0})
+    assert np.isclose(h[x][x], 6 * 2.0)
+    assert np.isclose(h[x][y], 4.0 * (1 + 3 * np.log(2.0)))
+    assert np.isclose(h[y][x], h[x][y])
+    assert np.isclose(h[y][y], 8.0 * np.log(2.0) ** 2)
+
+
+def test_tape_hessian_inverse_trig():
+    x = ad.Variable('x')
+    tape = (ad.Arcsin(x) + ad.Arccos(x / 2) + ad.Arctan(x)).compile()
+    h = tape.hessian({x: 0.5})
+    expected = 0.5 / 0.75 ** 1.5 - 0.0625 / (1 - 0.0625) ** 1.5 - \
+               1.0 / 1.25 ** 2
+    assert np.isclose(h, expected)
+
+
+def test_tape_reuse():
+    x = ad.Variable('x')
+    f = ad.Sin(x) * ad.Sin(x)
+    tape = f.compile()
+    for val in np.linspace(-2, 2, 5):
+        assert np.isclose(tape.eval({x: val}), np.sin(val) ** 2)
+        assert np.isclose(tape.grad({x: val}), 2 * np.sin(val) * np.cos(val))
+        assert np.isclose(tape.hessian({x: val}), 2 * np.cos(2 * val))
@@ -0,0 +1,122 @@
+"""Tests for the Taylor coefficient engine"""
+import ad
+import pytest
+import numpy as np
+from math import factorial
+
+
+def _check_against_d_expr(f, val, n):
+    # Symbolic derivatives one order at a time as a reference
+    expected = []
+    di = f
+    x = list(f.dep_vars)[0]
+    for k in range(n + 1):
+        expected.append(di.eval({x: val}))
+        di = di._d_expr(x)
+    assert np.allclose(f.derivatives(val, n), expected)
+
+
+def test_taylor_exp():
+    x = ad.Variable('x')
+    coeffs = ad.Exp(x).taylor(0.0, 6)
+    assert np.allclose(coeffs, [1.0 / factorial(k) for k in range(7)])
+
+
+def test_taylor_all_ops():
+    x = ad.Variable('x')
+    ops = [ad.Sin, ad.Cos, ad.Exp, ad.Log, ad.Sinh, ad.Cosh]
+    for op in ops:
+        _check_against_d_expr(op(x * x + 0.5), 0.3, 5)
+    _check_against_d_expr(ad.Sqrt(x * x + 1), 0.7, 5)
+    _check_against_d_expr(x / (x * x + 1) - x ** 3, 0.7, 5)
+
+
+def test_taylor_tan_tanh():
+    x = ad.Variable('x')
+    # tan(x) = x + x^3 / 3 + 2 x^5 / 15
+    assert np.allclose(ad.Tan(x).taylor(0.0, 5),
+                       [0, 1, 0, 1.0 / 3, 0, 2.0 / 15])
+    # tanh(x) = x - x^3 / 3 + 2 x^5 / 15
+    assert np.allclose(ad.Tanh(x).taylor(0.0, 5),
+                       [0, 1, 0, -1.0 / 3, 0, 2.0 / 15])
+    f = ad.Tan(ad.Sin(x))
+    h = 1e-3
+    fd = (f.eval({x: 0.4 + h}) - 2 * f.eval({x: 0.4}) +
+          f.eval({x: 0.4 - h})) / h ** 2
+    assert np.isclose(f.d_n(2, 0.4), fd, rtol=1e-5)
+
+
+def test_taylor_inverse_trig():
+    x = ad.Variable('x')
+    # arcsin(x) = x + x^3 / 6 + 3 x^5 / 40
+    assert np.allclose(ad.Arcsin(x).taylor(0.0, 5),
+                       [0, 1, 0, 1.0 / 6, 0, 3.0 / 40])
+    assert np.allclose(ad.Arccos(x).taylor(0.0, 5),
+                       [np.pi / 2, -1, 0, -1.0 / 6, 0, -3.0 / 40])
+    # arctan(x) = x - x^3 / 3 + x^5 / 5
+    assert np.allclose(ad.Arctan(x).taylor(0.0, 5),
+                       [0, 1, 0, -1.0 / 3, 0, 1.0 / 5])
+    val = 0.3
+    assert np.isclose(ad.Arcsin(x).d_n(2, val), val / (1 - val ** 2) ** 1.5)
+    assert np.isclose(ad.Arctan(2 * x).d_n(1, val), 2 / (1 + 4 * val ** 2))
+
+
+def test_taylor_variable_exponent():
+    x = ad.Variable('x')
+    f = x ** x
+    val = 1.5
+    g = np.log(val) + 1
+    assert np.isclose(f.d_n(1, val), val ** val * g)
+    assert np.isclose(f.d_n(2, val), val ** val * (g * g + 1 / val))
+    f = 2.0 ** ad.Sin(x)
+    _check_against_d_expr(f, 0.3, 4)
+
+
+def test_taylor_power():
+    x = ad.Variable('x')
+    _check_against_d_expr(x ** 2.5, 1.3, 4)
+    _check_against_d_expr((x + 1) ** -1, 1.3, 4)
+    assert np.allclose((x ** 3).derivatives(0.0, 4), [0, 0, 0, 6, 0])
+    # Derivatives below the exponent vanish at a base of 0
+    assert np.allclose((x ** 3.5).derivatives(0.0, 3), 0.0)
+
+
+def test_taylor_batch():
+    x = ad.Variable('x')
+    f = ad.Sin(x) * ad.Exp(x) + ad.Tan(x) ** 2
+    vals = np.linspace(-0.5, 0.5, 7)
+    coeffs = f.taylor(vals, 4)
+    assert coeffs.shape == (7, 5)
+    for i, val in enumerate(vals):
+        assert np.allclose(coeffs[i], f.taylor(val, 4))
+    assert np.allclose(f.d_n(3, vals), [f.d_n(3, val) for val in vals])
+    # Constant subexpressions broadcast against the points
+    g = x * 0.0 + ad.Constant(2.0)
+    assert np.allclose(g.taylor(vals, 2), [[2.0, 0.0, 0.0]] * 7)
+
+
+def test_taylor_unbound_variable():
+    x, y = ad.Variable('x'), ad.Variable('y')
+    with pytest.raises(ValueError):
+        (x * y).taylor(1.0, 2)
+
+
+def test_d_n_low_orders():
+    x, y = ad.Variable('x'), ad.Variable('y')
+    f = ad.Sin(x) * ad.Exp(x) + x ** 3
+    vals = np.linspace(-0.5, 0.5, 5)
+    for n in range(4):
+        # Orders up to 2 come from eval, d and hessian instead
+        res = f.d_n(n, 0.3)
+        assert type(res) is float
+        assert np.isclose(res, f.derivatives(0.3, n)[n])
+        assert np.allclose(f.d_n(n, vals), f.derivatives(vals, n)[:, n])
+    assert type(x.d_n(1, 2.0)) is float and x.d_n(1, 2.0) == 1.0
+    # No forward mode hessian for a variable exponent, and a singularity
+    g = x ** x
+    assert np.isclose(g.d_n(2, 1.5), g.derivatives(1.5, 2)[2])
+    with pytest.raises(ZeroDivisionError):
+        (x ** 0.5).d_n(1, 0.0)
+    assert (x ** 2).d_n(2, 0.0) == 2.0
+    with pytest.raises(ValueError):
+        (x * y).d_n(1, 1.0)
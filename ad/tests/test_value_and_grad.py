@@ -0,0 +1,76 @@
+"""Tests for the combined value and derivative APIs"""
+import ad
+import pytest
+import numpy as np
+
+
+def test_value_and_grad_dict():
+    x, y = ad.Variable('x'), ad.Variable('y')
+    f = ad.Exp(x * y) + ad.Sin(x) * y
+    feed = {x: 0.5, y: 1.5}
+    value, grad = f.value_and_grad(feed)
+    assert np.isclose(value, f.eval(feed))
+    expected = f.d(feed)
+    assert grad.keys() == expected.keys()
+    for var in grad:
+        assert np.isclose(grad[var], expected[var])
+
+
+def test_value_and_grad_scalar_and_wrt():
+    x, z = ad.Variable('x'), ad.Variable('z')
+    f = 2 * x + 3 * ad.Sin(x) + 10 * (x ** 3) + 4 * ad.Tanh(x) - 20
+    value, grad = f.value_and_grad({x: 1.0})
+    assert np.isclose(value, f.eval({x: 1.0}))
+    assert np.isclose(grad, f.d({x: 1.0}))
+    value, grad = f.value_and_grad({x: 1.0}, wrt=[z, x])
+    assert np.allclose(grad, [0.0, f.d({x: 1.0})])
+    value, grad = ad.Constant(3.0).value_and_grad({x: 1.0})
+    assert value == 3.0 and grad == 0
+
+
+def test_value_grad_hessian():
+    x, y = ad.Variable('x'), ad.Variable('y')
+    f = ad.Exp(x * y) + x * x * ad.Log(y)
+    feed = {x: 0.5, y: 1.5}
+    value, grad, hess = f.value_grad_hessian(feed)
+    assert np.isclose(value, f.eval(feed))
+    expected_d, expected_h = f.d(feed), f.hessian(feed)
+    for var1 in [x, y]:
+        assert np.isclose(grad[var1], expected_d[var1])
+        for var2 in [x, y]:
+            assert np.isclose(hess[var1][var2], expected_h[var1][var2])
+    value, grad, hess = f.value_grad_hessian(feed, wrt=[y, x])
+    assert np.allclose(grad, f.gradient(feed, [y, x]))
+    assert np.allclose(hess, f.hessian(feed, [y, x]))
+
+
+def test_value_grad_hessian_scalar_and_batch():
+    x = ad.Variable('x')
+    f = ad.Sin(x) * x
+    value, grad, hess = f.value_grad_hessian({x: 0.7})
+    assert np.isclose(value, f.eval({x: 0.7}))
+    assert np.isclose(grad, f.d({x: 0.7}))
+    assert np.isclose(hess, f.hessian({x: 0.7}))
+    xs = np.linspace(0, 1, 5)
+    value, grad, hess = f.value_grad_hessian({x: xs}, wrt=[x])
+    assert value.shape == (5,) and grad.shape == (5, 1)
+    assert hess.shape == (5, 1, 1)
+    assert np.allclose(grad[:, 0], f.d({x: xs}))
+    assert np.allclose(hess[:, 0, 0], f.hessian({x: xs}))
+    value, grad = f.value_and_grad({x: xs})
+    assert np.allclose(value, f.eval({x: xs}))
+    assert np.allclose(grad, f.d({x: xs}))
+
+
+def test_bare_variable_returns_numbers():
+    x, y = ad.Variable('x'), ad.Variable('y')
+    feed = {x: 2.0, y: 3.0}
+    for f in [x, x * 1.0]:
+        value, d, h = f.value_grad_hessian(feed)
+        assert type(d) is float and d == f.d(feed) == 1.0
+        assert type(h) is float and h == 0.0
+        value, d = f.value_and_grad(feed)
+        assert type(d) is float and d == 1.0
+    value, d, h = (x * y).value_grad_hessian(feed)
+    assert all(type(val) is float for val in d.values())
+    assert type(h[x][y]) is float and h[x][y] == 1.0
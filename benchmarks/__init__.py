@@ -0,0 +1,15 @@
+"""Benchmarks of the hot paths of ad.
+
+Run the whole suite from the root of the repository with
+
+    python -m benchmarks [--quick] [--output results.json]
+                         [--compare old.json] [workload ...]
+
+It times eval, the derivatives, hessian, d_n and d_expr on a set of
+representative graphs at several sizes, prints the calls per second and
+how the time scales with the size, and writes the results as JSON so runs
+can be compared over time. See benchmarks.workloads for the graphs.
+
+bench_construction and bench_traversal are standalone scripts for graph
+construction and for the checkpointed traversals.
+"""
@@ -0,0 +1,60 @@
+"""Measures how fast graphs are built with the overloaded operators and how
+much memory each node takes.
+
+Run from the root of the repository with
+
+    python -m benchmarks.bench_construction
+"""
+import gc
+import time
+import tracemalloc
+
+import ad
+
+# Ops built per step of build_graph
+_OPS_PER_STEP = 5
+
+
+def build_graph(steps):
+    """A chain of steps, each one with a few ops and numeric constants."""
+    x, y = ad.Variable('x'), ad.Variable('y')
+    f = x
+    for i in range(steps):
+        f = ad.Sin(f * 2.0 + x) - 1.0 * y
+    return f
+
+
+def throughput(steps):
+    """Best build rate of a few repeats, in nodes per second."""
+    best = None
+    for _ in range(3):
+        gc.collect()
+        start = time.perf_counter()
+        f = build_graph(steps)
+        elapsed = time.perf_counter() - start
+        del f
+        best = elapsed if best is None else min(best, elapsed)
+    return steps * _OPS_PER_STEP / best
+
+
+def memory(steps):
+    """Memory allocated while building the graph, in bytes per op node.
+    Constants the graph creates are included."""
+    gc.collect()
+    tracemalloc.start()
+    f = build_graph(steps)
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del f
+    return size / (steps * _OPS_PER_STEP)
+
+
+def main():
+    print('%-12s %16s %16s' % ('nodes', 'nodes per sec', 'bytes per node'))
+    for steps in [2000, 20000, 200000]:
+        print('%-12d %16.0f %16.1f' % (steps * _OPS_PER_STEP,
+                                       throughput(steps), memory(steps)))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,97 @@
+"""Compares the public eval, d and hessian methods, which switch to
+checkpointed evaluation on deep graphs, against calling the recursive
+helpers directly, and d_n, which skips the Taylor series for low orders,
+against the Taylor series it would otherwise propagate. Graphs too deep to recurse are
+compared against their compiled Tape instead, which evaluates them without
+any checkpoints, so the overhead of checkpointing shows up as a ratio.
+
+Run from the root of the repository with
+
+    python -m benchmarks.bench_traversal
+"""
+import timeit
+
+import ad
+
+
+def shallow_graph():
+    x, y = ad.Variable('x'), ad.Variable('y')
+    f = x * y
+    for i in range(8):
+        f = ad.Sin(f) * x + ad.Exp(y / (i + 1)) - f * f / (x + 2)
+    return f, {x: 0.5, y: 0.25}
+
+
+def shallow_univariate_graph():
+    x = ad.Variable('x')
+    f = x
+    for i in range(8):
+        f = ad.Sin(f) * x + ad.Exp(x / (i + 1)) - f * f / (x + 2)
+    return f, {x: 0.5}
+
+
+def chain_graph(depth):
+    x = ad.Variable('x')
+    f = x
+    for i in range(depth):
+        f = f * 0.999 + ad.Sin(x)
+    return f, {x: 0.5}
+
+
+def bench(func, number):
+    """Best time of a few repeats, in microseconds per call."""
+    return min(timeit.repeat(func, number=number, repeat=5)) / number * 1e6
+
+
+def compare(name, recursive_func, public_func, number):
+    try:
+        recursive_func()
+        t_rec = '%14.1f' % bench(recursive_func, number)
+    except RecursionError:
+        t_rec = '%14s' % 'overflow'
+    t_pub = bench(public_func, number)
+    print('%-24s %s %14.1f' % (name, t_rec, t_pub))
+
+
+def main():
+    print('%-24s %14s %14s' % ('', 'recursive (us)', 'public (us)'))
+
+    f, feed = shallow_graph()
+    compare('shallow eval', lambda: f._eval(feed, {}),
+            lambda: f.eval(feed), 2000)
+    compare('shallow d', lambda: f._d(feed, {}, {}),
+            lambda: f.d(feed), 1000)
+    compare('shallow hessian', lambda: f._h(feed, {}, {}, {}),
+            lambda: f.hessian(feed), 200)
+
+    for depth in [100, 5000]:
+        h, feed = chain_graph(depth)
+        compare('chain %d eval' % depth, lambda: h._eval(feed, {}),
+                lambda: h.eval(feed), 20)
+        compare('chain %d d' % depth, lambda: h._d(feed, {}, {}),
+                lambda: h.d(feed), 10)
+        compare('chain %d hessian' % depth, lambda: h._h(feed, {}, {}, {}),
+                lambda: h.hessian(feed), 5)
+
+    print('\n%-24s %14s %14s' % ('', 'taylor (us)', 'public (us)'))
+    g, feed1 = shallow_univariate_graph()
+    val = feed1[list(g.dep_vars)[0]]
+    for n in [1, 2, 4]:
+        compare('shallow d_n (n=%d)' % n,
+                lambda: g.derivatives(val, n)[n],
+                lambda: g.d_n(n, val), 50)
+
+    print('\n%-24s %14s %14s' % ('', 'tape (us)', 'public (us)'))
+    for depth in [1000, 5000]:
+        h, feed = chain_graph(depth)
+        tape = h.compile()
+        compare('chain %d eval' % depth, lambda: tape.eval(feed),
+                lambda: h.eval(feed), 20)
+        compare('chain %d d' % depth, lambda: tape.grad(feed),
+                lambda: h.d(feed), 10)
+        compare('chain %d hessian' % depth, lambda: tape.hessian(feed),
+                lambda: h.hessian(feed), 5)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,166 @@
+"""Runs the workloads, prints the results and reads and writes them as
+JSON."""
+import argparse
+import collections
+import datetime
+import json
+import platform
+import subprocess
+import sys
+import timeit
+
+import numpy as np
+
+from .workloads import WORKLOADS
+
+__all__ = ['measure', 'run', 'curves', 'main']
+
+# Format of the JSON files, bumped when the records change incompatibly
+_FORMAT = 1
+
+
+def measure(func, min_time=0.2, repeat=3):
+    """Best time of a few repeats, in seconds per call. Each repeat calls
+    func often enough to take at least min_time, after one call to warm up
+    caches."""
+    func()
+    number = 1
+    while True:
+        elapsed = timeit.timeit(func, number=number)
+        if elapsed >= min_time or number >= 10 ** 6:
+            break
+        number *= 10 if elapsed < min_time / 10 else 2
+    times = [elapsed] + timeit.repeat(func, number=number, repeat=repeat - 1)
+    return min(times) / number
+
+
+def run(names=None, quick=False, log=None):
+    """Times the workloads given, all of them by default, at their sizes.
+    Returns a list of records, one for each workload, op and size."""
+    min_time, repeat = (0.05, 3) if quick else (0.2, 5)
+    records = []
+    for name in names or WORKLOADS:
+        workload = WORKLOADS[name]
+        for size in workload.quick_sizes if quick else workload.sizes:
+            case = workload.build(size)
+            for op, func in case.ops.items():
+                seconds = measure(func, min_time, repeat)
+                record = collections.OrderedDict([
+                    ('workload', name), ('op', op),
+                    ('param', workload.param), ('size', size),
+                    ('nodes', case.nodes), ('variables', case.variables),
+                    ('seconds', seconds), ('ops_per_sec', 1.0 / seconds),
+                    ('nodes_per_sec', case.nodes / seconds)])
+                record.update(case.extra.get(op, {}))
+                records.append(record)
+                if log is not None:
+                    log(record)
+    return records
+
+
+def curves(records):
+    """Groups the records by workload and op into scaling curves. The
+    exponent is the slope of log(seconds) against log(size), so 1 means
+    the time grows linearly with the size."""
+    grouped = collections.OrderedDict()
+    for record in records:
+        key = '%s/%s' % (record['workload'], record['op'])
+        curve = grouped.setdefault(key, collections.OrderedDict([
+            ('param', record['param']), ('sizes', []), ('nodes', []),
+            ('seconds', []), ('exponent', None)]))
+        curve['sizes'].append(record['size'])
+        curve['nodes'].append(record['nodes'])
+        curve['seconds'].append(record['seconds'])
+    for curve in grouped.values():
+        if len(set(curve['sizes'])) > 1:
+            slope, _ = np.polyfit(np.log(curve['sizes']),
+                                  np.log(curve['seconds']), 1)
+            curve['exponent'] = float(slope)
+    return grouped
+
+
+def _git_commit():
+    try:
+        out = subprocess.run(['git', 'rev-parse', 'HEAD'], check=True,
+                             capture_output=True, text=True)
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return out.stdout.strip()
+
+
+def _environment():
+    return collections.OrderedDict([
+        ('format', _FORMAT),
+        ('date', datetime.datetime.now(datetime.timezone.utc).isoformat()),
+        ('commit', _git_commit()),
+        ('python', platform.python_version()),
+        ('numpy', np.__version__),
+        ('platform', platform.platform())])
+
+
+def _print_record(record):
+    print('%-16s %-16s %-10s %8d %9d %14.1f %14.0f' % (
+        record['workload'], record['op'], record['param'], record['size'],
+        record['nodes'], record['ops_per_sec'], record['nodes_per_sec']))
+    sys.stdout.flush()
+
+
+def _print_curves(grouped):
+    print('\n%-34s %-10s %10s' % ('scaling', 'versus', 'exponent'))
+    for key, curve in grouped.items():
+        if curve['exponent'] is not None:
+            print('%-34s %-10s %10.2f' % (key, curve['param'],
+                                          curve['exponent']))
+
+
+def _print_comparison(records, old_records):
+    old = {(r['workload'], r['op'], r['size']): r['seconds']
+           for r in old_records}
+    print('\n%-16s %-16s %8s %10s' % ('compared', '', 'size', 'speedup'))
+    for record in records:
+        key = (record['workload'], record['op'], record['size'])
+        if key in old:
+            print('%-16s %-16s %8d %9.2fx' % (key + (old[key] /
+                                                     record['seconds'],)))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog='python -m benchmarks',
+        description='Times the hot paths of ad on representative graphs.')
+    parser.add_argument('workloads', nargs='*', metavar='workload',
+                        help='workloads to run, out of %s (default: all)'
+                        % ', '.join(WORKLOADS))
+    parser.add_argument('-q', '--quick', action='store_true',
+                        help='fewer and smaller sizes, shorter timings')
+    parser.add_argument('-o', '--output',
+                        help='write the results to this JSON file')
+    parser.add_argument('-c', '--compare',
+                        help='print the speedups over the results in this '
+                        'JSON file')
+    parser.add_argument('-l', '--list', action='store_true',
+                        help='describe the workloads and exit')
+    args = parser.parse_args(argv)
+    if args.list:
+        for name, workload in WORKLOADS.items():
+            print('%-16s %s' % (name, ' '.join(workload.description.split())))
+        return
+    for name in args.workloads:
+        if name not in WORKLOADS:
+            parser.error('unknown workload %r' % name)
+    print('%-16s %-16s %-10s %8s %9s %14s %14s' % (
+        'workload', 'op', 'param', 'size', 'nodes', 'ops per sec',
+        'nodes per sec'))
+    records = run(args.workloads, args.quick, log=_print_record)
+    grouped = curves(records)
+    _print_curves(grouped)
+    if args.compare:
+        with open(args.compare) as f:
+            _print_comparison(records, json.load(f)['results'])
+    if args.output:
+        results = collections.OrderedDict([
+            ('environment', _environment()), ('quick', args.quick),
+            ('results', records), ('curves', grouped)])
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+            f.write('\n')
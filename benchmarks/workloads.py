@@ -0,0 +1,146 @@
+"""The graphs timed by the benchmark suite. Each workload builds a Case for
+a size, with the operations to time on it as functions taking no
+arguments."""
+import collections
+
+import numpy as np
+
+import ad
+from ad.ad import _topological_sort
+
+from .bench_construction import build_graph, _OPS_PER_STEP
+from .bench_traversal import chain_graph
+
+__all__ = ['Case', 'Workload', 'WORKLOADS']
+
+# nodes and variables of the graph, ops mapping names to the functions to
+# time, and extra mapping op names to more numbers recorded with them
+Case = collections.namedtuple('Case', ['nodes', 'variables', 'ops', 'extra'])
+
+# param names what size means, sizes and quick_sizes are used for full and
+# quick runs, build returns the Case for a size
+Workload = collections.namedtuple(
+    'Workload', ['param', 'sizes', 'quick_sizes', 'build', 'description'])
+
+# Dense hessians of larger graphs take too long for a benchmark run
+_MAX_HESSIAN_VARIABLES = 100
+
+
+def _size(expr):
+    return len(_topological_sort(expr))
+
+
+def _tree_sum(terms):
+    """Helper - Adds the terms pairwise, so the sum is wide and shallow."""
+    terms = list(terms)
+    while len(terms) > 1:
+        pairs = [a + b for a, b in zip(terms[::2], terms[1::2])]
+        if len(terms) % 2:
+            pairs.append(terms[-1])
+        terms = pairs
+    return terms[0]
+
+
+def _multivariate_case(f, feed):
+    """Helper - The usual ops for a function of many variables."""
+    wrt = sorted(feed, key=lambda var: var.name)
+    ops = collections.OrderedDict()
+    ops['eval'] = lambda: f.eval(feed)
+    ops['d'] = lambda: f.d(feed)
+    ops['value_and_grad'] = lambda: f.value_and_grad(feed, wrt)
+    if len(wrt) <= _MAX_HESSIAN_VARIABLES:
+        ops['hessian'] = lambda: f.hessian(feed, wrt)
+    return Case(_size(f), len(wrt), ops, {})
+
+
+def construction(steps):
+    """Builds a chain of Sin, products and sums with the operators."""
+    ops = {'build': lambda: build_graph(steps)}
+    return Case(steps * _OPS_PER_STEP, 2, ops, {})
+
+
+def deep_chain(depth):
+    """A chain depth nodes deep in one variable, deeper than the recursion
+    limit for the larger sizes."""
+    f, feed = chain_graph(depth)
+    ops = collections.OrderedDict()
+    ops['eval'] = lambda: f.eval(feed)
+    ops['d'] = lambda: f.d(feed)
+    ops['hessian'] = lambda: f.hessian(feed)
+    return Case(_size(f), 1, ops, {})
+
+
+def wide_sum(n_vars):
+    """The sum of x_i * Sin(x_i) over n_vars variables."""
+    xs = [ad.Variable('x%05d' % i) for i in range(n_vars)]
+    f = _tree_sum(x * ad.Sin(x) for x in xs)
+    feed = {x: 0.1 * (i + 1) for i, x in enumerate(xs)}
+    return _multivariate_case(f, feed)
+
+
+def rosenbrock(n_vars):
+    """The n_vars dimensional Rosenbrock function."""
+    xs = [ad.Variable('x%05d' % i) for i in range(n_vars)]
+    f = _tree_sum(100 * (xs[i + 1] - xs[i] ** 2) ** 2 + (1 - xs[i]) ** 2
+                  for i in range(n_vars - 1))
+    feed = {x: -1.2 if i % 2 == 0 else 1.0 for i, x in enumerate(xs)}
+    return _multivariate_case(f, feed)
+
+
+def logistic_loss(n_features, n_samples=100):
+    """The logistic regression loss of n_features weights on n_samples
+    random points, with one subgraph per point."""
+    rng = np.random.RandomState(0)
+    data = rng.randn(n_samples, n_features)
+    labels = np.sign(data @ rng.randn(n_features) + 0.1)
+    ws = [ad.Variable('w%05d' % j) for j in range(n_features)]
+    terms = []
+    for row, label in zip(data, labels):
+        z = _tree_sum(w * float(v) for w, v in zip(ws, row))
+        terms.append(ad.Log(1 + ad.Exp(-float(label) * z)))
+    f = _tree_sum(terms) / n_samples
+    feed = {w: 0.01 for w in ws}
+    return _multivariate_case(f, feed)
+
+
+def _sin_exp():
+    x = ad.Variable('x')
+    return ad.Sin(ad.Exp(ad.Sin(x) * x)) + ad.Exp(ad.Sin(ad.Exp(x))), x
+
+
+def taylor_order(n):
+    """The n-th derivative of a composition of Sin and Exp with d_n."""
+    f, x = _sin_exp()
+    ops = {'d_n': lambda: f.d_n(n, 0.3)}
+    return Case(_size(f), 1, ops, {})
+
+
+def d_expr_growth(n):
+    """Builds the n-th derivative of Sin(Exp(x)) * x as an Expression, with
+    and without simplifying it. result_nodes is the size of the
+    derivative."""
+    x = ad.Variable('x')
+    f = ad.Sin(ad.Exp(x)) * x
+    ops = collections.OrderedDict()
+    ops['d_expr'] = lambda: f.d_expr(n)
+    ops['d_expr_simplify'] = lambda: f.d_expr(n, simplify=True)
+    extra = {op: {'result_nodes': _size(func())} for op, func in ops.items()}
+    return Case(_size(f), 1, ops, extra)
+
+
+WORKLOADS = collections.OrderedDict([
+    ('construction', Workload('steps', [1000, 10000, 100000], [1000, 10000],
+                              construction, construction.__doc__)),
+    ('deep_chain', Workload('depth', [100, 1000, 10000], [100, 1000],
+                            deep_chain, deep_chain.__doc__)),
+    ('wide_sum', Workload('variables', [10, 100, 1000], [10, 100],
+                          wide_sum, wide_sum.__doc__)),
+    ('rosenbrock', Workload('variables', [2, 10, 100, 1000], [2, 10, 100],
+                            rosenbrock, rosenbrock.__doc__)),
+    ('logistic_loss', Workload('features', [2, 10, 50], [2, 10],
+                               logistic_loss, logistic_loss.__doc__)),
+    ('taylor_order', Workload('order', [1, 2, 4, 8, 16, 32], [1, 4, 16],
+                              taylor_order, taylor_order.__doc__)),
+    ('d_expr_growth', Workload('order', [1, 2, 3, 4, 5, 6], [1, 2, 3, 4],
+                               d_expr_growth, d_expr_growth.__doc__)),
+])